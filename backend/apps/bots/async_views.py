@@ -0,0 +1,114 @@
+"""
+ASGI 模式下的异步视图
+
+BOT_ASYNC_VIEWS=True 时由 urls.py 挂载，替换心跳与机器人广场列表的同步视图：
+心跳的认证与写库都使用异步 ORM，不占用线程；广场列表的匿名缓存命中
+直接在事件循环中返回，未命中及其他请求交给同步视图处理。
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+from rest_framework.renderers import JSONRenderer
+
+from .authentication import BotAuthentication, api_key_cache
+from .cache import plaza_cache
+from .heartbeat import arecord_heartbeat
+from .serializers import BotHeartbeatSerializer
+from .throttling import acheck_throttles, throttled_detail
+from .views import BotHeartbeatView, BotListView
+
+
+def throttled_response(wait):
+    detail, retry_after = throttled_detail(wait)
+    return JsonResponse({'detail': str(detail)}, status=429, headers={'Retry-After': retry_after})
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncBotHeartbeatView(View):
+    """与 BotHeartbeatView 的请求与响应格式相同"""
+    http_method_names = ['post']
+
+    async def post(self, request):
+        wait = await acheck_throttles(BotHeartbeatView.throttle_classes, request)
+        if wait is not None:
+            return throttled_response(wait)
+
+        authenticator = BotAuthentication()
+        try:
+            result = await authenticator.aauthenticate(request)
+        except exceptions.AuthenticationFailed as exc:
+            return JsonResponse(
+                {'detail': str(exc.detail)},
+                status=401,
+                headers={'WWW-Authenticate': authenticator.authenticate_header(request)}
+            )
+        if result is None:
+            return JsonResponse({'error': 'Invalid API Key'}, status=401)
+        bot = result[0]
+
+        try:
+            data = self._parse_body(request)
+        except ValueError as exc:
+            return JsonResponse({'detail': f'JSON parse error - {exc}'}, status=400)
+
+        serializer = BotHeartbeatSerializer(data=data)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=400)
+
+        bot_status = serializer.validated_data.get('status', 'online')
+        if not await arecord_heartbeat(bot, bot_status, timezone.now()):
+            api_key_cache.invalidate_bot(bot.pk)
+            return JsonResponse({'error': 'Invalid API Key'}, status=401)
+        return JsonResponse({'status': bot_status})
+
+    def _parse_body(self, request):
+        if request.content_type == 'application/json':
+            return json.loads(request.body or b'{}')
+        return request.POST
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncBotListView(View):
+    """机器人广场列表：匿名缓存命中在事件循环中返回，其余请求交给 BotListView"""
+    sync_view = staticmethod(BotListView.as_view())
+
+    async def get(self, request, *args, **kwargs):
+        if self._is_cacheable(request):
+            entry = await plaza_cache.alookup(request)
+            if entry is not None:
+                # 未命中时由同步视图检查限流，避免重复扣减
+                wait = await acheck_throttles(BotListView.throttle_classes, request)
+                if wait is not None:
+                    return throttled_response(wait)
+                return self._cached_response(request, *entry)
+        return await self._delegate(request, *args, **kwargs)
+
+    async def post(self, request, *args, **kwargs):
+        return await self._delegate(request, *args, **kwargs)
+
+    async def _delegate(self, request, *args, **kwargs):
+        return await sync_to_async(self.sync_view)(request, *args, **kwargs)
+
+    def _is_cacheable(self, request):
+        # 不带 JWT 即为匿名请求；浏览器请求可能协商为可浏览 API，交给同步视图处理
+        return (
+            plaza_cache.ttl > 0
+            and 'HTTP_AUTHORIZATION' not in request.META
+            and 'text/html' not in request.headers.get('Accept', '')
+        )
+
+    def _cached_response(self, request, etag, data):
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(JSONRenderer().render(data), content_type='application/json')
+        response['ETag'] = etag
+        response['X-Cache'] = 'HIT'
+        patch_vary_headers(response, ['Accept'])
+        return response
@@ -1,6 +1,83 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
 from rest_framework import authentication, exceptions
+from apps.bots.metrics import count_cache
 from apps.bots.models import Bot
 
+# 认证只需要的字段，其余字段在访问时按需加载
+IDENTITY_FIELDS = ('id', 'bot_id', 'is_public')
+
+
+class ApiKeyCache:
+    """
+    API Key -> 机器人身份 (id, bot_id, is_public) 的进程内缓存
+    按 LRU 淘汰，条目最长存活 BOT_API_KEY_CACHE_TTL 秒。
+    每个 worker 各有一份，本进程内的失效立即生效，其他进程最迟在 TTL 后生效。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._keys_by_bot = {}
+
+    def get(self, api_key):
+        identity = self._lookup(api_key)
+        count_cache('api_key', identity is not None)
+        return identity
+
+    def _lookup(self, api_key):
+        with self._lock:
+            entry = self._entries.get(api_key)
+            if entry is None:
+                return None
+            identity, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(api_key)
+                return None
+            self._entries.move_to_end(api_key)
+            return identity
+
+    def set(self, api_key, identity):
+        ttl = settings.BOT_API_KEY_CACHE_TTL
+        max_size = settings.BOT_API_KEY_CACHE_SIZE
+        if ttl <= 0 or max_size <= 0:
+            return
+        with self._lock:
+            self._remove(api_key)
+            old_key = self._keys_by_bot.get(identity[0])
+            if old_key is not None:
+                self._remove(old_key)
+            self._entries[api_key] = (identity, time.monotonic() + ttl)
+            self._keys_by_bot[identity[0]] = api_key
+            while len(self._entries) > max_size:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_bot(self, bot_pk):
+        """机器人变更（换 Key、修改、删除）后移除其缓存条目"""
+        with self._lock:
+            api_key = self._keys_by_bot.get(bot_pk)
+            if api_key is not None:
+                self._remove(api_key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_bot.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, api_key):
+        entry = self._entries.pop(api_key, None)
+        if entry is not None:
+            self._keys_by_bot.pop(entry[0][0], None)
+
+
+api_key_cache = ApiKeyCache()
+
 
 class BotAuthentication(authentication.BaseAuthentication):
     """
@@ -15,15 +92,37 @@ class BotAuthentication(authentication.BaseAuthentication):
         if not api_key:
             return None
 
-        try:
-            bot = Bot.objects.get(api_key=api_key)
-        except Bot.DoesNotExist:
-            raise exceptions.AuthenticationFailed('Invalid API Key')
+        identity = api_key_cache.get(api_key)
+        if identity is None:
+            try:
+                identity = Bot.objects.values_list(*IDENTITY_FIELDS).get(api_key=api_key)
+            except Bot.DoesNotExist:
+                raise exceptions.AuthenticationFailed('Invalid API Key')
+            api_key_cache.set(api_key, identity)
+
+        return (self._bot_from_identity(identity), None)
+
+    async def aauthenticate(self, request):
+        """authenticate 的异步版本，供 ASGI 模式下的异步视图使用"""
+        api_key = request.headers.get(self.keyword)
+        if not api_key:
+            return None
+
+        identity = api_key_cache.get(api_key)
+        if identity is None:
+            try:
+                identity = await Bot.objects.values_list(*IDENTITY_FIELDS).aget(api_key=api_key)
+            except Bot.DoesNotExist:
+                raise exceptions.AuthenticationFailed('Invalid API Key')
+            api_key_cache.set(api_key, identity)
+
+        return (self._bot_from_identity(identity), None)
 
+    def _bot_from_identity(self, identity):
+        bot = Bot.from_db(Bot.objects.db, IDENTITY_FIELDS, identity)
         if not bot.is_public:
             raise exceptions.AuthenticationFailed('Bot is not public')
-
-        return (bot, None)
+        return bot
 
     def authenticate_header(self, request):
         return self.keyword
@@ -0,0 +1,163 @@
+"""
+机器人广场匿名读缓存
+
+匿名访客看到的 GET /api/bots/ 与 GET /api/bots/<id>/ 完全相同，响应数据按
+主机 + 路径 + 排序后的查询参数 + 协商的媒体类型存入 Django 缓存，最长存活 BOT_PLAZA_CACHE_TTL 秒。
+JSON 与可浏览 API 各占一个条目，响应带 Vary: Accept。
+缓存键带有全局版本号，机器人注册、修改、删除、绑定或在线状态变化时递增版本号，
+旧条目随之失效并在 TTL 后被淘汰。
+
+每个条目同时保存按内容计算的 ETag，请求带有匹配的 If-None-Match 时
+直接返回 304，不访问数据库也不序列化。
+
+版本号保存在同一缓存后端中：locmem 后端下各 worker 各有一份，
+其他 worker 中的旧响应最迟在 TTL 后过期；file / redis 后端下立即对所有 worker 生效。
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from .metrics import count_cache
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'bots:plaza:version'
+
+
+class PlazaCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def ttl(self):
+        return settings.BOT_PLAZA_CACHE_TTL
+
+    def is_cacheable(self, request):
+        return (
+            self.ttl > 0
+            and request.method == 'GET'
+            and not request.user.is_authenticated
+        )
+
+    def version(self):
+        version = cache.get(VERSION_KEY)
+        if version is None:
+            # 用时间戳初始化，版本号被淘汰后不会与旧条目的版本号重合
+            cache.add(VERSION_KEY, int(time.time() * 1000), timeout=None)
+            version = cache.get(VERSION_KEY)
+        return version
+
+    def bump(self):
+        """使当前所有广场缓存失效"""
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.add(VERSION_KEY, int(time.time() * 1000), timeout=None)
+        except Exception:
+            logger.exception('广场缓存版本号递增失败')
+
+    def key(self, request, media_type, version=None):
+        if version is None:
+            version = self.version()
+        query = urlencode(sorted(request.GET.lists()), doseq=True)
+        raw = f'{media_type} {request.get_host()}{request.path}?{query}'
+        digest = hashlib.md5(raw.encode()).hexdigest()
+        return f'bots:plaza:{version}:{digest}'
+
+    def etag(self, media_type, data):
+        content = JSONRenderer().render(data)
+        digest = hashlib.md5(media_type.encode() + content).hexdigest()
+        return f'"{digest}"'
+
+    def get(self, key):
+        """返回 (etag, data) 或 None"""
+        entry = cache.get(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        count_cache('plaza', entry is not None)
+        return entry
+
+    async def alookup(self, request):
+        """
+        异步视图的快速路径：只查找不写入，只统计命中
+        未命中时交给同步视图，由其再次查找并统计；快速路径只返回 JSON
+        """
+        version = await cache.aget(VERSION_KEY)
+        if version is None:
+            return None
+        entry = await cache.aget(self.key(request, JSONRenderer.media_type, version))
+        if entry is not None:
+            with self._lock:
+                self.hits += 1
+            count_cache('plaza', True)
+        return entry
+
+    def set(self, key, etag, data):
+        cache.set(key, (etag, data), timeout=self.ttl)
+
+    def stats(self):
+        """本进程的命中统计"""
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            'backend': settings.CACHES['default']['BACKEND'],
+            'ttl': self.ttl,
+            'version': cache.get(VERSION_KEY),
+            'pid': os.getpid(),
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / total if total else None,
+        }
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = self.misses = 0
+
+
+plaza_cache = PlazaCache()
+
+
+class PlazaCacheMixin:
+    """匿名 GET 请求先查广场缓存，响应头 X-Cache 标明是否命中"""
+
+    def get(self, request, *args, **kwargs):
+        if not plaza_cache.is_cacheable(request):
+            return super().get(request, *args, **kwargs)
+
+        media_type = request.accepted_media_type
+        key = plaza_cache.key(request, media_type)
+        entry = plaza_cache.get(key)
+        if entry is not None:
+            etag, data = entry
+            response = Response(data)
+            cache_status = 'HIT'
+        else:
+            response = super().get(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            etag = plaza_cache.etag(media_type, response.data)
+            plaza_cache.set(key, etag, response.data)
+            cache_status = 'MISS'
+
+        not_modified = get_conditional_response(request._request, etag=etag)
+        if not_modified is not None:
+            response = not_modified
+        response['ETag'] = etag
+        response['X-Cache'] = cache_status
+        patch_vary_headers(response, ['Accept'])
+        return response
@@ -0,0 +1,247 @@
+"""
+机器人心跳写入
+
+buffered 模式下心跳只写入进程内缓冲区，同一机器人的多次心跳只保留最新一次，
+由后台线程每隔 BOT_HEARTBEAT_FLUSH_INTERVAL 秒合并为批量 UPDATE 写库；
+缓冲时间超过 BOT_HEARTBEAT_MAX_STALENESS 秒时由下一次心跳就地触发写库。
+
+coalesced 模式下先读出当前状态，状态不变且库中 last_seen 距今不足
+BOT_HEARTBEAT_GRANULARITY 秒时不写库，需要写库时只更新 status / last_seen。
+"""
+import atexit
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .cache import plaza_cache
+from .metrics import HEARTBEATS_FLUSHED, count_heartbeat
+from .models import Bot
+
+logger = logging.getLogger(__name__)
+
+# 单条 UPDATE 语句最多合并的机器人数
+FLUSH_BATCH_SIZE = 500
+
+
+def write_heartbeats(entries):
+    """将 {bot_pk: (status, last_seen)} 批量写库，只更新 status / last_seen，有机器人状态变化时使广场缓存失效"""
+    bots = [
+        Bot(pk=pk, status=status, last_seen=last_seen)
+        for pk, (status, last_seen) in entries.items()
+    ]
+    current = dict(Bot.objects.filter(pk__in=entries).values_list('pk', 'status'))
+    Bot.objects.bulk_update(bots, ['status', 'last_seen'], batch_size=FLUSH_BATCH_SIZE)
+    if any(current.get(bot.pk, bot.status) != bot.status for bot in bots):
+        plaza_cache.bump()
+
+
+class HeartbeatBuffer:
+    """进程内心跳缓冲区（每个 gunicorn worker 一份）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = {}
+        self._oldest = None
+        self._thread = None
+        self._exit_hook = False
+
+    @property
+    def flush_interval(self):
+        return settings.BOT_HEARTBEAT_FLUSH_INTERVAL
+
+    @property
+    def max_staleness(self):
+        return settings.BOT_HEARTBEAT_MAX_STALENESS
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, bot_pk, status, last_seen):
+        if self.stage(bot_pk, status, last_seen):
+            self.flush()
+
+    def stage(self, bot_pk, status, last_seen):
+        """只写入缓冲区，返回是否已超过 max_staleness 需要立即写库"""
+        now = time.monotonic()
+        with self._lock:
+            self._pending[bot_pk] = (status, last_seen)
+            if self._oldest is None:
+                self._oldest = now
+            overdue = now - self._oldest >= self.max_staleness
+
+        self._ensure_worker()
+        return overdue
+
+    def flush(self):
+        """写出当前缓冲的全部心跳，返回写出的机器人数"""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                self._oldest = None
+            if not pending:
+                return 0
+
+            try:
+                write_heartbeats(pending)
+            except Exception:
+                # 写库失败时放回缓冲区，缓冲期间收到的新心跳优先
+                with self._lock:
+                    pending.update(self._pending)
+                    self._pending = pending
+                    self._oldest = time.monotonic()
+                raise
+            HEARTBEATS_FLUSHED.inc(len(pending))
+            return len(pending)
+
+    def _ensure_worker(self):
+        if self.flush_interval <= 0:
+            return
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name='heartbeat-flusher', daemon=True
+            )
+            self._thread.start()
+            if not self._exit_hook:
+                atexit.register(self._flush_at_exit)
+                self._exit_hook = True
+
+    def _run(self):
+        while self.flush_interval > 0:
+            time.sleep(self.flush_interval)
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('心跳批量写库失败，将在下个周期重试')
+            finally:
+                close_old_connections()
+
+    def _flush_at_exit(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('进程退出时心跳写库失败')
+
+
+heartbeat_buffer = HeartbeatBuffer()
+
+
+def _heartbeat_write(current, status, last_seen):
+    """
+    coalesced 模式下根据库中的 (status, last_seen) 决定写入哪些字段
+    返回 None 表示无需写库
+    """
+    stored_status, stored_last_seen = current
+    if stored_status != status:
+        return {'status': status, 'last_seen': last_seen}
+    granularity = timedelta(seconds=settings.BOT_HEARTBEAT_GRANULARITY)
+    if stored_last_seen is None or last_seen - stored_last_seen >= granularity:
+        return {'last_seen': last_seen}
+    return None
+
+
+def record_coalesced_heartbeat(bot, status, last_seen):
+    bots = Bot.objects.filter(pk=bot.pk)
+    current = bots.values_list('status', 'last_seen').first()
+    if current is None:
+        count_heartbeat('coalesced', 'rejected')
+        return False
+    fields = _heartbeat_write(current, status, last_seen)
+    if fields is None:
+        count_heartbeat('coalesced', 'skipped')
+        return True
+    # 读出之后状态可能已被其他请求或离线回收改写，带上旧状态作为条件
+    if bots.filter(status=current[0]).update(**fields):
+        if 'status' in fields:
+            plaza_cache.bump()
+        count_heartbeat('coalesced', 'written')
+        return True
+    if bots.update(status=status, last_seen=last_seen):
+        plaza_cache.bump()
+        count_heartbeat('coalesced', 'written')
+        return True
+    count_heartbeat('coalesced', 'rejected')
+    return False
+
+
+def record_heartbeat(bot, status, last_seen):
+    """
+    按 BOT_HEARTBEAT_MODE 记录一次心跳
+    同步写库时机器人已不存在（身份来自缓存）返回 False
+    """
+    if settings.BOT_HEARTBEAT_MODE == 'buffered':
+        heartbeat_buffer.add(bot.pk, status, last_seen)
+        count_heartbeat('buffered', 'buffered')
+        return True
+    if settings.BOT_HEARTBEAT_MODE == 'coalesced':
+        return record_coalesced_heartbeat(bot, status, last_seen)
+
+    bots = Bot.objects.filter(pk=bot.pk)
+    now = timezone.now()
+    # 状态不变是常态，只需一条 UPDATE；状态变化时再写 status 并使广场缓存失效
+    if bots.filter(status=status).update(last_seen=last_seen, updated_at=now):
+        count_heartbeat('sync', 'written')
+        return True
+    if bots.update(status=status, last_seen=last_seen, updated_at=now):
+        plaza_cache.bump()
+        count_heartbeat('sync', 'written')
+        return True
+    count_heartbeat('sync', 'rejected')
+    return False
+
+
+async def arecord_coalesced_heartbeat(bot, status, last_seen):
+    bots = Bot.objects.filter(pk=bot.pk)
+    current = await bots.values_list('status', 'last_seen').afirst()
+    if current is None:
+        count_heartbeat('coalesced', 'rejected')
+        return False
+    fields = _heartbeat_write(current, status, last_seen)
+    if fields is None:
+        count_heartbeat('coalesced', 'skipped')
+        return True
+    if await bots.filter(status=current[0]).aupdate(**fields):
+        if 'status' in fields:
+            await sync_to_async(plaza_cache.bump)()
+        count_heartbeat('coalesced', 'written')
+        return True
+    if await bots.aupdate(status=status, last_seen=last_seen):
+        await sync_to_async(plaza_cache.bump)()
+        count_heartbeat('coalesced', 'written')
+        return True
+    count_heartbeat('coalesced', 'rejected')
+    return False
+
+
+async def arecord_heartbeat(bot, status, last_seen):
+    """record_heartbeat 的异步版本，供 ASGI 模式下的异步视图使用"""
+    if settings.BOT_HEARTBEAT_MODE == 'buffered':
+        if heartbeat_buffer.stage(bot.pk, status, last_seen):
+            await sync_to_async(heartbeat_buffer.flush)()
+        count_heartbeat('buffered', 'buffered')
+        return True
+    if settings.BOT_HEARTBEAT_MODE == 'coalesced':
+        return await arecord_coalesced_heartbeat(bot, status, last_seen)
+
+    bots = Bot.objects.filter(pk=bot.pk)
+    now = timezone.now()
+    if await bots.filter(status=status).aupdate(last_seen=last_seen, updated_at=now):
+        count_heartbeat('sync', 'written')
+        return True
+    if await bots.aupdate(status=status, last_seen=last_seen, updated_at=now):
+        await sync_to_async(plaza_cache.bump)()
+        count_heartbeat('sync', 'written')
+        return True
+    count_heartbeat('sync', 'rejected')
+    return False
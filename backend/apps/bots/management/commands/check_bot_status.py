@@ -1,11 +1,13 @@
-from django.core.management.base import BaseCommand
-from django.utils import timezone
 from datetime import timedelta
-from apps.bots.models import Bot
 
+from apps.common.commands import PeriodicCommand
+from apps.bots.reaper import reap_stale_bots
 
-class Command(BaseCommand):
+
+class Command(PeriodicCommand):
     help = '检查并更新机器人在线状态'
+    action = '检查'
+    default_interval = 60
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -14,25 +16,21 @@ class Command(BaseCommand):
             default=5,
             help='超过此分钟数未收到心跳则视为离线 (默认: 5)'
         )
-
-    def handle(self, *args, **options):
-        timeout_minutes = options['timeout_minutes']
-        threshold = timezone.now() - timedelta(minutes=timeout_minutes)
-
-        offline_bots = Bot.objects.filter(
-            status='online',
-            last_seen__lt=threshold
-        ).update(status='offline')
-
-        unknown_bots = Bot.objects.filter(
-            status='unknown',
-            last_seen__isnull=True
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='每条 UPDATE 最多处理的机器人数 (默认: 1000)'
         )
+        super().add_arguments(parser)
 
-        for bot in unknown_bots:
-            if bot.last_seen is None:
-                bot.status = 'unknown'
+    def run_once(self, **options):
+        timeout = timedelta(minutes=options['timeout_minutes'])
+        self.report(reap_stale_bots(timeout, options['chunk_size']))
 
+    def report(self, stats):
         self.stdout.write(
-            self.style.SUCCESS(f'已更新 {offline_bots} 个机器人状态为离线')
+            self.style.SUCCESS(f'已更新 {stats.updated} 个机器人状态为离线')
+            + f' (扫描 {stats.scanned} 个，{stats.chunks} 批，'
+            f'耗时 {stats.duration * 1000:.1f}ms，单批最长 {stats.max_chunk_duration * 1000:.1f}ms)'
         )
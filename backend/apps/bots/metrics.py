@@ -0,0 +1,49 @@
+"""
+机器人相关指标（Prometheus 格式），由 GET /api/metrics/ 导出
+各状态的机器人数来自 BotStatusCount，在抓取时读取（见 apps.monitoring.collectors）
+"""
+from prometheus_client import Counter, Gauge, Histogram
+
+HEARTBEATS = Counter(
+    'bot_heartbeats_total', '收到的心跳数',
+    ['mode', 'outcome'],  # outcome: written / skipped / buffered / rejected
+)
+HEARTBEATS_FLUSHED = Counter(
+    'bot_heartbeat_buffer_flushed_total', 'buffered 模式下批量写库的心跳数',
+)
+CACHE_REQUESTS = Counter(
+    'bot_cache_requests_total', '进程内缓存与广场缓存的查找次数',
+    ['cache', 'result'],  # cache: plaza / api_key，result: hit / miss
+)
+THROTTLED = Counter(
+    'bot_throttled_requests_total', '被限流拒绝的请求数', ['scope'],
+)
+REAPER_DURATION = Histogram(
+    'bot_reaper_run_duration_seconds', '单次离线回收耗时',
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+REAPER_MARKED_OFFLINE = Counter(
+    'bot_reaper_marked_offline_total', '离线回收标记为离线的机器人数',
+)
+REAPER_LAST_RUN = Gauge(
+    'bot_reaper_last_run_timestamp_seconds', '最近一次离线回收完成的时间',
+    multiprocess_mode='max',
+)
+
+
+def count_heartbeat(mode, outcome):
+    HEARTBEATS.labels(mode, outcome).inc()
+
+
+def count_cache(cache, hit):
+    CACHE_REQUESTS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def count_throttled(scope):
+    THROTTLED.labels(scope).inc()
+
+
+def observe_reap(stats):
+    REAPER_DURATION.observe(stats.duration)
+    REAPER_MARKED_OFFLINE.inc(stats.updated)
+    REAPER_LAST_RUN.set_to_current_time()
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.16 on 2026-10-18 12:40
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # 并发建索引，避免在心跳持续写入时长时间锁表
+    atomic = False
+
+    dependencies = [
+        ('bots', '0001_initial'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='bot',
+            index=models.Index(condition=models.Q(('is_public', True)), fields=['-created_at', '-id'], name='bot_public_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='bot',
+            index=models.Index(fields=['master', '-created_at'], name='bot_master_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='bot',
+            index=models.Index(condition=models.Q(('status', 'online')), fields=['last_seen', 'id'], name='bot_online_last_seen_idx'),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 4.2.16 on 2026-10-18 13:05
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+# 连续的中日韩字符拆成相邻二元组："骰子机器人" -> "骰子 子机 机器 器人"
+CREATE_FUNCTIONS = r"""
+CREATE OR REPLACE FUNCTION bots_cjk_bigrams(input text) RETURNS text
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT coalesce(string_agg(
+        CASE WHEN length(run) = 1 THEN run
+             ELSE (SELECT string_agg(substr(run, i, 2), ' ' ORDER BY i)
+                   FROM generate_series(1, length(run) - 1) AS i)
+        END, ' '), '')
+    FROM (SELECT (regexp_matches(coalesce(input, ''), '[㐀-鿿豈-﫿]+', 'g'))[1] AS run) AS runs
+$$;
+
+CREATE OR REPLACE FUNCTION bots_bot_search_vector_update() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('simple',
+            coalesce(NEW.bot_id, '') || ' ' || coalesce(NEW.nickname, '') || ' ' || bots_cjk_bigrams(NEW.nickname)), 'A') ||
+        setweight(to_tsvector('simple',
+            coalesce(NEW.description, '') || ' ' || bots_cjk_bigrams(NEW.description)), 'B');
+    RETURN NEW;
+END
+$$;
+
+-- 心跳只更新 status / last_seen，不会触发重算
+CREATE TRIGGER bots_bot_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF bot_id, nickname, description ON bots_bot
+    FOR EACH ROW EXECUTE FUNCTION bots_bot_search_vector_update();
+
+UPDATE bots_bot SET nickname = nickname;
+"""
+
+DROP_FUNCTIONS = """
+DROP TRIGGER IF EXISTS bots_bot_search_vector_trigger ON bots_bot;
+DROP FUNCTION IF EXISTS bots_bot_search_vector_update();
+DROP FUNCTION IF EXISTS bots_cjk_bigrams(text);
+"""
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('bots', '0002_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bot',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(CREATE_FUNCTIONS, DROP_FUNCTIONS),
+        AddIndexConcurrently(
+            model_name='bot',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='bot_search_vector_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='bot',
+            index=models.Index(
+                condition=models.Q(('is_public', True)),
+                fields=['status', '-created_at', '-id'],
+                name='bot_public_status_idx',
+            ),
+        ),
+    ]
@@ -0,0 +1,54 @@
+from django.db import migrations
+
+# 机器人新增、删除、在线状态或公开状态变化时在 bot_presence 频道发出通知，
+# 通知随事务提交送达，各 worker 的 LISTEN 线程收到后转发给在线状态推送流
+CREATE_TRIGGERS = r"""
+CREATE OR REPLACE FUNCTION bots_bot_notify_presence() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    bot bots_bot%ROWTYPE;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        bot := OLD;
+    ELSE
+        bot := NEW;
+    END IF;
+    PERFORM pg_notify('bot_presence', json_build_object(
+        'op', lower(TG_OP),
+        'id', bot.id,
+        'bot_id', bot.bot_id,
+        'status', bot.status,
+        'is_public', bot.is_public,
+        'last_seen', bot.last_seen
+    )::text);
+    RETURN NULL;
+END
+$$;
+
+CREATE TRIGGER bots_bot_presence_insert_delete
+    AFTER INSERT OR DELETE ON bots_bot
+    FOR EACH ROW EXECUTE FUNCTION bots_bot_notify_presence();
+
+CREATE TRIGGER bots_bot_presence_update
+    AFTER UPDATE OF status, is_public ON bots_bot
+    FOR EACH ROW
+    WHEN (OLD.status IS DISTINCT FROM NEW.status OR OLD.is_public IS DISTINCT FROM NEW.is_public)
+    EXECUTE FUNCTION bots_bot_notify_presence();
+"""
+
+DROP_TRIGGERS = """
+DROP TRIGGER IF EXISTS bots_bot_presence_update ON bots_bot;
+DROP TRIGGER IF EXISTS bots_bot_presence_insert_delete ON bots_bot;
+DROP FUNCTION IF EXISTS bots_bot_notify_presence();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bots', '0003_bot_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_TRIGGERS, DROP_TRIGGERS),
+    ]
@@ -0,0 +1,61 @@
+from django.db import migrations, models
+
+# 机器人新增、删除或在线状态变化时向 bots_botstatuscount 追加 ±1 的增量行，
+# 只插入不更新，并发心跳之间不会因同一计数行互相等待；初始计数由当前数据生成
+CREATE_TRIGGERS = r"""
+CREATE OR REPLACE FUNCTION bots_bot_count_status() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO bots_botstatuscount (status, count) VALUES (NEW.status, 1);
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO bots_botstatuscount (status, count) VALUES (OLD.status, -1);
+    ELSE
+        INSERT INTO bots_botstatuscount (status, count) VALUES (OLD.status, -1), (NEW.status, 1);
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+CREATE TRIGGER bots_bot_status_count_insert_delete
+    AFTER INSERT OR DELETE ON bots_bot
+    FOR EACH ROW EXECUTE FUNCTION bots_bot_count_status();
+
+CREATE TRIGGER bots_bot_status_count_update
+    AFTER UPDATE OF status ON bots_bot
+    FOR EACH ROW
+    WHEN (OLD.status IS DISTINCT FROM NEW.status)
+    EXECUTE FUNCTION bots_bot_count_status();
+
+INSERT INTO bots_botstatuscount (status, count)
+SELECT status, count(*) FROM bots_bot GROUP BY status;
+"""
+
+DROP_TRIGGERS = """
+DROP TRIGGER IF EXISTS bots_bot_status_count_update ON bots_bot;
+DROP TRIGGER IF EXISTS bots_bot_status_count_insert_delete ON bots_bot;
+DROP FUNCTION IF EXISTS bots_bot_count_status();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bots', '0004_bot_presence_notify'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BotStatusCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('online', '在线'), ('offline', '离线'), ('unknown', '未知')], max_length=10)),
+                ('count', models.BigIntegerField()),
+            ],
+            options={
+                'verbose_name': '机器人状态计数',
+                'verbose_name_plural': '机器人状态计数',
+            },
+        ),
+        migrations.RunSQL(CREATE_TRIGGERS, DROP_TRIGGERS),
+    ]
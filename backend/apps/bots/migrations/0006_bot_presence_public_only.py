@@ -0,0 +1,54 @@
+from django.db import migrations
+
+# 在线状态推送流对匿名访客开放，只对公开机器人（或刚从公开变为非公开的机器人）发出通知，
+# 非公开机器人的新增、删除与状态变化不会把 id / bot_id 推送给订阅者
+CREATE_TRIGGERS = """
+DROP TRIGGER IF EXISTS bots_bot_presence_insert_delete ON bots_bot;
+DROP TRIGGER IF EXISTS bots_bot_presence_update ON bots_bot;
+
+CREATE TRIGGER bots_bot_presence_insert
+    AFTER INSERT ON bots_bot
+    FOR EACH ROW
+    WHEN (NEW.is_public)
+    EXECUTE FUNCTION bots_bot_notify_presence();
+
+CREATE TRIGGER bots_bot_presence_delete
+    AFTER DELETE ON bots_bot
+    FOR EACH ROW
+    WHEN (OLD.is_public)
+    EXECUTE FUNCTION bots_bot_notify_presence();
+
+CREATE TRIGGER bots_bot_presence_update
+    AFTER UPDATE OF status, is_public ON bots_bot
+    FOR EACH ROW
+    WHEN ((OLD.is_public OR NEW.is_public)
+          AND (OLD.status IS DISTINCT FROM NEW.status OR OLD.is_public IS DISTINCT FROM NEW.is_public))
+    EXECUTE FUNCTION bots_bot_notify_presence();
+"""
+
+DROP_TRIGGERS = """
+DROP TRIGGER IF EXISTS bots_bot_presence_insert ON bots_bot;
+DROP TRIGGER IF EXISTS bots_bot_presence_delete ON bots_bot;
+DROP TRIGGER IF EXISTS bots_bot_presence_update ON bots_bot;
+
+CREATE TRIGGER bots_bot_presence_insert_delete
+    AFTER INSERT OR DELETE ON bots_bot
+    FOR EACH ROW EXECUTE FUNCTION bots_bot_notify_presence();
+
+CREATE TRIGGER bots_bot_presence_update
+    AFTER UPDATE OF status, is_public ON bots_bot
+    FOR EACH ROW
+    WHEN (OLD.status IS DISTINCT FROM NEW.status OR OLD.is_public IS DISTINCT FROM NEW.is_public)
+    EXECUTE FUNCTION bots_bot_notify_presence();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bots', '0005_bot_status_count'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_TRIGGERS, DROP_TRIGGERS),
+    ]
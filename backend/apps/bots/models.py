@@ -1,5 +1,7 @@
 import uuid
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import connection, models
 from django.conf import settings
 
 
@@ -33,11 +35,69 @@ class Bot(models.Model):
     last_seen = models.DateTimeField(null=True, blank=True, verbose_name='最后在线')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+    # 由数据库触发器根据 bot_id / 昵称 / 描述维护，见 apps/bots/search.py
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         verbose_name = '机器人'
         verbose_name_plural = '机器人'
         ordering = ['-created_at']
+        indexes = [
+            # 机器人广场：is_public=True 按创建时间倒序
+            models.Index(
+                fields=['-created_at', '-id'],
+                condition=models.Q(is_public=True),
+                name='bot_public_created_idx',
+            ),
+            # 我的机器人：按主人过滤并按创建时间倒序
+            models.Index(fields=['master', '-created_at'], name='bot_master_created_idx'),
+            # 离线回收：status='online' AND last_seen < t，按 (last_seen, id) 分页
+            models.Index(
+                fields=['last_seen', 'id'],
+                condition=models.Q(status='online'),
+                name='bot_online_last_seen_idx',
+            ),
+            # 机器人广场按在线状态过滤：status=? 按创建时间倒序，COUNT 可只扫索引
+            models.Index(
+                fields=['status', '-created_at', '-id'],
+                condition=models.Q(is_public=True),
+                name='bot_public_status_idx',
+            ),
+            # 机器人广场全文检索
+            GinIndex(fields=['search_vector'], name='bot_search_vector_idx'),
+        ]
 
     def __str__(self):
         return f'{self.nickname} ({self.bot_id})'
+
+
+class BotStatusCountQuerySet(models.QuerySet):
+    def totals(self):
+        """{状态: 机器人数}"""
+        rows = self.values_list('status').annotate(total=models.Sum('count'))
+        return {status: total for status, total in rows}
+
+    def compact(self):
+        """把增量行合并为每个状态一行"""
+        with connection.cursor() as cursor:
+            cursor.execute(f'''
+                WITH moved AS (DELETE FROM {self.model._meta.db_table} RETURNING status, count)
+                INSERT INTO {self.model._meta.db_table} (status, count)
+                SELECT status, sum(count) FROM moved GROUP BY status
+            ''')
+
+
+class BotStatusCount(models.Model):
+    """
+    各在线状态的机器人数，由数据库触发器维护（见迁移 0005_bot_status_count）
+    触发器只追加 ±1 的增量行，并发心跳不会争用同一计数行；同一状态的 count 合计即为数量，
+    离线回收进程定期调用 compact() 合并增量行。
+    """
+    status = models.CharField(max_length=10, choices=Bot.STATUS_CHOICES)
+    count = models.BigIntegerField()
+
+    objects = BotStatusCountQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = '机器人状态计数'
+        verbose_name_plural = '机器人状态计数'
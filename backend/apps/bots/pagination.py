@@ -0,0 +1,199 @@
+"""
+机器人列表分页
+
+page：DRF 默认的页码分页（COUNT(*) + OFFSET）
+cursor：按 (created_at, id) 倒序的键集分页，任意深度的翻页代价与第一页相同，
+        总数默认不返回，可用 ?count=exact 或 ?count=approx（取自 Postgres 执行计划估算）
+search：检索结果（search.SearchResults）的页码分页，总数最多计到 BOT_SEARCH_MAX_COUNT
+"""
+import base64
+import binascii
+import json
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+PAGINATION_MODES = ('page', 'cursor')
+
+
+def estimate_count(queryset):
+    """用执行计划的行数估算代替 COUNT(*)，非 Postgres 数据库退回精确计数"""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class BotKeysetPagination(BasePagination):
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    count_query_param = 'count'
+    max_page_size = 100
+    invalid_cursor_message = '无效的游标'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+
+        if reverse:
+            page = queryset.order_by('created_at', 'id')
+        else:
+            page = queryset.order_by('-created_at', '-id')
+        if position is not None:
+            # 先用单列范围条件让索引定位起点，再用 OR 条件处理创建时间相同的行
+            created_at, pk = position
+            if reverse:
+                page = page.filter(
+                    Q(created_at__gte=created_at),
+                    Q(created_at__gt=created_at) | Q(id__gt=pk),
+                )
+            else:
+                page = page.filter(
+                    Q(created_at__lte=created_at),
+                    Q(created_at__lt=created_at) | Q(id__lt=pk),
+                )
+
+        rows = list(page[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.first, self.last = (rows[0], rows[-1]) if rows else (None, None)
+
+        self.count = None
+        count_mode = request.query_params.get(self.count_query_param)
+        if count_mode == 'exact':
+            self.count = queryset.count()
+        elif count_mode == 'approx':
+            self.count = estimate_count(queryset)
+        self.count_mode = count_mode
+
+        return rows
+
+    def get_paginated_response(self, data):
+        fields = []
+        if self.count is not None:
+            fields.append(('count', self.count))
+            fields.append(('count_approximate', self.count_mode == 'approx'))
+        fields += [
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]
+        return Response(OrderedDict(fields))
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return api_settings.PAGE_SIZE
+        return max(1, min(size, self.max_page_size))
+
+    def get_next_link(self):
+        if not self.has_next or self.last is None:
+            return None
+        return self.encode_cursor(self.last, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or self.first is None:
+            return None
+        return self.encode_cursor(self.first, reverse=True)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            created_at = parse_datetime(payload['t'])
+            pk = uuid.UUID(payload['i'])
+            reverse = bool(payload.get('r'))
+        except (binascii.Error, ValueError, KeyError, TypeError, UnicodeEncodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return (created_at, pk), reverse
+
+    def encode_cursor(self, bot, reverse):
+        payload = {'t': bot.created_at.isoformat(), 'i': str(bot.pk)}
+        if reverse:
+            payload['r'] = 1
+        encoded = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode('ascii')
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.cursor_query_param, encoded)
+        return remove_query_param(url, 'page')
+
+
+class CappedCountPaginator(Paginator):
+    """总数超过 BOT_SEARCH_MAX_COUNT 时按上限计，超出上限的页不可访问"""
+
+    @property
+    def max_count(self):
+        return settings.BOT_SEARCH_MAX_COUNT
+
+    @property
+    def count(self):
+        if not hasattr(self, '_count'):
+            matched = len(self.object_list)
+            self.count_capped = matched > self.max_count
+            self._count = min(matched, self.max_count)
+        return self._count
+
+
+class BotSearchPagination(PageNumberPagination):
+    django_paginator_class = CappedCountPaginator
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.page.paginator.count),
+            ('count_approximate', self.page.paginator.count_capped),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+
+class SelectablePaginationMixin:
+    """按 ?pagination=page|cursor 或 BOT_LIST_PAGINATION 选择分页方式，带 cursor 参数时固定为键集分页"""
+    pagination_query_param = 'pagination'
+
+    def get_pagination_mode(self):
+        params = self.request.query_params
+        if params.get(BotKeysetPagination.cursor_query_param):
+            return 'cursor'
+        mode = params.get(self.pagination_query_param)
+        if mode in PAGINATION_MODES:
+            return mode
+        return settings.BOT_LIST_PAGINATION
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            mode = self.get_pagination_mode()
+            if mode == 'cursor':
+                self._paginator = BotKeysetPagination()
+            elif mode == 'search':
+                self._paginator = BotSearchPagination()
+            else:
+                self._paginator = api_settings.DEFAULT_PAGINATION_CLASS()
+        return self._paginator
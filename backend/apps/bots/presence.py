@@ -0,0 +1,315 @@
+"""
+机器人在线状态推送
+
+数据库触发器在公开机器人在线状态变化时向 bot_presence 频道发出 NOTIFY（见迁移
+0004_bot_presence_notify 与 0006_bot_presence_public_only，非公开机器人只在由公开变为
+非公开时通知一次），每个 worker 用一个后台线程 LISTEN 该频道，并把通知
+分发给本进程内的全部订阅者。
+
+推送流协议（Server-Sent Events）：
+    event: snapshot  当前状态快照 {"bots": [...], "truncated": bool}
+    event: presence  单个机器人状态变化 {"id", "bot_id", "status", "last_seen"}
+    event: removed   机器人被删除或不再公开 {"id", "bot_id"}
+订阅先于快照建立，快照之后的变化都会推送；监听连接断开重连或订阅者积压
+过多时再发送一次 snapshot，客户端以最新快照为准。
+"""
+import asyncio
+import json
+import logging
+import queue
+import select
+import threading
+import time
+
+import psycopg2
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from .models import Bot
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'bot_presence'
+
+# 单个订阅者最多积压的事件数，超出后改为重新发送快照
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+# 订阅者在队列中收到该标记时需要重新发送快照
+RESYNC = object()
+
+
+class Subscription:
+    def __init__(self):
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self._drain()
+            self.queue.put_nowait(RESYNC)
+
+    def get(self, timeout):
+        """返回下一个事件，超时返回 None"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _drain(self):
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                return
+
+
+class AsyncSubscription(Subscription):
+    """在事件循环中等待的订阅者，LISTEN 线程写入后通过 call_soon_threadsafe 唤醒"""
+
+    def __init__(self):
+        super().__init__()
+        self._loop = None
+        self._wakeup = None
+
+    def put(self, event):
+        super().put(event)
+        if self._loop is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._wakeup.set)
+            except RuntimeError:
+                # 事件循环已关闭，订阅者即将被注销
+                pass
+
+    async def aget(self, timeout):
+        """返回下一个事件，超时返回 None"""
+        if self._loop is None:
+            self._wakeup = asyncio.Event()
+            self._loop = asyncio.get_running_loop()
+        self._wakeup.clear()
+        try:
+            return self.queue.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        try:
+            return self.queue.get_nowait()
+        except queue.Empty:
+            return None
+
+
+class PresenceHub:
+    """进程内发布订阅，第一个订阅者出现时启动 LISTEN 线程"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._thread = None
+        self._stop = threading.Event()
+        self._listening = threading.Event()
+
+    def __len__(self):
+        return len(self._subscribers)
+
+    def subscribe(self, subscription_class=Subscription):
+        """
+        注册订阅者并等待 LISTEN 就绪
+        超过 BOT_PRESENCE_MAX_STREAMS 时返回 None
+        """
+        with self._lock:
+            if len(self._subscribers) >= settings.BOT_PRESENCE_MAX_STREAMS:
+                return None
+            subscription = subscription_class()
+            self._subscribers.add(subscription)
+        self._ensure_listener()
+        if not self._listening.wait(timeout=settings.BOT_PRESENCE_LISTEN_TIMEOUT):
+            logger.warning('在线状态监听未就绪，订阅者可能丢失快照之后的变化')
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.put(event)
+
+    def stop(self):
+        """停止 LISTEN 线程并关闭其数据库连接"""
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop.set()
+        thread.join()
+        self._thread = None
+        self._stop.clear()
+
+    def _ensure_listener(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name='presence-listener', daemon=True
+            )
+            self._thread.start()
+
+    def _connection_params(self):
+        params = connections['default'].get_connection_params()
+        if settings.DB_LISTEN_HOST:
+            params['host'] = settings.DB_LISTEN_HOST
+        if settings.DB_LISTEN_PORT:
+            params['port'] = settings.DB_LISTEN_PORT
+        return params
+
+    def _connect(self):
+        conn = psycopg2.connect(**self._connection_params())
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with conn.cursor() as cursor:
+            cursor.execute(f'LISTEN {CHANNEL}')
+        return conn
+
+    def _run(self):
+        delay = 1
+        reconnected = False
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = self._connect()
+                self._listening.set()
+                if reconnected:
+                    # 断线期间的通知已丢失
+                    self.publish(RESYNC)
+                delay = 1
+                self._listen(conn)
+            except Exception:
+                logger.exception('在线状态监听连接中断，%s 秒后重连', delay)
+                self._listening.clear()
+                reconnected = True
+                self._stop.wait(delay)
+                delay = min(delay * 2, 30)
+            finally:
+                if conn is not None:
+                    conn.close()
+        self._listening.clear()
+
+    def _listen(self, conn):
+        while not self._stop.is_set():
+            if select.select([conn], [], [], 1.0) == ([], [], []):
+                continue
+            conn.poll()
+            while conn.notifies:
+                notify = conn.notifies.pop(0)
+                try:
+                    self.publish(json.loads(notify.payload))
+                except ValueError:
+                    logger.warning('无法解析的在线状态通知：%s', notify.payload)
+
+
+presence_hub = PresenceHub()
+
+
+def format_event(event, data):
+    return f'event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n'
+
+
+def presence_snapshot(bot_ids=None):
+    """指定机器人（QQ号）的当前状态，未指定时为全部在线的公开机器人"""
+    bots = Bot.objects.filter(is_public=True)
+    if bot_ids:
+        bots = bots.filter(bot_id__in=bot_ids)
+    else:
+        bots = bots.filter(status='online')
+    limit = settings.BOT_PRESENCE_SNAPSHOT_LIMIT
+    rows = list(
+        bots.order_by('-last_seen', '-id')
+        .values('id', 'bot_id', 'status', 'last_seen')[:limit + 1]
+    )
+    for row in rows:
+        row['id'] = str(row['id'])
+        row['last_seen'] = row['last_seen'].isoformat() if row['last_seen'] else None
+    return {'bots': rows[:limit], 'truncated': len(rows) > limit}
+
+
+class BasePresenceStream:
+    """
+    推送流的响应体：快照之后逐条推送变化
+    空闲时每隔 BOT_PRESENCE_KEEPALIVE 秒发送注释行保活，
+    BOT_PRESENCE_MAX_DURATION 秒后结束，由客户端自动重连。
+    响应关闭时（包括尚未开始发送就断开）注销订阅。
+
+    StreamingHttpResponse 优先按 __iter__ 同步迭代，
+    因此同步与异步推送流各自只实现一种迭代协议，不互相继承。
+    """
+
+    def __init__(self, subscription, bot_ids=None):
+        self.subscription = subscription
+        self.bot_ids = bot_ids
+        self.watched = set(bot_ids or ())
+
+    def _format_change(self, event):
+        if event['op'] == 'delete' or not event['is_public']:
+            return format_event('removed', {'id': event['id'], 'bot_id': event['bot_id']})
+        return format_event('presence', {
+            'id': event['id'],
+            'bot_id': event['bot_id'],
+            'status': event['status'],
+            'last_seen': event['last_seen'],
+        })
+
+    def close(self):
+        presence_hub.unsubscribe(self.subscription)
+
+
+class PresenceStream(BasePresenceStream):
+    """WSGI 模式下的推送流，在当前线程中阻塞等待事件"""
+
+    def __iter__(self):
+        deadline = time.monotonic() + settings.BOT_PRESENCE_MAX_DURATION
+        yield f'retry: {settings.BOT_PRESENCE_RETRY_MS}\n\n'
+        yield format_event('snapshot', presence_snapshot(self.bot_ids))
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            event = self.subscription.get(timeout=min(settings.BOT_PRESENCE_KEEPALIVE, remaining))
+            if event is None:
+                yield ': keepalive\n\n'
+            elif event is RESYNC:
+                yield format_event('snapshot', presence_snapshot(self.bot_ids))
+            elif not self.watched or event['bot_id'] in self.watched:
+                yield self._format_change(event)
+
+
+class AsyncPresenceStream(BasePresenceStream):
+    """
+    ASGI 模式下的推送流：Django 会先把同步迭代器完整读入内存再发送，
+    因此在事件循环中异步等待事件，订阅者需为 AsyncSubscription
+    """
+
+    def __aiter__(self):
+        return self._aiter()
+
+    async def _aiter(self):
+        deadline = time.monotonic() + settings.BOT_PRESENCE_MAX_DURATION
+        snapshot = sync_to_async(presence_snapshot)
+        yield f'retry: {settings.BOT_PRESENCE_RETRY_MS}\n\n'
+        yield format_event('snapshot', await snapshot(self.bot_ids))
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            event = await self.subscription.aget(min(settings.BOT_PRESENCE_KEEPALIVE, remaining))
+            if event is None:
+                yield ': keepalive\n\n'
+            elif event is RESYNC:
+                yield format_event('snapshot', await snapshot(self.bot_ids))
+            elif not self.watched or event['bot_id'] in self.watched:
+                yield self._format_change(event)
@@ -0,0 +1,64 @@
+"""
+离线机器人回收
+
+按 (last_seen, id) 键集分页，每批先取出一小段超时的在线机器人，再用一条
+UPDATE 将其标记为离线，单条语句只锁定 chunk_size 行。
+每次回收后顺带合并机器人状态计数的增量行（BotStatusCount）。
+"""
+import time
+from dataclasses import dataclass, field
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .cache import plaza_cache
+from .metrics import observe_reap
+from .models import Bot, BotStatusCount
+
+
+@dataclass
+class ReapStats:
+    started_at: object = field(default_factory=timezone.now)
+    chunks: int = 0
+    scanned: int = 0
+    updated: int = 0
+    duration: float = 0.0
+    max_chunk_duration: float = 0.0
+
+
+def reap_stale_bots(timeout, chunk_size=1000):
+    """将超过 timeout 未收到心跳的在线机器人标记为离线"""
+    stats = ReapStats()
+    threshold = stats.started_at - timeout
+    stale = Bot.objects.filter(status='online', last_seen__lt=threshold)
+    cursor = None
+    start = time.perf_counter()
+
+    while True:
+        chunk_start = time.perf_counter()
+        page = stale.order_by('last_seen', 'id')
+        if cursor is not None:
+            last_seen, pk = cursor
+            page = page.filter(
+                Q(last_seen__gte=last_seen),
+                Q(last_seen__gt=last_seen) | Q(id__gt=pk),
+            )
+        rows = list(page.values_list('last_seen', 'id')[:chunk_size])
+        if not rows:
+            break
+
+        # 再次带上过滤条件，避免覆盖两次查询之间刚收到心跳的机器人
+        stats.updated += stale.filter(pk__in=[pk for _, pk in rows]).update(status='offline')
+        stats.chunks += 1
+        stats.scanned += len(rows)
+        stats.max_chunk_duration = max(stats.max_chunk_duration, time.perf_counter() - chunk_start)
+        cursor = rows[-1]
+        if len(rows) < chunk_size:
+            break
+
+    stats.duration = time.perf_counter() - start
+    if stats.updated:
+        plaza_cache.bump()
+    BotStatusCount.objects.compact()
+    observe_reap(stats)
+    return stats
@@ -0,0 +1,71 @@
+"""
+机器人广场全文检索
+
+search_vector 列由数据库触发器维护（见迁移 0003_bot_search_vector）：
+bot_id / 昵称权重 A，描述权重 B，使用 simple 词典；连续的中日韩字符额外拆成
+相邻二元组，因此中文可以按任意两个字以上的子串检索。
+
+匹配过多时只取相关度最高的 BOT_SEARCH_MAX_COUNT + 1 条候选，
+使宽泛查询的传输与计数代价有上限，用户可以补充关键词缩小范围。
+"""
+import re
+from collections.abc import Sequence
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F
+
+# 与迁移中 bots_cjk_bigrams() 使用的字符范围保持一致
+CJK_RUN = '[㐀-鿿豈-﫿]+'
+TOKEN_RE = re.compile(rf'{CJK_RUN}|\w+')
+
+MAX_QUERY_LENGTH = 100
+MAX_TERMS = 8
+
+
+def _term(token):
+    if re.fullmatch(CJK_RUN, token):
+        if len(token) == 1:
+            return f"'{token}':*"
+        bigrams = [token[i:i + 2] for i in range(len(token) - 1)]
+        return ' <-> '.join(f"'{bigram}'" for bigram in bigrams)
+    return f"'{token.lower()}':*"
+
+
+def build_search_query(text):
+    """将用户输入转换为 tsquery，各词之间为 AND，英文数字按前缀匹配；没有可检索内容时返回 None"""
+    tokens = TOKEN_RE.findall(text[:MAX_QUERY_LENGTH])[:MAX_TERMS]
+    if not tokens:
+        return None
+    raw = ' & '.join(f'({_term(token)})' for token in tokens)
+    return SearchQuery(raw, config='simple', search_type='raw')
+
+
+class SearchResults(Sequence):
+    """已按相关度排好序的候选主键，切片时才按主键取出对应的机器人"""
+
+    def __init__(self, queryset, pks):
+        self.queryset = queryset
+        self.pks = pks
+
+    def __len__(self):
+        return len(self.pks)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        pks = self.pks[index]
+        bots = self.queryset.in_bulk(pks)
+        return [bots[pk] for pk in pks if pk in bots]
+
+
+def search_bots(queryset, text):
+    """按相关度倒序返回匹配的机器人"""
+    query = build_search_query(text)
+    if query is None:
+        return queryset.none()
+    # 候选在数据库中按相关度排序后截断，一次取出主键，分页只按主键取当前页
+    pks = queryset.filter(search_vector=query).annotate(
+        rank=SearchRank(F('search_vector'), query)
+    ).order_by('-rank', '-created_at', '-pk').values_list('pk', flat=True)[:settings.BOT_SEARCH_MAX_COUNT + 1]
+    return SearchResults(queryset, list(pks))
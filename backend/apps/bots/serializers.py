@@ -1,11 +1,14 @@
+from django.conf import settings
 from rest_framework import serializers
+from apps.monitoring.serializers import TimedDataMixin, TimedListSerializer
 from .models import Bot
 import secrets
 
 
-class BotSerializer(serializers.ModelSerializer):
+class BotSerializer(TimedDataMixin, serializers.ModelSerializer):
     class Meta:
         model = Bot
+        list_serializer_class = TimedListSerializer
         fields = [
             'id', 'bot_id', 'nickname', 'master', 'master_qq', 'version',
             'description', 'is_public', 'status', 'last_seen',
@@ -21,7 +24,8 @@ class BotSerializer(serializers.ModelSerializer):
         data = super().to_representation(instance)
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            if instance.master == request.user:
+            # 比较外键值，列表序列化时不逐行加载主人
+            if instance.master_id == request.user.pk:
                 data['api_key'] = instance.api_key
             else:
                 data.pop('api_key', None)
@@ -38,5 +42,14 @@ class BotRegistrationSerializer(serializers.Serializer):
     description = serializers.CharField(required=False, allow_blank=True, default='')
 
 
+class BotBatchRegistrationSerializer(serializers.Serializer):
+    # 逐项校验在视图中完成，以便单项错误不影响整批
+    bots = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=settings.BOT_REGISTER_BATCH_MAX_SIZE,
+    )
+
+
 class BotHeartbeatSerializer(serializers.Serializer):
     status = serializers.ChoiceField(choices=['online', 'offline'], required=False, default='online')
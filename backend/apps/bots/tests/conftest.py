@@ -0,0 +1,12 @@
+import pytest
+
+
+@pytest.fixture
+def throttle_rates(settings):
+    """按 scope 覆盖 REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']，如 throttle_rates(bot_heartbeat='2/min')"""
+    def set_rates(**rates):
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_THROTTLE_RATES': {**settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], **rates},
+        }
+    return set_rates
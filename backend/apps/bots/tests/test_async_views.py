@@ -0,0 +1,113 @@
+import json
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncRequestFactory
+from rest_framework import status
+from apps.bots.async_views import AsyncBotHeartbeatView, AsyncBotListView
+from apps.bots.authentication import api_key_cache
+from apps.bots.models import Bot
+from tests.factories import BotFactory
+
+
+@pytest.mark.django_db
+class TestAsyncViews:
+    factory = AsyncRequestFactory()
+
+    def _heartbeat(self, data, headers=None):
+        request = self.factory.post(
+            '/api/bots/heartbeat/', data, content_type='application/json', headers=headers
+        )
+        return async_to_sync(AsyncBotHeartbeatView.as_view())(request)
+
+    def _list(self, headers=None):
+        request = self.factory.get('/api/bots/', headers=headers)
+        response = async_to_sync(AsyncBotListView.as_view())(request)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+
+    def test_heartbeat(self, user):
+        bot = BotFactory(master=user, bot_id='123456', api_key='valid-api-key')
+        response = self._heartbeat({'status': 'online'}, headers={'X-API-Key': 'valid-api-key'})
+        assert response.status_code == status.HTTP_200_OK
+        assert json.loads(response.content) == {'status': 'online'}
+        bot.refresh_from_db()
+        assert bot.status == 'online'
+        assert bot.last_seen is not None
+
+    def test_heartbeat_throttled(self, user, throttle_rates):
+        throttle_rates(bot_heartbeat='1/min')
+        BotFactory(master=user, bot_id='123456', api_key='valid-api-key')
+        headers = {'X-API-Key': 'valid-api-key'}
+        assert self._heartbeat({'status': 'online'}, headers=headers).status_code == 200
+        response = self._heartbeat({'status': 'online'}, headers=headers)
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert response['Retry-After'] == '60'
+        assert 'detail' in json.loads(response.content)
+
+    def test_heartbeat_buffered(self, user, settings):
+        settings.BOT_HEARTBEAT_MODE = 'buffered'
+        settings.BOT_HEARTBEAT_FLUSH_INTERVAL = 0
+        settings.BOT_HEARTBEAT_MAX_STALENESS = 0
+        bot = BotFactory(master=user, bot_id='123456', api_key='valid-api-key')
+        response = self._heartbeat({'status': 'online'}, headers={'X-API-Key': 'valid-api-key'})
+        assert response.status_code == status.HTTP_200_OK
+        bot.refresh_from_db()
+        assert bot.status == 'online'
+
+    def test_heartbeat_coalesced(self, user, settings):
+        settings.BOT_HEARTBEAT_MODE = 'coalesced'
+        bot = BotFactory(master=user, bot_id='123456', api_key='valid-api-key')
+        self._heartbeat({'status': 'online'}, headers={'X-API-Key': 'valid-api-key'})
+        bot.refresh_from_db()
+        last_seen = bot.last_seen
+        assert bot.status == 'online'
+
+        response = self._heartbeat({'status': 'online'}, headers={'X-API-Key': 'valid-api-key'})
+        assert response.status_code == status.HTTP_200_OK
+        bot.refresh_from_db()
+        assert bot.last_seen == last_seen
+
+    def test_heartbeat_rejects_bad_requests(self, user):
+        BotFactory(master=user, bot_id='123456', api_key='valid-api-key')
+        response = self._heartbeat({'status': 'online'})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        response = self._heartbeat({'status': 'online'}, headers={'X-API-Key': 'invalid-key'})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response['WWW-Authenticate'] == 'X-API-Key'
+        response = self._heartbeat({'status': 'busy'}, headers={'X-API-Key': 'valid-api-key'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'status' in json.loads(response.content)
+
+    def test_heartbeat_private_bot(self, user):
+        BotFactory(master=user, bot_id='123456', is_public=False, api_key='valid-api-key')
+        response = self._heartbeat({'status': 'online'}, headers={'X-API-Key': 'valid-api-key'})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_heartbeat_deleted_bot_with_cached_identity(self, user):
+        bot = BotFactory(master=user, bot_id='123456', api_key='valid-api-key')
+        self._heartbeat({'status': 'online'}, headers={'X-API-Key': 'valid-api-key'})
+        Bot.objects.filter(pk=bot.pk).delete()
+        response = self._heartbeat({'status': 'online'}, headers={'X-API-Key': 'valid-api-key'})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert api_key_cache.get('valid-api-key') is None
+
+    def test_list_serves_cache_hits_without_queries(self, user, django_assert_num_queries):
+        BotFactory(master=user, bot_id='123456', api_key='valid-api-key')
+        first = self._list()
+        assert first.status_code == status.HTTP_200_OK
+        assert first['X-Cache'] == 'MISS'
+        with django_assert_num_queries(0):
+            second = self._list()
+        assert second['X-Cache'] == 'HIT'
+        assert json.loads(second.content) == json.loads(first.content)
+        assert second['ETag'] == first['ETag']
+
+        response = self._list(headers={'If-None-Match': first['ETag']})
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_list_delegates_authenticated_requests(self, user):
+        BotFactory(master=user, bot_id='123456', api_key='valid-api-key')
+        self._list()
+        response = self._list(headers={'Authorization': 'Bearer invalid'})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
@@ -0,0 +1,93 @@
+import pytest
+import time
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from apps.bots.authentication import api_key_cache
+from apps.bots.models import Bot
+from tests.factories import BotFactory
+
+
+@pytest.mark.django_db
+class TestApiKeyCache:
+    def _heartbeat(self, api_client, api_key='valid-api-key'):
+        return api_client.post(
+            '/api/bots/heartbeat/',
+            {'status': 'online'},
+            format='json',
+            HTTP_X_API_KEY=api_key
+        )
+
+    def test_second_request_skips_key_lookup(self, api_client, user):
+        BotFactory(master=user, bot_id='123456', api_key='valid-api-key')
+        self._heartbeat(api_client)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self._heartbeat(api_client)
+        assert response.status_code == status.HTTP_200_OK
+        assert not any('"api_key"' in q['sql'] for q in ctx.captured_queries)
+
+    def test_regenerated_key_revokes_old_key(self, api_client, user):
+        bot = BotFactory(master=user, bot_id='123456', api_key='valid-api-key')
+        assert self._heartbeat(api_client).status_code == status.HTTP_200_OK
+
+        api_client.force_authenticate(user=user)
+        response = api_client.post(f'/api/bots/{bot.id}/regenerate-key/')
+        new_key = response.data['api_key']
+        api_client.force_authenticate(user=None)
+
+        assert self._heartbeat(api_client).status_code == status.HTTP_401_UNAUTHORIZED
+        assert self._heartbeat(api_client, new_key).status_code == status.HTTP_200_OK
+
+    def test_reregistration_revokes_old_key(self, api_client, user):
+        BotFactory(master=user, bot_id='123456', api_key='valid-api-key')
+        assert self._heartbeat(api_client).status_code == status.HTTP_200_OK
+        api_client.post('/api/bots/register/', {
+            'bot_id': '123456',
+            'nickname': 'TestBot',
+            'master_id': '987654',
+        }, format='json')
+        assert self._heartbeat(api_client).status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_hiding_bot_is_applied_immediately(self, api_client, user):
+        bot = BotFactory(master=user, bot_id='123456', api_key='valid-api-key')
+        assert self._heartbeat(api_client).status_code == status.HTTP_200_OK
+
+        api_client.force_authenticate(user=user)
+        api_client.patch(f'/api/bots/{bot.id}/update/', {'is_public': False}, format='json')
+        api_client.force_authenticate(user=None)
+
+        assert self._heartbeat(api_client).status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_deleted_bot_is_rejected(self, api_client, user):
+        bot = BotFactory(master=user, bot_id='123456', api_key='valid-api-key')
+        assert self._heartbeat(api_client).status_code == status.HTTP_200_OK
+
+        api_client.force_authenticate(user=user)
+        api_client.delete(f'/api/bots/{bot.id}/delete/')
+        api_client.force_authenticate(user=None)
+
+        assert self._heartbeat(api_client).status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_deleted_bot_with_stale_entry_is_rejected(self, api_client, user):
+        bot = BotFactory(master=user, bot_id='123456', api_key='valid-api-key')
+        assert self._heartbeat(api_client).status_code == status.HTTP_200_OK
+        # 模拟其他 worker 删除机器人，本进程缓存仍保留旧条目
+        Bot.objects.filter(pk=bot.pk).delete()
+        assert self._heartbeat(api_client).status_code == status.HTTP_401_UNAUTHORIZED
+        assert len(api_key_cache) == 0
+
+    def test_entries_expire_after_ttl(self, settings):
+        settings.BOT_API_KEY_CACHE_TTL = 0.01
+        api_key_cache.set('key', ('pk', '123456', True))
+        time.sleep(0.02)
+        assert api_key_cache.get('key') is None
+
+    def test_least_recently_used_entry_is_evicted(self, settings):
+        settings.BOT_API_KEY_CACHE_SIZE = 2
+        api_key_cache.set('key-1', ('pk-1', '1', True))
+        api_key_cache.set('key-2', ('pk-2', '2', True))
+        api_key_cache.get('key-1')
+        api_key_cache.set('key-3', ('pk-3', '3', True))
+        assert api_key_cache.get('key-2') is None
+        assert api_key_cache.get('key-1') is not None
+        assert api_key_cache.get('key-3') is not None
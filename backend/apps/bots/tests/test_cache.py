@@ -0,0 +1,180 @@
+import pytest
+from datetime import timedelta
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework import status
+from apps.bots.heartbeat import heartbeat_buffer
+from apps.bots.models import Bot
+from apps.bots.reaper import reap_stale_bots
+from tests.factories import BotFactory
+
+
+@pytest.mark.django_db
+class TestPlazaCache:
+    def test_anonymous_list_is_cached(self, api_client, user, django_assert_num_queries):
+        BotFactory(master=user, bot_id='123456', status='online', last_seen=timezone.now())
+        first = api_client.get('/api/bots/', {'page': 1})
+        assert first['X-Cache'] == 'MISS'
+        with django_assert_num_queries(0):
+            second = api_client.get('/api/bots/', {'page': 1})
+        assert second['X-Cache'] == 'HIT'
+        assert second.json() == first.json()
+
+    def test_query_string_is_part_of_key(self, api_client, user):
+        BotFactory(master=user, bot_id='123456', status='online', last_seen=timezone.now())
+        assert api_client.get('/api/bots/?status=online&page=1')['X-Cache'] == 'MISS'
+        assert api_client.get('/api/bots/?page=1&status=online')['X-Cache'] == 'HIT'
+        response = api_client.get('/api/bots/?status=offline')
+        assert response['X-Cache'] == 'MISS'
+        assert response.data['count'] == 0
+
+    def test_authenticated_requests_bypass_cache(self, authenticated_client, user):
+        BotFactory(master=user, bot_id='123456', status='online', last_seen=timezone.now())
+        authenticated_client.get('/api/bots/')
+        response = authenticated_client.get('/api/bots/')
+        assert 'X-Cache' not in response
+        assert 'api_key' in response.data['results'][0]
+
+    def test_update_invalidates(self, api_client, user):
+        bot = BotFactory(master=user, bot_id='123456', status='online', last_seen=timezone.now())
+        api_client.get('/api/bots/')
+        api_client.get(f'/api/bots/{bot.id}/')
+        api_client.force_authenticate(user=user)
+        api_client.patch(f'/api/bots/{bot.id}/update/', {'nickname': 'Renamed'}, format='json')
+        api_client.force_authenticate(user=None)
+
+        response = api_client.get('/api/bots/')
+        assert response['X-Cache'] == 'MISS'
+        assert response.data['results'][0]['nickname'] == 'Renamed'
+        assert api_client.get(f'/api/bots/{bot.id}/').data['nickname'] == 'Renamed'
+
+    def test_delete_invalidates_detail(self, api_client, user):
+        bot = BotFactory(master=user, bot_id='123456', status='online', last_seen=timezone.now())
+        assert api_client.get(f'/api/bots/{bot.id}/').status_code == status.HTTP_200_OK
+        api_client.force_authenticate(user=user)
+        api_client.delete(f'/api/bots/{bot.id}/delete/')
+        api_client.force_authenticate(user=None)
+        assert api_client.get(f'/api/bots/{bot.id}/').status_code == status.HTTP_404_NOT_FOUND
+
+    def test_register_invalidates(self, api_client):
+        assert api_client.get('/api/bots/').data['count'] == 0
+        api_client.post('/api/bots/register/', {
+            'bot_id': '123456', 'nickname': 'NewBot', 'master_id': '987654'
+        }, format='json')
+        assert api_client.get('/api/bots/').data['count'] == 1
+
+    def test_heartbeat_invalidates_only_on_status_change(self, api_client, user):
+        bot = BotFactory(master=user, bot_id='123456', status='online', last_seen=timezone.now())
+        api_client.get('/api/bots/')
+        headers = {'HTTP_X_API_KEY': bot.api_key}
+
+        api_client.post('/api/bots/heartbeat/', {'status': 'online'}, format='json', **headers)
+        assert api_client.get('/api/bots/')['X-Cache'] == 'HIT'
+
+        api_client.post('/api/bots/heartbeat/', {'status': 'offline'}, format='json', **headers)
+        response = api_client.get('/api/bots/')
+        assert response['X-Cache'] == 'MISS'
+        assert response.data['results'][0]['status'] == 'offline'
+
+    def test_buffered_flush_invalidates_on_status_change(self, api_client, user, settings):
+        settings.BOT_HEARTBEAT_MODE = 'buffered'
+        settings.BOT_HEARTBEAT_FLUSH_INTERVAL = 0
+        bot = BotFactory(master=user, bot_id='123456', status='online', last_seen=timezone.now())
+        api_client.get('/api/bots/')
+        headers = {'HTTP_X_API_KEY': bot.api_key}
+
+        api_client.post('/api/bots/heartbeat/', {'status': 'online'}, format='json', **headers)
+        heartbeat_buffer.flush()
+        assert api_client.get('/api/bots/')['X-Cache'] == 'HIT'
+
+        api_client.post('/api/bots/heartbeat/', {'status': 'offline'}, format='json', **headers)
+        heartbeat_buffer.flush()
+        assert api_client.get('/api/bots/')['X-Cache'] == 'MISS'
+
+    def test_reaper_invalidates(self, api_client, user):
+        bot = BotFactory(master=user, bot_id='123456', status='online', last_seen=timezone.now())
+        Bot.objects.filter(pk=bot.pk).update(last_seen=timezone.now() - timedelta(minutes=10))
+        api_client.get('/api/bots/')
+        reap_stale_bots(timedelta(minutes=5))
+        response = api_client.get('/api/bots/')
+        assert response['X-Cache'] == 'MISS'
+        assert response.data['results'][0]['status'] == 'offline'
+
+    def test_disabled(self, api_client, user, settings):
+        settings.BOT_PLAZA_CACHE_TTL = 0
+        BotFactory(master=user, bot_id='123456', status='online', last_seen=timezone.now())
+        api_client.get('/api/bots/')
+        assert 'X-Cache' not in api_client.get('/api/bots/')
+
+    def test_stats(self, api_client, authenticated_admin_client, user):
+        BotFactory(master=user, bot_id='123456', status='online', last_seen=timezone.now())
+        client = api_client.__class__()
+        client.get('/api/bots/')
+        client.get('/api/bots/')
+        response = authenticated_admin_client.get('/api/bots/cache/stats/')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['hits'] == 1
+        assert response.data['misses'] == 1
+        assert response.data['hit_rate'] == 0.5
+
+    def test_stats_requires_staff(self, authenticated_client):
+        response = authenticated_client.get('/api/bots/cache/stats/')
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+class TestConditionalGet:
+    def test_anonymous_not_modified_without_queries(self, api_client, user, django_assert_num_queries):
+        bot = BotFactory(master=user, bot_id='123456')
+        for url in ['/api/bots/', f'/api/bots/{bot.id}/']:
+            etag = api_client.get(url)['ETag']
+            with django_assert_num_queries(0):
+                response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == status.HTTP_304_NOT_MODIFIED
+            assert response['ETag'] == etag
+            assert response.content == b''
+
+    def test_not_modified_on_cache_miss(self, api_client, user):
+        BotFactory(master=user, bot_id='123456')
+        etag = api_client.get('/api/bots/')['ETag']
+        cache.clear()
+        response = api_client.get('/api/bots/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response['X-Cache'] == 'MISS'
+
+    def test_etag_changes_with_content(self, api_client, user):
+        bot = BotFactory(master=user, bot_id='123456')
+        etag = api_client.get('/api/bots/')['ETag']
+        api_client.force_authenticate(user=user)
+        api_client.patch(f'/api/bots/{bot.id}/update/', {'nickname': 'Renamed'}, format='json')
+        api_client.force_authenticate(user=None)
+
+        response = api_client.get('/api/bots/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'] != etag
+        assert response.data['results'][0]['nickname'] == 'Renamed'
+
+    def test_query_string_changes_etag(self, api_client, user):
+        BotFactory(master=user, bot_id='123456')
+        etag = api_client.get('/api/bots/')['ETag']
+        response = api_client.get('/api/bots/', {'status': 'online'}, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_media_type_is_part_of_key(self, api_client, user):
+        BotFactory(master=user, bot_id='123456')
+        html = api_client.get('/api/bots/', HTTP_ACCEPT='text/html')
+        assert html['Content-Type'].startswith('text/html')
+        assert 'Accept' in html['Vary']
+
+        response = api_client.get('/api/bots/', HTTP_ACCEPT='application/json', HTTP_IF_NONE_MATCH=html['ETag'])
+        assert response.status_code == status.HTTP_200_OK
+        assert response['X-Cache'] == 'MISS'
+        assert response['Content-Type'] == 'application/json'
+        assert response['ETag'] != html['ETag']
+        assert 'Accept' in response['Vary']
+
+    def test_authenticated_responses_get_content_etag(self, authenticated_client, user):
+        BotFactory(master=user, bot_id='123456')
+        etag = authenticated_client.get('/api/bots/my/')['ETag']
+        response = authenticated_client.get('/api/bots/my/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
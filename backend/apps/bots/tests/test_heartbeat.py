@@ -0,0 +1,190 @@
+import pytest
+from datetime import timedelta
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from prometheus_client import REGISTRY
+from rest_framework import status
+from apps.bots.cache import plaza_cache
+from apps.bots.heartbeat import heartbeat_buffer
+from apps.bots.models import Bot
+from tests.factories import BotFactory
+
+
+@pytest.mark.django_db
+class TestBotHeartbeat:
+    def test_heartbeat_with_valid_key(self, api_client, user):
+        bot = Bot.objects.create(
+            bot_id='123456',
+            nickname='TestBot',
+            master=user,
+            master_qq='987654',
+            api_key='valid-api-key',
+            status='unknown'
+        )
+        url = '/api/bots/heartbeat/'
+        response = api_client.post(
+            url,
+            {'status': 'online'},
+            format='json',
+            HTTP_X_API_KEY='valid-api-key'
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['status'] == 'online'
+        bot.refresh_from_db()
+        assert bot.status == 'online'
+        assert bot.last_seen is not None
+
+    def test_heartbeat_with_invalid_key(self, api_client):
+        url = '/api/bots/heartbeat/'
+        response = api_client.post(
+            url,
+            {'status': 'online'},
+            format='json',
+            HTTP_X_API_KEY='invalid-key'
+        )
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+class TestBufferedHeartbeat:
+    @pytest.fixture(autouse=True)
+    def buffered_mode(self, settings):
+        settings.BOT_HEARTBEAT_MODE = 'buffered'
+        settings.BOT_HEARTBEAT_FLUSH_INTERVAL = 0
+        settings.BOT_HEARTBEAT_MAX_STALENESS = 60
+        yield
+        heartbeat_buffer.flush()
+
+    def test_heartbeat_is_buffered_until_flush(self, api_client, user):
+        bot = BotFactory(master=user, bot_id='123456', api_key='valid-api-key')
+        response = api_client.post(
+            '/api/bots/heartbeat/',
+            {'status': 'online'},
+            format='json',
+            HTTP_X_API_KEY='valid-api-key'
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['status'] == 'online'
+        bot.refresh_from_db()
+        assert bot.status == 'unknown'
+
+        assert heartbeat_buffer.flush() == 1
+        bot.refresh_from_db()
+        assert bot.status == 'online'
+        assert bot.last_seen is not None
+
+    def test_repeated_heartbeats_are_coalesced(self, api_client, user):
+        bot = BotFactory(master=user, bot_id='123456', api_key='valid-api-key')
+        for bot_status in ('online', 'offline', 'online'):
+            api_client.post(
+                '/api/bots/heartbeat/',
+                {'status': bot_status},
+                format='json',
+                HTTP_X_API_KEY='valid-api-key'
+            )
+        assert len(heartbeat_buffer) == 1
+
+        with CaptureQueriesContext(connection) as ctx:
+            heartbeat_buffer.flush()
+        updates = [q for q in ctx.captured_queries if q['sql'].startswith('UPDATE')]
+        assert len(updates) == 1
+        bot.refresh_from_db()
+        assert bot.status == 'online'
+
+    def test_flush_does_not_touch_other_columns(self, user):
+        bot = BotFactory(master=user, bot_id='123456', api_key='valid-api-key')
+        updated_at = bot.updated_at
+        heartbeat_buffer.add(bot.pk, 'online', timezone.now())
+        heartbeat_buffer.flush()
+        bot.refresh_from_db()
+        assert bot.status == 'online'
+        assert bot.nickname == 'TestBot'
+        assert bot.updated_at == updated_at
+
+    def test_stale_buffer_is_flushed_inline(self, user, settings):
+        settings.BOT_HEARTBEAT_MAX_STALENESS = 0
+        bot = BotFactory(master=user, bot_id='123456', api_key='valid-api-key')
+        heartbeat_buffer.add(bot.pk, 'online', timezone.now())
+        assert len(heartbeat_buffer) == 0
+        bot.refresh_from_db()
+        assert bot.status == 'online'
+
+
+@pytest.mark.django_db
+class TestCoalescedHeartbeat:
+    @pytest.fixture(autouse=True)
+    def coalesced_mode(self, settings):
+        settings.BOT_HEARTBEAT_MODE = 'coalesced'
+        settings.BOT_HEARTBEAT_GRANULARITY = 30
+
+    def _heartbeat(self, api_client, bot_status='online'):
+        return api_client.post(
+            '/api/bots/heartbeat/',
+            {'status': bot_status},
+            format='json',
+            HTTP_X_API_KEY='valid-api-key'
+        )
+
+    def _updates(self, api_client, bot_status='online'):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self._heartbeat(api_client, bot_status)
+        assert response.status_code == status.HTTP_200_OK
+        return [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE')]
+
+    def test_recent_heartbeat_is_skipped(self, api_client, user):
+        last_seen = timezone.now() - timedelta(seconds=10)
+        bot = BotFactory(
+            master=user, bot_id='123456', api_key='valid-api-key',
+            status='online', last_seen=last_seen,
+        )
+        labels = {'mode': 'coalesced', 'outcome': 'skipped'}
+        skipped = REGISTRY.get_sample_value('bot_heartbeats_total', labels) or 0
+        assert self._updates(api_client) == []
+        bot.refresh_from_db()
+        assert bot.last_seen == last_seen
+        assert REGISTRY.get_sample_value('bot_heartbeats_total', labels) == skipped + 1
+
+    def test_stale_last_seen_writes_only_last_seen(self, api_client, user):
+        bot = BotFactory(
+            master=user, bot_id='123456', api_key='valid-api-key',
+            status='online', last_seen=timezone.now() - timedelta(seconds=60),
+        )
+        updated_at = bot.updated_at
+        version = plaza_cache.version()
+        [sql] = self._updates(api_client)
+        assert '"last_seen"' in sql
+        assert '"status"' not in sql.split('WHERE')[0]
+        assert '"updated_at"' not in sql
+        bot.refresh_from_db()
+        assert bot.last_seen > timezone.now() - timedelta(seconds=5)
+        assert bot.updated_at == updated_at
+        assert plaza_cache.version() == version
+
+    def test_status_change_is_written_immediately(self, api_client, user):
+        bot = BotFactory(
+            master=user, bot_id='123456', api_key='valid-api-key',
+            status='online', last_seen=timezone.now(),
+        )
+        version = plaza_cache.version()
+        assert len(self._updates(api_client, 'offline')) == 1
+        bot.refresh_from_db()
+        assert bot.status == 'offline'
+        assert plaza_cache.version() != version
+
+    def test_first_heartbeat_is_written(self, api_client, user):
+        bot = BotFactory(master=user, bot_id='123456', api_key='valid-api-key')
+        assert len(self._updates(api_client)) == 1
+        bot.refresh_from_db()
+        assert bot.status == 'online'
+        assert bot.last_seen is not None
+
+    def test_deleted_bot(self, api_client, user):
+        bot = BotFactory(
+            master=user, bot_id='123456', api_key='valid-api-key',
+            status='online', last_seen=timezone.now(),
+        )
+        self._heartbeat(api_client)
+        Bot.objects.filter(pk=bot.pk).delete()
+        response = self._heartbeat(api_client)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
@@ -0,0 +1,72 @@
+import pytest
+from rest_framework import status
+from apps.bots.models import Bot
+from tests.factories import BotFactory
+
+
+@pytest.mark.django_db
+class TestBotCursorPagination:
+    def _create_bots(self, user, count, is_public=True):
+        bots = [
+            BotFactory(master=user, bot_id=str(100000 + i), nickname=f'Bot{i}', is_public=is_public)
+            for i in range(count)
+        ]
+        # 部分机器人创建时间相同，验证 id 作为第二排序键
+        Bot.objects.filter(pk__in=[b.pk for b in bots[:4]]).update(created_at=bots[0].created_at)
+        return bots
+
+    def _walk(self, client, url):
+        seen = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == status.HTTP_200_OK
+            seen.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+        return seen
+
+    def test_walks_all_pages_in_order(self, api_client, user):
+        self._create_bots(user, 7)
+        expected = [
+            str(pk) for pk in Bot.objects.order_by('-created_at', '-id').values_list('id', flat=True)
+        ]
+        seen = self._walk(api_client, '/api/bots/?pagination=cursor&page_size=3')
+        assert seen == expected
+
+    def test_previous_link_returns_previous_page(self, api_client, user):
+        self._create_bots(user, 7)
+        first = api_client.get('/api/bots/?pagination=cursor&page_size=3')
+        assert first.data['previous'] is None
+        second = api_client.get(first.data['next'])
+        back = api_client.get(second.data['previous'])
+        assert [b['id'] for b in back.data['results']] == [b['id'] for b in first.data['results']]
+        assert back.data['previous'] is None
+
+    def test_count_is_optional(self, api_client, user):
+        self._create_bots(user, 5)
+        response = api_client.get('/api/bots/?pagination=cursor')
+        assert 'count' not in response.data
+        response = api_client.get('/api/bots/?pagination=cursor&count=exact')
+        assert response.data['count'] == 5
+        response = api_client.get('/api/bots/?pagination=cursor&count=approx')
+        assert response.data['count_approximate'] is True
+        assert isinstance(response.data['count'], int)
+
+    def test_invalid_cursor(self, api_client):
+        response = api_client.get('/api/bots/?cursor=not-a-cursor')
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_setting_selects_default_mode(self, api_client, user, settings):
+        # 修改设置不会使广场缓存失效
+        settings.BOT_PLAZA_CACHE_TTL = 0
+        self._create_bots(user, 2)
+        assert 'count' in api_client.get('/api/bots/').data
+        settings.BOT_LIST_PAGINATION = 'cursor'
+        response = api_client.get('/api/bots/')
+        assert 'count' not in response.data
+        assert 'count' in api_client.get('/api/bots/?pagination=page').data
+
+    def test_my_bots_cursor(self, authenticated_client, user, other_user):
+        self._create_bots(user, 5, is_public=False)
+        BotFactory(master=other_user, bot_id='999999', nickname='OtherBot', master_qq='111222')
+        seen = self._walk(authenticated_client, '/api/bots/my/?pagination=cursor&page_size=2')
+        assert len(seen) == 5
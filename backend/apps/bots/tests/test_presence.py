@@ -0,0 +1,237 @@
+import asyncio
+import json
+import pytest
+from datetime import timedelta
+from asgiref.sync import async_to_sync
+from django.test import AsyncRequestFactory
+from django.utils import timezone
+from rest_framework import status
+from apps.bots.models import Bot
+from apps.bots.presence import AsyncPresenceStream, AsyncSubscription, presence_hub
+from apps.bots.reaper import reap_stale_bots
+from apps.bots.views import BotPresenceStreamView
+from tests.factories import BotFactory
+
+
+def read_events(response, count):
+    """从推送流中读取 count 个事件（含保活注释），返回 [(event, data)]"""
+    events = []
+    for chunk in response.streaming_content:
+        text = chunk.decode() if isinstance(chunk, bytes) else chunk
+        if text.startswith('retry:'):
+            continue
+        if text.startswith(':'):
+            events.append(('keepalive', None))
+        else:
+            lines = dict(line.split(': ', 1) for line in text.strip().split('\n'))
+            events.append((lines['event'], json.loads(lines['data'])))
+        if len(events) == count:
+            break
+    return events
+
+
+@pytest.mark.django_db
+class TestPresenceStream:
+    @pytest.fixture(autouse=True)
+    def stop_listener(self):
+        yield
+        presence_hub.stop()
+
+    def _event(self, bot, **changes):
+        event = {
+            'op': 'update', 'id': str(bot.id), 'bot_id': bot.bot_id,
+            'status': bot.status, 'is_public': bot.is_public, 'last_seen': None,
+        }
+        event.update(changes)
+        return event
+
+    def test_snapshot_then_deltas(self, api_client, user):
+        online = BotFactory(master=user, bot_id='100001', status='online', last_seen=timezone.now())
+        BotFactory(master=user, bot_id='100002', status='offline', last_seen=timezone.now())
+        BotFactory(master=user, bot_id='100003', status='online', is_public=False, last_seen=timezone.now())
+
+        response = api_client.get('/api/bots/presence/', HTTP_ACCEPT='text/event-stream')
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'text/event-stream'
+        assert response['X-Accel-Buffering'] == 'no'
+
+        [(event, data)] = read_events(response, 1)
+        assert event == 'snapshot'
+        assert [bot['bot_id'] for bot in data['bots']] == ['100001']
+        assert data['truncated'] is False
+
+        presence_hub.publish(self._event(online, status='offline'))
+        presence_hub.publish(self._event(online, is_public=False))
+        assert read_events(response, 2) == [
+            ('presence', {'id': str(online.id), 'bot_id': '100001', 'status': 'offline', 'last_seen': None}),
+            ('removed', {'id': str(online.id), 'bot_id': '100001'}),
+        ]
+        response.close()
+        assert len(presence_hub) == 0
+
+    def test_filter_by_bot_id(self, api_client, user):
+        watched = BotFactory(master=user, bot_id='100001', status='offline', last_seen=timezone.now())
+        other = BotFactory(master=user, bot_id='100002', status='online', last_seen=timezone.now())
+
+        response = api_client.get('/api/bots/presence/', {'bot_id': '100001'})
+        [(event, data)] = read_events(response, 1)
+        assert [bot['bot_id'] for bot in data['bots']] == ['100001']
+
+        presence_hub.publish(self._event(other, status='offline'))
+        presence_hub.publish(self._event(watched, status='online'))
+        [(event, data)] = read_events(response, 1)
+        assert data['bot_id'] == '100001'
+        response.close()
+
+    def test_resync_on_overflow(self, api_client, user, monkeypatch):
+        bot = BotFactory(master=user, bot_id='100001', status='online', last_seen=timezone.now())
+        monkeypatch.setattr('apps.bots.presence.SUBSCRIBER_QUEUE_SIZE', 2)
+        response = api_client.get('/api/bots/presence/')
+        read_events(response, 1)
+        for _ in range(3):
+            presence_hub.publish(self._event(bot, status='offline'))
+        [(event, data)] = read_events(response, 1)
+        assert event == 'snapshot'
+        response.close()
+
+    def test_keepalive_and_max_duration(self, api_client, settings):
+        settings.BOT_PRESENCE_KEEPALIVE = 0.05
+        settings.BOT_PRESENCE_MAX_DURATION = 0.2
+        response = api_client.get('/api/bots/presence/')
+        events = read_events(response, 100)
+        assert events[0][0] == 'snapshot'
+        assert ('keepalive', None) in events
+        assert len(presence_hub) == 0
+
+    def test_stream_limit(self, api_client, settings):
+        settings.BOT_PRESENCE_MAX_STREAMS = 1
+        first = api_client.get('/api/bots/presence/')
+        response = api_client.get('/api/bots/presence/')
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response['Retry-After'] == '5'
+        first.close()
+        response = api_client.get('/api/bots/presence/')
+        assert response.status_code == status.HTTP_200_OK
+        response.close()
+
+    def test_too_many_bot_ids(self, api_client):
+        bot_ids = ','.join(str(100000 + i) for i in range(101))
+        response = api_client.get('/api/bots/presence/', {'bot_id': bot_ids})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db(transaction=True)
+class TestPresenceNotify:
+    @pytest.fixture(autouse=True)
+    def stop_listener(self):
+        yield
+        presence_hub.stop()
+
+    def _next(self, subscription):
+        event = subscription.get(timeout=5)
+        assert event is not None
+        return event
+
+    def test_status_changes_are_published(self, user):
+        subscription = presence_hub.subscribe()
+        try:
+            bot = BotFactory(master=user, bot_id='100001')
+            assert self._next(subscription)['op'] == 'insert'
+
+            Bot.objects.filter(pk=bot.pk).update(nickname='Renamed')
+            Bot.objects.filter(pk=bot.pk).update(status='online', last_seen=timezone.now())
+            event = self._next(subscription)
+            assert (event['op'], event['bot_id'], event['status']) == ('update', '100001', 'online')
+            assert event['last_seen'] is not None
+
+            reap_stale_bots(timedelta(seconds=-1))
+            assert self._next(subscription)['status'] == 'offline'
+
+            bot.delete()
+            assert self._next(subscription)['op'] == 'delete'
+        finally:
+            presence_hub.unsubscribe(subscription)
+
+    def test_private_bots_are_not_published(self, user):
+        subscription = presence_hub.subscribe()
+        try:
+            private = BotFactory(master=user, bot_id='100001', is_public=False)
+            Bot.objects.filter(pk=private.pk).update(status='online', last_seen=timezone.now())
+            private.delete()
+            public = BotFactory(master=user, bot_id='100002')
+            event = self._next(subscription)
+            assert (event['op'], event['bot_id']) == ('insert', '100002')
+
+            # 从公开变为非公开时仍通知一次，推送流据此发出 removed
+            Bot.objects.filter(pk=public.pk).update(is_public=False)
+            event = self._next(subscription)
+            assert (event['op'], event['is_public']) == ('update', False)
+            public.delete()
+            assert subscription.get(timeout=0.5) is None
+        finally:
+            presence_hub.unsubscribe(subscription)
+
+    def test_listen_connection_bypasses_pooler(self, settings):
+        params = presence_hub._connection_params()
+        assert params['host'] == settings.DATABASES['default']['HOST']
+
+        settings.DB_LISTEN_HOST = 'db'
+        settings.DB_LISTEN_PORT = '5433'
+        params = presence_hub._connection_params()
+        assert (params['host'], params['port']) == ('db', '5433')
+
+
+@pytest.mark.django_db
+class TestAsyncPresenceStream:
+    @pytest.fixture(autouse=True)
+    def stop_listener(self):
+        yield
+        presence_hub.stop()
+
+    def test_snapshot_then_deltas(self, user):
+        bot = BotFactory(master=user, bot_id='100001', status='online')
+        subscription = presence_hub.subscribe(AsyncSubscription)
+        stream = AsyncPresenceStream(subscription)
+
+        async def consume():
+            chunks = []
+            iterator = stream.__aiter__()
+            chunks.append(await iterator.__anext__())
+            chunks.append(await iterator.__anext__())
+            presence_hub.publish({
+                'op': 'update', 'id': str(bot.id), 'bot_id': '100001',
+                'status': 'offline', 'is_public': True, 'last_seen': None,
+            })
+            chunks.append(await iterator.__anext__())
+            await iterator.aclose()
+            return chunks
+
+        retry, snapshot, change = async_to_sync(consume)()
+        assert retry.startswith('retry:')
+        assert snapshot.startswith('event: snapshot')
+        assert '100001' in snapshot
+        assert change.startswith('event: presence')
+        assert '"offline"' in change
+        stream.close()
+        assert len(presence_hub) == 0
+
+    def test_asgi_view_streams_without_buffering(self, user, settings):
+        settings.BOT_PRESENCE_MAX_DURATION = 60
+        BotFactory(master=user, bot_id='100001', status='online')
+        request = AsyncRequestFactory().get('/api/bots/presence/', HTTP_ACCEPT='text/event-stream')
+        response = BotPresenceStreamView.as_view()(request)
+        # 同步迭代时 Django 会读完整个流（直到 MAX_DURATION）才发送
+        assert response.is_async
+
+        async def first_chunks():
+            iterator = response.streaming_content.__aiter__()
+            chunks = [await asyncio.wait_for(iterator.__anext__(), 5) for _ in range(2)]
+            await iterator.aclose()
+            return chunks
+
+        retry, snapshot = async_to_sync(first_chunks)()
+        assert retry.startswith(b'retry:')
+        assert snapshot.startswith(b'event: snapshot')
+        assert b'100001' in snapshot
+        response.close()
+        assert len(presence_hub) == 0
@@ -0,0 +1,92 @@
+import pytest
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.utils import timezone
+from prometheus_client import REGISTRY
+from apps.bots.models import Bot, BotStatusCount
+from apps.bots.reaper import reap_stale_bots
+from tests.factories import BotFactory
+
+
+@pytest.mark.django_db
+class TestCheckBotStatus:
+    def test_marks_stale_online_bots_offline(self, user):
+        stale = [
+            BotFactory(
+                master=user, bot_id=str(100 + i),
+                status='online', last_seen=timezone.now() - timedelta(minutes=10 + i),
+            )
+            for i in range(5)
+        ]
+        fresh = BotFactory(
+            master=user, bot_id='200',
+            status='online', last_seen=timezone.now() - timedelta(minutes=1),
+        )
+        unknown = BotFactory(master=user, bot_id='300')
+
+        stats = reap_stale_bots(timedelta(minutes=5), chunk_size=2)
+        assert stats.updated == 5
+        assert stats.chunks == 3
+        assert Bot.objects.filter(pk__in=[b.pk for b in stale], status='offline').count() == 5
+        fresh.refresh_from_db()
+        unknown.refresh_from_db()
+        assert fresh.status == 'online'
+        assert unknown.status == 'unknown'
+
+    def test_chunks_with_equal_last_seen(self, user):
+        last_seen = timezone.now() - timedelta(minutes=10)
+        for i in range(5):
+            BotFactory(master=user, bot_id=str(100 + i), status='online')
+        Bot.objects.update(last_seen=last_seen)
+
+        stats = reap_stale_bots(timedelta(minutes=5), chunk_size=2)
+        assert stats.updated == 5
+        assert not Bot.objects.filter(status='online').exists()
+
+    def test_command_reports_counts(self, user):
+        BotFactory(
+            master=user, bot_id='100',
+            status='online', last_seen=timezone.now() - timedelta(minutes=10),
+        )
+        out = StringIO()
+        call_command('check_bot_status', '--timeout-minutes', '5', stdout=out)
+        assert '已更新 1 个机器人状态为离线' in out.getvalue()
+
+    def test_records_metrics(self, user):
+        BotFactory(
+            master=user, bot_id='100',
+            status='online', last_seen=timezone.now() - timedelta(minutes=10),
+        )
+        runs = REGISTRY.get_sample_value('bot_reaper_run_duration_seconds_count') or 0
+        marked = REGISTRY.get_sample_value('bot_reaper_marked_offline_total') or 0
+
+        reap_stale_bots(timedelta(minutes=5))
+        assert REGISTRY.get_sample_value('bot_reaper_run_duration_seconds_count') == runs + 1
+        assert REGISTRY.get_sample_value('bot_reaper_marked_offline_total') == marked + 1
+
+
+@pytest.mark.django_db
+class TestBotStatusCount:
+    def test_trigger_tracks_status_changes(self, user):
+        bots = [BotFactory(master=user, bot_id=str(100 + i), status='online') for i in range(3)]
+        BotFactory(master=user, bot_id='200')
+        assert BotStatusCount.objects.totals() == {'online': 3, 'unknown': 1}
+
+        Bot.objects.filter(pk=bots[0].pk).update(status='offline')
+        # 状态不变的心跳不产生增量行
+        rows = BotStatusCount.objects.count()
+        Bot.objects.filter(pk=bots[1].pk).update(status='online', last_seen=timezone.now())
+        assert BotStatusCount.objects.count() == rows
+
+        bots[2].delete()
+        assert BotStatusCount.objects.totals() == {'online': 1, 'offline': 1, 'unknown': 1}
+
+    def test_reaper_compacts_rows(self, user):
+        for i in range(3):
+            BotFactory(master=user, bot_id=str(100 + i), status='online')
+        Bot.objects.update(status='offline')
+
+        reap_stale_bots(timedelta(minutes=5))
+        assert BotStatusCount.objects.count() == 2
+        assert BotStatusCount.objects.totals() == {'online': 0, 'offline': 3}
@@ -0,0 +1,127 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from apps.bots.models import Bot
+from apps.users.models import User
+from tests.factories import BotFactory
+
+
+@pytest.mark.django_db
+class TestBotRegistration:
+    def test_register_new_bot(self, api_client):
+        url = '/api/bots/register/'
+        data = {
+            'bot_id': '123456',
+            'nickname': 'TestBot',
+            'master_id': '987654',
+            'version': 'v1.0.0',
+            'description': 'A test bot'
+        }
+        response = api_client.post(url, data, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+        assert 'api_key' in response.data
+        assert response.data['bot_id'] == '123456'
+        assert response.data['nickname'] == 'TestBot'
+        master = Bot.objects.get(bot_id='123456').master
+        assert master.username == 'qq_987654'
+        assert not master.has_usable_password()
+
+    def test_register_duplicate_bot(self, api_client, user):
+        bot = Bot.objects.create(
+            bot_id='123456',
+            nickname='ExistingBot',
+            master=user,
+            master_qq='987654',
+            api_key='test-api-key'
+        )
+        url = '/api/bots/register/'
+        data = {
+            'bot_id': '123456',
+            'nickname': 'UpdatedBot',
+            'master_id': '987654',
+            'version': 'v2.0.0'
+        }
+        response = api_client.post(url, data, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['nickname'] == 'UpdatedBot'
+        assert response.data['api_key'] != 'test-api-key'
+
+    def test_register_missing_fields(self, api_client):
+        url = '/api/bots/register/'
+        data = {'bot_id': '123456'}
+        response = api_client.post(url, data, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestBotBatchRegistration:
+    url = '/api/bots/register/batch/'
+
+    def _items(self, count, start=0):
+        return [
+            {'bot_id': str(100000 + i), 'nickname': f'Bot{i}', 'master_id': str(900000 + start + i % 3)}
+            for i in range(start, start + count)
+        ]
+
+    def test_register_new_bots(self, api_client):
+        response = api_client.post(self.url, {'bots': self._items(5)}, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        results = response.data['results']
+        assert [r['index'] for r in results] == list(range(5))
+        assert all(r['created'] for r in results)
+        assert len({r['api_key'] for r in results}) == 5
+        assert Bot.objects.count() == 5
+        assert User.objects.filter(username__startswith='qq_').count() == 3
+
+    def test_existing_bots_get_new_keys(self, api_client, user):
+        BotFactory(master=user, bot_id='100000', nickname='ExistingBot', api_key='old-api-key')
+        response = api_client.post(self.url, {'bots': self._items(2)}, format='json')
+        existing, new = response.data['results']
+        assert not existing['created']
+        assert existing['api_key'] != 'old-api-key'
+        assert new['created']
+        bot = Bot.objects.get(bot_id='100000')
+        assert bot.nickname == 'Bot0'
+        assert bot.api_key == existing['api_key']
+        assert bot.master == user
+
+    def test_item_errors_are_reported_inline(self, api_client):
+        items = self._items(2) + [{'bot_id': '100000', 'nickname': 'Dup', 'master_id': '1'}, {'bot_id': '1'}]
+        response = api_client.post(self.url, {'bots': items}, format='json')
+        results = response.data['results']
+        assert results[0]['created'] and results[1]['created']
+        assert 'bot_id' in results[2]['errors']
+        assert 'nickname' in results[3]['errors']
+        assert Bot.objects.count() == 2
+
+    def test_placeholder_email_taken_by_other_user(self, api_client):
+        User.objects.create_user(username='someone', email='qq_900000@example.com', password='x' * 12)
+        response = api_client.post(self.url, {'bots': self._items(1)}, format='json')
+        assert 'master_id' in response.data['results'][0]['errors']
+        assert not Bot.objects.exists()
+
+    def test_query_count_does_not_grow_with_batch(self, api_client):
+        with CaptureQueriesContext(connection) as small:
+            api_client.post(self.url, {'bots': self._items(3)}, format='json')
+        with CaptureQueriesContext(connection) as large:
+            api_client.post(self.url, {'bots': self._items(30, start=3)}, format='json')
+        assert len(large.captured_queries) == len(small.captured_queries)
+
+    def test_items_share_bot_id_throttle(self, api_client, throttle_rates):
+        throttle_rates(bot_register='1/hour')
+        api_client.post('/api/bots/register/', self._items(1)[0], format='json')
+        response = api_client.post(self.url, {'bots': self._items(2)}, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        throttled, created = response.data['results']
+        assert 'bot_id' in throttled['errors'] and 'api_key' not in throttled
+        assert created['created']
+        # 同一 bot_id 再次出现在批量请求中仍被限流，API Key 不会被轮换
+        api_key = Bot.objects.get(bot_id='100001').api_key
+        response = api_client.post(self.url, {'bots': self._items(2)}, format='json')
+        assert all('errors' in r for r in response.data['results'])
+        assert Bot.objects.get(bot_id='100001').api_key == api_key
+
+    def test_empty_or_invalid_payload(self, api_client):
+        assert api_client.post(self.url, {'bots': []}, format='json').status_code == status.HTTP_400_BAD_REQUEST
+        assert api_client.post(self.url, {'bots': 'x'}, format='json').status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,75 @@
+import pytest
+from rest_framework import status
+from tests.factories import BotFactory
+
+
+@pytest.mark.django_db
+class TestBotSearch:
+    def _search(self, client, query):
+        response = client.get('/api/bots/', query)
+        assert response.status_code == status.HTTP_200_OK
+        return [item['nickname'] for item in response.data['results']]
+
+    def test_search_chinese_substring(self, api_client, user):
+        BotFactory(master=user, bot_id='100001', nickname='骰子机器人')
+        BotFactory(master=user, bot_id='100002', nickname='跑团小助手')
+        assert self._search(api_client, {'q': '机器人'}) == ['骰子机器人']
+        assert self._search(api_client, {'q': '助手'}) == ['跑团小助手']
+
+    def test_search_latin_prefix_and_bot_id(self, api_client, user):
+        BotFactory(master=user, bot_id='100001', nickname='DiceBot Pro')
+        BotFactory(master=user, bot_id='200002', nickname='Helper')
+        assert self._search(api_client, {'q': 'dice'}) == ['DiceBot Pro']
+        assert self._search(api_client, {'q': '20000'}) == ['Helper']
+
+    def test_nickname_match_ranks_above_description(self, api_client, user):
+        BotFactory(master=user, bot_id='100001', nickname='Helper', description='掷骰子用的机器人')
+        BotFactory(master=user, bot_id='100002', nickname='骰子机器人')
+        assert self._search(api_client, {'q': '骰子'}) == ['骰子机器人', 'Helper']
+
+    def test_search_reflects_updates(self, api_client, user):
+        bot = BotFactory(master=user, bot_id='100001', nickname='OldName')
+        bot.nickname = '新名字'
+        bot.save()
+        assert self._search(api_client, {'q': 'oldname'}) == []
+        assert self._search(api_client, {'q': '名字'}) == ['新名字']
+
+    def test_search_excludes_private_bots(self, api_client, user):
+        BotFactory(master=user, bot_id='100001', nickname='骰子机器人', is_public=False)
+        assert self._search(api_client, {'q': '骰子'}) == []
+
+    def test_filter_by_status(self, api_client, user):
+        BotFactory(master=user, bot_id='100001', nickname='骰子一号', status='online')
+        BotFactory(master=user, bot_id='100002', nickname='骰子二号', status='offline')
+        assert self._search(api_client, {'status': 'online'}) == ['骰子一号']
+        assert self._search(api_client, {'q': '骰子', 'status': 'offline'}) == ['骰子二号']
+
+    def test_invalid_status(self, api_client):
+        response = api_client.get('/api/bots/', {'status': 'busy'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_query_without_terms(self, api_client, user):
+        BotFactory(master=user, bot_id='100001', nickname='Bot')
+        assert self._search(api_client, {'q': '!!!'}) == []
+
+    def test_search_count_is_capped(self, api_client, user, settings):
+        settings.BOT_SEARCH_MAX_COUNT = 2
+        for i in range(3):
+            BotFactory(master=user, bot_id=f'10000{i}', nickname=f'骰子{i}号')
+        response = api_client.get('/api/bots/', {'q': '骰子'})
+        assert response.data['count'] == 2
+        assert response.data['count_approximate'] is True
+        assert len(response.data['results']) == 2
+
+        response = api_client.get('/api/bots/', {'q': '100000'})
+        assert response.data['count'] == 1
+        assert response.data['count_approximate'] is False
+
+    def test_capped_candidates_are_the_best_ranked(self, api_client, user, settings):
+        settings.BOT_SEARCH_MAX_COUNT = 1
+        for i in range(5):
+            BotFactory(
+                master=user, bot_id=f'10000{i}', nickname=f'Helper{i}', description='掷骰子用的机器人',
+            )
+        BotFactory(master=user, bot_id='200000', nickname='骰子机器人')
+        assert self._search(api_client, {'q': '骰子'})[0] == '骰子机器人'
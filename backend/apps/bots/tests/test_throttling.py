@@ -0,0 +1,94 @@
+import pytest
+import time
+from unittest import mock
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from prometheus_client import REGISTRY
+from rest_framework import status
+from apps.bots.authentication import api_key_cache
+from apps.bots.throttling import TokenBucketThrottle
+from tests.factories import BotFactory
+
+
+@pytest.mark.django_db
+class TestThrottling:
+    def _heartbeat(self, api_client, api_key='valid-api-key', **extra):
+        return api_client.post(
+            '/api/bots/heartbeat/', {'status': 'online'}, format='json',
+            HTTP_X_API_KEY=api_key, **extra
+        )
+
+    def test_heartbeat_throttled_before_authentication(self, api_client, user, throttle_rates):
+        throttle_rates(bot_heartbeat='2/min')
+        BotFactory(master=user, bot_id='123456', api_key='valid-api-key')
+        BotFactory(master=user, bot_id='654321', api_key='other-api-key')
+        labels = {'scope': 'bot_heartbeat'}
+        throttled = REGISTRY.get_sample_value('bot_throttled_requests_total', labels) or 0
+
+        assert self._heartbeat(api_client).status_code == status.HTTP_200_OK
+        assert self._heartbeat(api_client).status_code == status.HTTP_200_OK
+        api_key_cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self._heartbeat(api_client)
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert response['Retry-After'] == '30'
+        assert len(ctx.captured_queries) == 0
+        assert REGISTRY.get_sample_value('bot_throttled_requests_total', labels) == throttled + 1
+
+        # 按 API Key 分桶，其他机器人不受影响
+        assert self._heartbeat(api_client, 'other-api-key').status_code == status.HTTP_200_OK
+
+    def test_tokens_refill(self, api_client, user, throttle_rates):
+        throttle_rates(bot_heartbeat='2/min')
+        BotFactory(master=user, bot_id='123456', api_key='valid-api-key')
+        now = time.time()
+        with mock.patch.object(TokenBucketThrottle, 'timer', mock.Mock(return_value=now)):
+            for _ in range(2):
+                assert self._heartbeat(api_client).status_code == status.HTTP_200_OK
+            assert self._heartbeat(api_client).status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        with mock.patch.object(TokenBucketThrottle, 'timer', mock.Mock(return_value=now + 30)):
+            assert self._heartbeat(api_client).status_code == status.HTTP_200_OK
+            assert self._heartbeat(api_client).status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    def test_buckets_survive_response_cache_churn(self, api_client, user, throttle_rates):
+        throttle_rates(bot_heartbeat='1/min')
+        BotFactory(master=user, bot_id='123456', api_key='valid-api-key')
+        assert self._heartbeat(api_client).status_code == status.HTTP_200_OK
+        # 随机查询参数的广场请求会在 default 缓存中写入大量条目
+        for i in range(1000):
+            cache.set(f'bots:plaza:flood:{i}', i)
+        assert self._heartbeat(api_client).status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    def test_invalid_keys_throttled_by_ip(self, api_client, throttle_rates):
+        throttle_rates(bot_heartbeat_ip='2/min')
+        for i in range(2):
+            response = self._heartbeat(api_client, f'random-key-{i}')
+            assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        response = self._heartbeat(api_client, 'random-key-2')
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    def test_registration_throttled_by_bot_id(self, api_client, throttle_rates):
+        throttle_rates(bot_register='1/hour')
+        data = {'bot_id': '123456', 'nickname': 'TestBot', 'master_id': '987654'}
+        assert api_client.post('/api/bots/register/', data, format='json').status_code == 201
+        response = api_client.post('/api/bots/register/', data, format='json')
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert int(response['Retry-After']) == 3600
+
+        data['bot_id'] = '654321'
+        assert api_client.post('/api/bots/register/', data, format='json').status_code == 201
+
+    def test_plaza_throttled_by_forwarded_client(self, api_client, settings, throttle_rates):
+        throttle_rates(bot_plaza='1/min')
+        settings.REST_FRAMEWORK = {**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1}
+        assert api_client.get('/api/bots/', HTTP_X_FORWARDED_FOR='10.0.0.1').status_code == 200
+        response = api_client.get('/api/bots/', HTTP_X_FORWARDED_FOR='10.0.0.1')
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert api_client.get('/api/bots/', HTTP_X_FORWARDED_FOR='10.0.0.2').status_code == 200
+
+    def test_empty_rate_disables_throttle(self, api_client, user, throttle_rates):
+        throttle_rates(bot_heartbeat='', bot_heartbeat_ip='')
+        BotFactory(master=user, bot_id='123456', api_key='valid-api-key')
+        for _ in range(50):
+            assert self._heartbeat(api_client).status_code == status.HTTP_200_OK
@@ -1,87 +1,8 @@
 import pytest
 import secrets
-from django.urls import reverse
 from rest_framework import status
 from apps.bots.models import Bot
-
-
-@pytest.mark.django_db
-class TestBotRegistration:
-    def test_register_new_bot(self, api_client):
-        url = '/api/bots/register/'
-        data = {
-            'bot_id': '123456',
-            'nickname': 'TestBot',
-            'master_id': '987654',
-            'version': 'v1.0.0',
-            'description': 'A test bot'
-        }
-        response = api_client.post(url, data, format='json')
-        assert response.status_code == status.HTTP_201_CREATED
-        assert 'api_key' in response.data
-        assert response.data['bot_id'] == '123456'
-        assert response.data['nickname'] == 'TestBot'
-
-    def test_register_duplicate_bot(self, api_client, user):
-        bot = Bot.objects.create(
-            bot_id='123456',
-            nickname='ExistingBot',
-            master=user,
-            master_qq='987654',
-            api_key='test-api-key'
-        )
-        url = '/api/bots/register/'
-        data = {
-            'bot_id': '123456',
-            'nickname': 'UpdatedBot',
-            'master_id': '987654',
-            'version': 'v2.0.0'
-        }
-        response = api_client.post(url, data, format='json')
-        assert response.status_code == status.HTTP_201_CREATED
-        assert response.data['nickname'] == 'UpdatedBot'
-        assert response.data['api_key'] != 'test-api-key'
-
-    def test_register_missing_fields(self, api_client):
-        url = '/api/bots/register/'
-        data = {'bot_id': '123456'}
-        response = api_client.post(url, data, format='json')
-        assert response.status_code == status.HTTP_400_BAD_REQUEST
-
-
-@pytest.mark.django_db
-class TestBotHeartbeat:
-    def test_heartbeat_with_valid_key(self, api_client, user):
-        bot = Bot.objects.create(
-            bot_id='123456',
-            nickname='TestBot',
-            master=user,
-            master_qq='987654',
-            api_key='valid-api-key',
-            status='unknown'
-        )
-        url = '/api/bots/heartbeat/'
-        response = api_client.post(
-            url,
-            {'status': 'online'},
-            format='json',
-            HTTP_X_API_KEY='valid-api-key'
-        )
-        assert response.status_code == status.HTTP_200_OK
-        assert response.data['status'] == 'online'
-        bot.refresh_from_db()
-        assert bot.status == 'online'
-        assert bot.last_seen is not None
-
-    def test_heartbeat_with_invalid_key(self, api_client):
-        url = '/api/bots/heartbeat/'
-        response = api_client.post(
-            url,
-            {'status': 'online'},
-            format='json',
-            HTTP_X_API_KEY='invalid-key'
-        )
-        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+from tests.factories import BotFactory
 
 
 @pytest.mark.django_db
@@ -185,3 +106,45 @@ class TestBotCRUD:
         url = f'/api/bots/{bot.id}/delete/'
         response = authenticated_client.delete(url)
         assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+class TestBotListQueryCount:
+    """列表接口的查询数与页大小无关（不逐行加载主人）"""
+
+    def _create_bots(self, users, count):
+        for i in range(count):
+            BotFactory(master=users[i % len(users)], bot_id=str(100000 + i), nickname=f'骰子{i}号')
+
+    @pytest.mark.parametrize('count', [2, 10])
+    def test_public_list(self, authenticated_client, user, other_user, count, django_assert_num_queries):
+        self._create_bots([user, other_user], count)
+        # COUNT + 当前页
+        with django_assert_num_queries(2):
+            response = authenticated_client.get('/api/bots/')
+        assert len(response.data['results']) == count
+        own = [item for item in response.data['results'] if 'api_key' in item]
+        assert len(own) == (count + 1) // 2
+
+    @pytest.mark.parametrize('count', [2, 10])
+    def test_public_list_cursor(self, authenticated_client, user, other_user, count, django_assert_num_queries):
+        self._create_bots([user, other_user], count)
+        with django_assert_num_queries(1):
+            response = authenticated_client.get('/api/bots/', {'pagination': 'cursor'})
+        assert len(response.data['results']) == count
+
+    @pytest.mark.parametrize('count', [2, 10])
+    def test_search(self, authenticated_client, user, other_user, count, django_assert_num_queries):
+        self._create_bots([user, other_user], count)
+        # 候选 + 当前页
+        with django_assert_num_queries(2):
+            response = authenticated_client.get('/api/bots/', {'q': '骰子'})
+        assert len(response.data['results']) == count
+
+    @pytest.mark.parametrize('count', [2, 10])
+    def test_my_bots(self, authenticated_client, user, count, django_assert_num_queries):
+        self._create_bots([user], count)
+        with django_assert_num_queries(2):
+            response = authenticated_client.get('/api/bots/my/')
+        assert len(response.data['results']) == count
+        assert all('api_key' in item for item in response.data['results'])
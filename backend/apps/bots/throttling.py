@@ -0,0 +1,159 @@
+"""
+机器人接口限流（令牌桶）
+
+每个限流键一个令牌桶，REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] 中 scope 对应的
+'次数/周期' 既是桶容量（可连续发出的请求数），也是补充速度（每个周期补满）。
+桶状态 (令牌数, 更新时间) 保存在 limits 缓存中：locmem 后端下每个 worker 各有一份，
+redis 后端下所有 worker 共享；读写之间不加锁，并发时可能多放行少量请求。
+
+限流键只取自请求头、请求体与客户端地址，ThrottleFirstMixin 在认证之前检查，
+被限流的请求不会访问数据库。
+"""
+import hashlib
+import math
+
+from rest_framework import exceptions
+
+from apps.common.throttling import SettingsRateThrottle
+
+from .metrics import count_throttled
+
+
+class TokenBucketThrottle(SettingsRateThrottle):
+    cache_format = 'throttle:%(scope)s:%(ident)s'
+
+    def get_ident_key(self, ident):
+        if ident is None:
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        return self.allow_key(self.key)
+
+    def allow_key(self, key):
+        """从 key 对应的桶中取出一个令牌"""
+        state = self._take(self.cache.get(key))
+        if state is None:
+            return self.throttle_failure()
+        # 空闲一个周期后桶已补满，条目随之过期
+        self.cache.set(key, state, self.duration)
+        return True
+
+    async def aallow_request(self, request, view):
+        """allow_request 的异步版本，供 ASGI 模式下的异步视图使用"""
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        state = self._take(await self.cache.aget(self.key))
+        if state is None:
+            return self.throttle_failure()
+        await self.cache.aset(self.key, state, self.duration)
+        return True
+
+    def throttle_failure(self):
+        count_throttled(self.scope)
+        return False
+
+    def wait(self):
+        return self.wait_seconds
+
+    def _take(self, state):
+        """按经过的时间补充令牌并取出一个，返回新的桶状态；不足一个令牌时返回 None"""
+        now = self.timer()
+        tokens, updated = state if state is not None else (self.num_requests, now)
+        tokens = min(self.num_requests, tokens + (now - updated) * self.num_requests / self.duration)
+        if tokens < 1:
+            self.wait_seconds = (1 - tokens) * self.duration / self.num_requests
+            return None
+        return (tokens - 1, now)
+
+
+def _digest(value):
+    # 缓存键中不保存 API Key 原文
+    return hashlib.sha256(value.encode()).hexdigest()[:32]
+
+
+class BotApiKeyThrottle(TokenBucketThrottle):
+    """按 X-API-Key 请求头限流，不校验 API Key 是否有效"""
+    scope = 'bot_heartbeat'
+
+    def get_cache_key(self, request, view):
+        api_key = request.headers.get('X-API-Key')
+        return self.get_ident_key(_digest(api_key) if api_key else None)
+
+
+class BotIdThrottle(TokenBucketThrottle):
+    """按请求体中的 bot_id 限流（注册会轮换 API Key）"""
+    scope = 'bot_register'
+
+    def get_cache_key(self, request, view):
+        try:
+            bot_id = request.data.get('bot_id')
+        except AttributeError:
+            return None
+        return self.get_ident_key(str(bot_id)[:32] if bot_id else None)
+
+    def allow_bot_id(self, bot_id):
+        """批量注册中的每一项与单个注册计入同一个桶"""
+        return self.allow_key(self.get_ident_key(str(bot_id)[:32]))
+
+
+class ClientIpThrottle(TokenBucketThrottle):
+    """
+    按客户端地址限流，scope 由子类指定
+    经 Nginx 代理时需设置 REST_FRAMEWORK['NUM_PROXIES']，否则所有请求都来自代理地址
+    """
+
+    def get_cache_key(self, request, view):
+        return self.get_ident_key(self.get_ident(request))
+
+
+class HeartbeatIpThrottle(ClientIpThrottle):
+    # 兜底：随机 API Key 不会命中同一个按 Key 的桶，但每次认证都要查询数据库
+    scope = 'bot_heartbeat_ip'
+
+
+class RegistrationIpThrottle(ClientIpThrottle):
+    scope = 'bot_register_ip'
+
+
+class PlazaIpThrottle(ClientIpThrottle):
+    scope = 'bot_plaza'
+
+
+class ThrottleFirstMixin:
+    """在认证之前检查限流（DRF 默认在认证与权限检查之后）"""
+    _throttles_checked = False
+
+    def initial(self, request, *args, **kwargs):
+        self.check_throttles(request)
+        self._throttles_checked = True
+        super().initial(request, *args, **kwargs)
+
+    def check_throttles(self, request):
+        if not self._throttles_checked:
+            super().check_throttles(request)
+
+
+async def acheck_throttles(throttle_classes, request, view=None):
+    """异步视图的限流检查，返回需等待的秒数，未被限流时返回 None"""
+    waits = []
+    for throttle_class in throttle_classes:
+        throttle = throttle_class()
+        if not await throttle.aallow_request(request, view):
+            waits.append(throttle.wait())
+    if not waits:
+        return None
+    return max(waits)
+
+
+def throttled_detail(wait):
+    """与 DRF Throttled 异常相同的响应内容与 Retry-After 取值"""
+    return exceptions.Throttled(wait).detail, str(math.ceil(wait))
@@ -1,12 +1,24 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+# ASGI 部署时心跳与广场列表使用异步视图
+if settings.BOT_ASYNC_VIEWS:
+    heartbeat_view = async_views.AsyncBotHeartbeatView.as_view()
+    list_view = async_views.AsyncBotListView.as_view()
+else:
+    heartbeat_view = views.BotHeartbeatView.as_view()
+    list_view = views.BotListView.as_view()
 
 urlpatterns = [
     path('register/', views.BotRegistrationView.as_view(), name='bot-register'),
-    path('heartbeat/', views.BotHeartbeatView.as_view(), name='bot-heartbeat'),
+    path('register/batch/', views.BotBatchRegistrationView.as_view(), name='bot-register-batch'),
+    path('heartbeat/', heartbeat_view, name='bot-heartbeat'),
     path('bind/', views.BotBindView.as_view(), name='bot-bind'),
-    path('', views.BotListView.as_view(), name='bot-list'),
+    path('', list_view, name='bot-list'),
     path('my/', views.MyBotListView.as_view(), name='bot-my-list'),
+    path('presence/', views.BotPresenceStreamView.as_view(), name='bot-presence'),
+    path('cache/stats/', views.PlazaCacheStatsView.as_view(), name='bot-cache-stats'),
     path('<uuid:pk>/regenerate-key/', views.BotRegenerateKeyView.as_view(), name='bot-regenerate-key'),
     path('<uuid:id>/', views.BotDetailView.as_view(), name='bot-detail'),
     path('<uuid:id>/update/', views.BotUpdateView.as_view(), name='bot-update'),
@@ -1,19 +1,41 @@
 from rest_framework import status, generics
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
+from rest_framework.renderers import BaseRenderer, JSONRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models import Q
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 import secrets
 
 from .models import Bot
 from .serializers import (
-    BotSerializer, BotRegistrationSerializer, BotHeartbeatSerializer
+    BotSerializer, BotRegistrationSerializer, BotBatchRegistrationSerializer,
+    BotHeartbeatSerializer
 )
-from .authentication import BotAuthentication
+from .authentication import BotAuthentication, api_key_cache
+from .cache import PlazaCacheMixin, plaza_cache
+from .heartbeat import record_heartbeat
+from .pagination import SelectablePaginationMixin
+from .presence import (
+    AsyncPresenceStream, AsyncSubscription, PresenceStream, Subscription, presence_hub
+)
+from .search import search_bots
+from .throttling import (
+    BotApiKeyThrottle, BotIdThrottle, HeartbeatIpThrottle, PlazaIpThrottle,
+    RegistrationIpThrottle, ThrottleFirstMixin, throttled_detail,
+)
+
+# 批量写入时单条 INSERT / UPDATE 语句的最大行数
+BATCH_WRITE_SIZE = 500
 
 
-class BotRegistrationView(APIView):
+class BotRegistrationView(ThrottleFirstMixin, APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [BotIdThrottle, RegistrationIpThrottle]
 
     def post(self, request):
         serializer = BotRegistrationSerializer(data=request.data)
@@ -31,16 +53,13 @@ class BotRegistrationView(APIView):
             bot.description = data.get('description', '')
             bot.api_key = secrets.token_hex(32)
             bot.save()
+            api_key_cache.invalidate_bot(bot.pk)
         else:
             master_qq = data['master_id']
             from apps.users.models import User
             master = User.objects.filter(username=f'qq_{master_qq}').first()
             if not master:
-                master = User.objects.create_user(
-                    username=f'qq_{master_qq}',
-                    email=f'qq_{master_qq}@example.com',
-                    password=secrets.token_hex(16)
-                )
+                master = User.objects.create_placeholder(master_qq)
 
             bot = Bot.objects.create(
                 bot_id=bot_id,
@@ -51,6 +70,7 @@ class BotRegistrationView(APIView):
                 description=data.get('description', ''),
                 api_key=secrets.token_hex(32)
             )
+        plaza_cache.bump()
 
         return Response({
             'bot_id': bot.bot_id,
@@ -59,6 +79,128 @@ class BotRegistrationView(APIView):
         }, status=status.HTTP_201_CREATED)
 
 
+class BotBatchRegistrationView(ThrottleFirstMixin, APIView):
+    """
+    批量注册机器人
+    已有机器人与 qq_<主人QQ> 用户各用一次查询取出，缺失的用户与机器人批量插入，
+    单项校验失败只在该项结果中返回 errors，不影响其他项。
+    除按客户端地址限流外，每一项还按 bot_id 计入单个注册的限流桶，超出的项同样在 errors 中返回。
+    """
+    permission_classes = [AllowAny]
+    throttle_classes = [RegistrationIpThrottle]
+
+    def post(self, request):
+        serializer = BotBatchRegistrationSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        results = {}
+        items = {}
+        seen = set()
+        bot_id_throttle = BotIdThrottle()
+        for index, item in enumerate(serializer.validated_data['bots']):
+            item_serializer = BotRegistrationSerializer(data=item)
+            if not item_serializer.is_valid():
+                results[index] = {'index': index, 'errors': item_serializer.errors}
+                continue
+            data = item_serializer.validated_data
+            if data['bot_id'] in seen:
+                results[index] = {'index': index, 'errors': {'bot_id': ['同一批次中机器人QQ号重复']}}
+                continue
+            seen.add(data['bot_id'])
+            if not bot_id_throttle.allow_bot_id(data['bot_id']):
+                detail, _ = throttled_detail(bot_id_throttle.wait())
+                results[index] = {'index': index, 'errors': {'bot_id': [detail]}}
+                continue
+            items[index] = data
+
+        with transaction.atomic():
+            existing = Bot.objects.in_bulk(
+                [data['bot_id'] for data in items.values()], field_name='bot_id'
+            )
+            masters = self._resolve_masters(
+                {data['master_id'] for data in items.values() if data['bot_id'] not in existing},
+            )
+
+            to_update, to_create = [], []
+            now = timezone.now()
+            for index, data in items.items():
+                bot = existing.get(data['bot_id'])
+                if bot:
+                    bot.nickname = data['nickname']
+                    bot.master_qq = data['master_id']
+                    bot.version = data.get('version', '')
+                    bot.description = data.get('description', '')
+                    bot.api_key = secrets.token_hex(32)
+                    bot.updated_at = now
+                    to_update.append(bot)
+                    created = False
+                else:
+                    master = masters.get(data['master_id'])
+                    if master is None:
+                        results[index] = {
+                            'index': index,
+                            'errors': {'master_id': ['该主人QQ号的占位邮箱已被其他账号使用']},
+                        }
+                        continue
+                    bot = Bot(
+                        bot_id=data['bot_id'],
+                        nickname=data['nickname'],
+                        master=master,
+                        master_qq=data['master_id'],
+                        version=data.get('version', ''),
+                        description=data.get('description', ''),
+                        api_key=secrets.token_hex(32)
+                    )
+                    to_create.append(bot)
+                    created = True
+                results[index] = {
+                    'index': index,
+                    'bot_id': bot.bot_id,
+                    'api_key': bot.api_key,
+                    'nickname': bot.nickname,
+                    'created': created,
+                }
+
+            Bot.objects.bulk_update(
+                to_update,
+                ['nickname', 'master_qq', 'version', 'description', 'api_key', 'updated_at'],
+                batch_size=BATCH_WRITE_SIZE,
+            )
+            Bot.objects.bulk_create(to_create, batch_size=BATCH_WRITE_SIZE)
+
+        for bot in to_update:
+            api_key_cache.invalidate_bot(bot.pk)
+        if to_update or to_create:
+            plaza_cache.bump()
+
+        return Response({'results': [results[index] for index in sorted(results)]})
+
+    def _resolve_masters(self, master_qqs):
+        """返回 {主人QQ号: User}，缺失的 qq_<主人QQ> 用户批量创建"""
+        from apps.users.models import User
+
+        usernames = {f'qq_{qq}': qq for qq in master_qqs}
+        emails = {f'qq_{qq}@example.com': qq for qq in master_qqs}
+        masters, taken = {}, set()
+        for user in User.objects.filter(
+            Q(username__in=usernames) | Q(email__in=emails)
+        ):
+            if user.username in usernames:
+                masters[usernames[user.username]] = user
+            else:
+                taken.add(emails[user.email])
+
+        new_users = [
+            User.objects.build_placeholder(qq)
+            for qq in master_qqs - masters.keys() - taken
+        ]
+        User.objects.bulk_create(new_users, batch_size=BATCH_WRITE_SIZE)
+
+        masters.update({user.username[len('qq_'):]: user for user in new_users})
+        return masters
+
+
 class BotBindView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -78,7 +220,7 @@ class BotBindView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        if bot.master == request.user:
+        if bot.master_id == request.user.pk:
             return Response(
                 {'detail': '你已经绑定了这个机器人'},
                 status=status.HTTP_400_BAD_REQUEST
@@ -86,6 +228,7 @@ class BotBindView(APIView):
 
         bot.master = request.user
         bot.save()
+        plaza_cache.bump()
 
         return Response({'message': '绑定成功'})
 
@@ -104,13 +247,15 @@ class BotRegenerateKeyView(APIView):
 
         bot.api_key = secrets.token_hex(32)
         bot.save()
+        api_key_cache.invalidate_bot(bot.pk)
 
         return Response({'api_key': bot.api_key})
 
 
-class BotHeartbeatView(APIView):
+class BotHeartbeatView(ThrottleFirstMixin, APIView):
     authentication_classes = [BotAuthentication]
     permission_classes = [AllowAny]
+    throttle_classes = [BotApiKeyThrottle, HeartbeatIpThrottle]
 
     def post(self, request):
         bot = request.user
@@ -122,17 +267,48 @@ class BotHeartbeatView(APIView):
 
         serializer = BotHeartbeatSerializer(data=request.data)
         if serializer.is_valid():
-            bot.status = serializer.validated_data.get('status', 'online')
-            bot.last_seen = timezone.now()
-            bot.save()
-            return Response({'status': bot.status})
+            bot_status = serializer.validated_data.get('status', 'online')
+            if not record_heartbeat(bot, bot_status, timezone.now()):
+                api_key_cache.invalidate_bot(bot.pk)
+                return Response(
+                    {'error': 'Invalid API Key'},
+                    status=status.HTTP_401_UNAUTHORIZED
+                )
+            return Response({'status': bot_status})
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class BotListView(generics.ListCreateAPIView):
-    queryset = Bot.objects.filter(is_public=True)
+class BotListView(ThrottleFirstMixin, PlazaCacheMixin, SelectablePaginationMixin, generics.ListCreateAPIView):
+    """
+    机器人广场
+    ?q= 按 QQ 号 / 昵称 / 描述全文检索并按相关度排序，?status= 按在线状态过滤
+    """
+    queryset = Bot.objects.filter(is_public=True).defer('search_vector')
     serializer_class = BotSerializer
+    throttle_classes = [PlazaIpThrottle]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method != 'GET':
+            return queryset
+
+        bot_status = self.request.query_params.get('status')
+        if bot_status:
+            if bot_status not in dict(Bot.STATUS_CHOICES):
+                raise ValidationError({'status': '无效的在线状态'})
+            queryset = queryset.filter(status=bot_status)
+
+        q = self.request.query_params.get('q', '').strip()
+        if q:
+            queryset = search_bots(queryset, q)
+        return queryset
+
+    def get_pagination_mode(self):
+        # 按相关度排序的结果无法按创建时间做键集分页
+        if self.request.query_params.get('q', '').strip():
+            return 'search'
+        return super().get_pagination_mode()
 
     def get_permissions(self):
         if self.request.method == 'GET':
@@ -141,6 +317,7 @@ class BotListView(generics.ListCreateAPIView):
 
     def perform_create(self, serializer):
         serializer.save(master=self.request.user)
+        plaza_cache.bump()
 
     def get_serializer_class(self):
         if self.request.method == 'GET':
@@ -148,10 +325,11 @@ class BotListView(generics.ListCreateAPIView):
         return BotSerializer
 
 
-class BotDetailView(generics.RetrieveAPIView):
+class BotDetailView(ThrottleFirstMixin, PlazaCacheMixin, generics.RetrieveAPIView):
     queryset = Bot.objects.all()
     serializer_class = BotSerializer
     permission_classes = [AllowAny]
+    throttle_classes = [PlazaIpThrottle]
     lookup_field = 'id'
 
 
@@ -164,6 +342,11 @@ class BotUpdateView(generics.UpdateAPIView):
     def get_queryset(self):
         return Bot.objects.filter(master=self.request.user)
 
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        api_key_cache.invalidate_bot(serializer.instance.pk)
+        plaza_cache.bump()
+
 
 class BotDeleteView(generics.DestroyAPIView):
     queryset = Bot.objects.all()
@@ -173,10 +356,69 @@ class BotDeleteView(generics.DestroyAPIView):
     def get_queryset(self):
         return Bot.objects.filter(master=self.request.user)
 
+    def perform_destroy(self, instance):
+        bot_pk = instance.pk
+        super().perform_destroy(instance)
+        api_key_cache.invalidate_bot(bot_pk)
+        plaza_cache.bump()
 
-class MyBotListView(generics.ListAPIView):
+
+class MyBotListView(SelectablePaginationMixin, generics.ListAPIView):
     serializer_class = BotSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return Bot.objects.filter(master=self.request.user)
+        return Bot.objects.filter(master=self.request.user).defer('search_vector')
+
+
+class PlazaCacheStatsView(APIView):
+    """机器人广场缓存的命中统计（仅统计处理本次请求的 worker）"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(plaza_cache.stats())
+
+
+class EventStreamRenderer(BaseRenderer):
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return data
+
+
+class BotPresenceStreamView(APIView):
+    """
+    机器人在线状态推送流（Server-Sent Events）
+    ?bot_id=QQ号,QQ号 只订阅指定机器人，否则订阅全部公开机器人
+    """
+    permission_classes = [AllowAny]
+    renderer_classes = [JSONRenderer, EventStreamRenderer]
+    max_bot_ids = 100
+
+    def get(self, request):
+        bot_ids = [b for b in request.query_params.get('bot_id', '').split(',') if b]
+        if len(bot_ids) > self.max_bot_ids:
+            raise ValidationError({'bot_id': f'最多订阅 {self.max_bot_ids} 个机器人'})
+
+        # ASGI 下由事件循环异步发送，WSGI 下占用当前线程同步发送
+        if isinstance(request._request, ASGIRequest):
+            stream_class, subscription_class = AsyncPresenceStream, AsyncSubscription
+        else:
+            stream_class, subscription_class = PresenceStream, Subscription
+        subscription = presence_hub.subscribe(subscription_class)
+        if subscription is None:
+            response = Response(
+                {'detail': '推送连接数已满，请稍后重试'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+            response['Retry-After'] = '5'
+            return response
+
+        response = StreamingHttpResponse(
+            stream_class(subscription, bot_ids), content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        # 关闭 Nginx 的代理缓冲，事件立即送达
+        response['X-Accel-Buffering'] = 'no'
+        return response
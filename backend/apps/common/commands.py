@@ -0,0 +1,54 @@
+"""
+各应用共用的管理命令基类
+"""
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+
+class PeriodicCommand(BaseCommand):
+    """
+    周期任务命令：默认执行一次 run_once；--daemon 时常驻运行，每隔 --interval 秒执行一次，
+    收到 SIGINT / SIGTERM 后在当前一轮结束时退出
+    子类实现 run_once(**options)，action 为日志与帮助中的动作名称
+    """
+    action = '执行'
+    default_interval = 60
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--daemon',
+            action='store_true',
+            help=f'常驻运行，每隔 --interval 秒{self.action}一次'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=self.default_interval,
+            help=f'常驻模式下两次{self.action}的间隔秒数 (默认: {self.default_interval})'
+        )
+
+    def handle(self, *args, **options):
+        if not options['daemon']:
+            self.run_once(**options)
+            return
+
+        stop = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: stop.set())
+
+        self.stdout.write(f'常驻运行中，每 {options["interval"]} 秒{self.action}一次')
+        while not stop.is_set():
+            close_old_connections()
+            try:
+                self.run_once(**options)
+            except Exception as exc:
+                self.stderr.write(self.style.ERROR(f'{self.action}失败: {exc}'))
+            stop.wait(options['interval'])
+        close_old_connections()
+        self.stdout.write('已停止')
+
+    def run_once(self, **options):
+        raise NotImplementedError
@@ -0,0 +1,23 @@
+"""
+各应用共用的限流基类
+
+限流状态保存在独立的 limits 缓存中（见 settings.CACHES），不与响应缓存争用容量
+"""
+from django.core.cache import caches
+from django.utils.connection import ConnectionProxy
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+limits_cache = ConnectionProxy(caches, 'limits')
+
+
+class SettingsRateThrottle(SimpleRateThrottle):
+    """限流频率取自当前配置，scope 对应的值为空时不限流"""
+    cache = limits_cache
+
+    def get_rate(self):
+        # 每次实例化时读取当前配置，而不是导入时的 THROTTLE_RATES
+        rates = api_settings.DEFAULT_THROTTLE_RATES
+        if self.scope not in rates:
+            return super().get_rate()
+        return rates[self.scope] or None
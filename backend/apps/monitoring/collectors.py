@@ -0,0 +1,95 @@
+"""
+抓取时读取的指标
+
+进程内指标（请求、心跳、缓存、离线回收）由各进程分别累计：
+未设置 PROMETHEUS_MULTIPROC_DIR 时直接导出本进程的默认注册表；
+多进程部署时各进程把指标写入该目录下的文件，抓取时合并 METRICS_MULTIPROC_DIRS
+中全部目录的文件，任何一个 worker 处理抓取请求都能得到整个服务的合计值。
+
+数据库连接数与各状态机器人数在抓取时从数据库读出，只属于整个服务而不属于某个进程，
+注册在单独的 DATABASE_REGISTRY 中，不参与多进程合并。
+"""
+import glob
+import logging
+import os
+
+from django.conf import settings
+from django.db import connection
+from prometheus_client import REGISTRY, CollectorRegistry
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.multiprocess import MultiProcessCollector
+
+logger = logging.getLogger(__name__)
+
+
+class MultiDirectoryCollector:
+    """合并多个 prometheus_client 多进程目录（web worker、离线回收进程……）中的指标"""
+
+    def __init__(self, directories):
+        self.directories = directories
+
+    def collect(self):
+        files = []
+        for directory in self.directories:
+            files += glob.glob(os.path.join(directory, '*.db'))
+        return MultiProcessCollector.merge(sorted(files), accumulate=True)
+
+
+class DatabaseCollector:
+    """当前数据库的连接数（按状态）与 max_connections，用于观察连接池是否饱和"""
+
+    def collect(self):
+        up = GaugeMetricFamily('db_up', '抓取时数据库是否可以查询')
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT coalesce(state, 'unknown'), count(*) FROM pg_stat_activity "
+                    'WHERE datname = current_database() GROUP BY 1'
+                )
+                states = cursor.fetchall()
+                cursor.execute("SELECT current_setting('max_connections')::int")
+                max_connections = cursor.fetchone()[0]
+        except Exception:
+            logger.exception('读取数据库连接数失败')
+            up.add_metric([], 0)
+            yield up
+            return
+
+        up.add_metric([], 1)
+        yield up
+        connections = GaugeMetricFamily('db_connections', '当前数据库的连接数', labels=['state'])
+        for state, count in states:
+            connections.add_metric([state], count)
+        yield connections
+        yield GaugeMetricFamily('db_max_connections', '数据库允许的最大连接数', value=max_connections)
+
+
+class BotStatusCollector:
+    """各在线状态的机器人数，读取触发器维护的 BotStatusCount，不扫描 bots_bot"""
+
+    def collect(self):
+        from apps.bots.models import Bot, BotStatusCount
+
+        try:
+            totals = BotStatusCount.objects.totals()
+        except Exception:
+            logger.exception('读取机器人状态计数失败')
+            return
+        bots = GaugeMetricFamily('bots', '各在线状态的机器人数', labels=['status'])
+        for status, _ in Bot.STATUS_CHOICES:
+            bots.add_metric([status], totals.get(status, 0))
+        yield bots
+
+
+DATABASE_REGISTRY = CollectorRegistry(auto_describe=False)
+DATABASE_REGISTRY.register(DatabaseCollector())
+DATABASE_REGISTRY.register(BotStatusCollector())
+
+
+def process_registry():
+    """进程内指标的注册表，多进程部署时合并所有进程的指标文件"""
+    if not settings.METRICS_MULTIPROC_DIRS:
+        return REGISTRY
+    registry = CollectorRegistry()
+    registry.register(MultiDirectoryCollector(settings.METRICS_MULTIPROC_DIRS))
+    return registry
@@ -0,0 +1,71 @@
+"""
+就绪检查：在限定时间内执行一次数据库查询并记录耗时
+
+负载均衡器与容器编排可能每秒多次探测，结果在本进程内缓存 HEALTH_READY_CACHE_TTL 秒；
+缓存过期时只有一个线程访问数据库，其余线程直接返回上一次的结果，探测本身不会成为负载。
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ProbeResult:
+    ready: bool
+    latency: object  # 秒，查询失败时为 None
+    checked_at: float
+
+    def age(self):
+        return time.monotonic() - self.checked_at
+
+
+class ReadinessProbe:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._result = None
+
+    def _fresh(self, result):
+        return result is not None and result.age() < settings.HEALTH_READY_CACHE_TTL
+
+    def check(self):
+        result = self._result
+        if self._fresh(result):
+            return result
+        # 其他线程正在探测时返回上一次的结果，还没有结果时等待其完成
+        if not self._lock.acquire(blocking=result is None):
+            return result
+        try:
+            if not self._fresh(self._result):
+                self._result = self._probe()
+            return self._result
+        finally:
+            self._lock.release()
+
+    def reset(self):
+        self._result = None
+
+    def _probe(self):
+        timeout = settings.HEALTH_READY_TIMEOUT
+        start = time.perf_counter()
+        try:
+            self._ping(timeout)
+        except DatabaseError:
+            logger.warning('就绪检查：数据库查询失败', exc_info=True)
+            return ProbeResult(False, None, time.monotonic())
+        latency = time.perf_counter() - start
+        return ProbeResult(latency <= timeout, latency, time.monotonic())
+
+    def _ping(self, timeout):
+        # 连接阶段由 DB_CONNECT_TIMEOUT 限时，查询阶段由 statement_timeout 限时
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute('SET LOCAL statement_timeout = %s', [max(1, int(timeout * 1000))])
+            cursor.execute('SELECT 1')
+
+
+readiness_probe = ReadinessProbe()
@@ -0,0 +1,63 @@
+"""
+请求级耗时与 SQL 统计
+
+每个请求在 ContextVar 中放一个 RequestStats，数据库连接建立时挂上 execute_wrapper，
+该请求执行的每条 SQL 都累计到当前 RequestStats。ContextVar 会随 sync_to_async
+传入工作线程，ASGI 模式下异步视图与同步视图的查询同样能被统计。
+"""
+import time
+from contextvars import ContextVar
+
+_current = ContextVar('monitoring_request_stats', default=None)
+
+
+class RequestStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.view_started = None
+        self.view_finished = None
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def render_time(self, finished):
+        """视图返回未渲染的 Response 之后到渲染完成的耗时，不含视图内读取 serializer.data 的时间"""
+        if self.view_finished is None:
+            return 0.0
+        return finished - self.view_finished
+
+
+def begin_request():
+    """开始统计当前请求，返回 (token, stats)，结束时调用 end_request(token)"""
+    stats = RequestStats()
+    return _current.set(stats), stats
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def current_stats():
+    return _current.get()
+
+
+def record_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - start
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """connection_created 信号处理：同一个连接对象重连时不重复挂载"""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
@@ -0,0 +1,49 @@
+"""
+请求指标（Prometheus 格式），按 URL 名称（bot-list、bot-heartbeat、login……）聚合
+"""
+from prometheus_client import Counter, Gauge, Histogram
+
+# 方法名来自客户端，只保留标准方法，避免标签取值无限增长
+KNOWN_METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+REQUESTS = Counter(
+    'http_requests_total', '请求数', ['view', 'method', 'status'],
+)
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', '请求总耗时', ['view', 'method'],
+)
+DB_QUERIES = Histogram(
+    'http_request_db_queries', '单个请求的 SQL 条数', ['view'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100),
+)
+DB_DURATION = Histogram(
+    'http_request_db_duration_seconds', '单个请求的 SQL 累计耗时', ['view'],
+)
+# 与 worker 线程数对比可看出 worker 是否饱和；多进程下合计存活进程的值
+IN_FLIGHT = Gauge(
+    'http_requests_in_flight', '正在处理的请求数', multiprocess_mode='livesum',
+)
+SERIALIZE_DURATION = Histogram(
+    'http_request_serialize_duration_seconds', '序列化器输出（serializer.data）耗时', ['view'],
+)
+RENDER_DURATION = Histogram(
+    'http_request_render_duration_seconds', '响应渲染（JSON 编码等）耗时', ['view'],
+)
+
+
+def view_label(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None or not match.url_name:
+        return 'unmatched'
+    return match.url_name
+
+
+def observe_request(request, response, stats, total, render):
+    view = view_label(request)
+    method = request.method if request.method in KNOWN_METHODS else 'other'
+    REQUESTS.labels(view, method, str(response.status_code)).inc()
+    REQUEST_DURATION.labels(view, method).observe(total)
+    DB_QUERIES.labels(view).observe(stats.queries)
+    DB_DURATION.labels(view).observe(stats.db_time)
+    SERIALIZE_DURATION.labels(view).observe(stats.serialize_time)
+    RENDER_DURATION.labels(view).observe(render)
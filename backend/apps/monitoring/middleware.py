@@ -0,0 +1,70 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .instrumentation import begin_request, current_stats, end_request
+from .metrics import IN_FLIGHT, observe_request
+
+
+class InstrumentationMiddleware:
+    """
+    统计每个请求的 SQL 条数、SQL 耗时、序列化耗时、渲染耗时与总耗时，
+    按 URL 名称汇总为直方图（GET /api/metrics/），并写入 Server-Timing 响应头
+    需放在 MIDDLEWARE 的第一位，MONITORING_ENABLED=True 时由 settings 自动插入
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token, stats = begin_request()
+        IN_FLIGHT.inc()
+        try:
+            response = self.get_response(request)
+        finally:
+            IN_FLIGHT.dec()
+            end_request(token)
+        return self._finish(request, response, stats)
+
+    async def __acall__(self, request):
+        token, stats = begin_request()
+        IN_FLIGHT.inc()
+        try:
+            response = await self.get_response(request)
+        finally:
+            IN_FLIGHT.dec()
+            end_request(token)
+        return self._finish(request, response, stats)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        stats = current_stats()
+        if stats is not None:
+            stats.view_started = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # DRF 的 Response 在此之后才渲染，记下视图结束时间以区分渲染耗时
+        stats = current_stats()
+        if stats is not None:
+            stats.view_finished = time.perf_counter()
+        return response
+
+    def _finish(self, request, response, stats):
+        finished = time.perf_counter()
+        total = finished - stats.started
+        render = stats.render_time(finished)
+        observe_request(request, response, stats, total, render)
+        if settings.MONITORING_SERVER_TIMING:
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries"',
+                f'serialize;dur={stats.serialize_time * 1000:.1f}',
+                f'render;dur={render * 1000:.1f}',
+                f'total;dur={total * 1000:.1f}',
+            ])
+        return response
@@ -0,0 +1,29 @@
+"""
+序列化器耗时统计
+
+视图在返回 Response 之前就读取 serializer.data（分页列表、详情等），
+这部分耗时不在渲染阶段内，由 TimedDataMixin 计入当前请求的 serialize_time。
+只统计顶层的 .data，嵌套序列化器与列表中的子项不重复累计。
+"""
+import time
+
+from rest_framework import serializers
+
+from .instrumentation import current_stats
+
+
+class TimedDataMixin:
+    @property
+    def data(self):
+        stats = current_stats()
+        if stats is None:
+            return super().data
+        start = time.perf_counter()
+        try:
+            return super().data
+        finally:
+            stats.serialize_time += time.perf_counter() - start
+
+
+class TimedListSerializer(TimedDataMixin, serializers.ListSerializer):
+    """many=True 时使用，需在序列化器的 Meta.list_serializer_class 中指定"""
@@ -0,0 +1,43 @@
+import subprocess
+import sys
+
+from prometheus_client import CollectorRegistry, multiprocess
+
+from apps.monitoring.collectors import MultiDirectoryCollector
+
+INCREMENT = """
+import os
+from prometheus_client import Counter, Gauge
+Counter('scrapes_total', 'test', ['view']).labels('bot-list').inc({amount})
+Gauge('in_flight', 'test', multiprocess_mode='livesum').set({amount})
+print(os.getpid())
+"""
+
+
+def write_metrics(directory, amount):
+    """在独立进程中以多进程模式写入指标文件，返回该进程的 pid"""
+    result = subprocess.run(
+        [sys.executable, '-c', INCREMENT.format(amount=amount)],
+        env={'PROMETHEUS_MULTIPROC_DIR': str(directory)}, check=True,
+        capture_output=True, text=True,
+    )
+    return int(result.stdout)
+
+
+def test_merges_processes_across_directories(tmp_path):
+    web, reaper = tmp_path / 'web', tmp_path / 'reaper'
+    web.mkdir()
+    reaper.mkdir()
+    exited = write_metrics(web, 2)
+    write_metrics(web, 3)
+    write_metrics(reaper, 5)
+
+    registry = CollectorRegistry()
+    registry.register(MultiDirectoryCollector([str(web), str(reaper)]))
+    assert registry.get_sample_value('scrapes_total', {'view': 'bot-list'}) == 10
+    assert registry.get_sample_value('in_flight') == 10
+
+    # gunicorn 的 child_exit 钩子清理退出 worker 的 livesum 数据，计数器保留
+    multiprocess.mark_process_dead(exited, str(web))
+    assert registry.get_sample_value('in_flight') == 8
+    assert registry.get_sample_value('scrapes_total', {'view': 'bot-list'}) == 10
@@ -0,0 +1,68 @@
+from unittest import mock
+
+import pytest
+from django.db import OperationalError, connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.monitoring.health import readiness_probe
+
+
+@pytest.fixture(autouse=True)
+def reset_probe():
+    readiness_probe.reset()
+    yield
+    readiness_probe.reset()
+
+
+def test_liveness_does_not_query_database(client):
+    # 未启用 django_db，访问数据库会报错
+    response = client.get('/api/health/')
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+class TestReadiness:
+    url = '/api/health/ready/'
+
+    def test_ready(self, client):
+        response = client.get(self.url)
+        assert response.status_code == 200
+        data = response.json()
+        assert data['status'] == 'ok'
+        assert data['database']['latency_ms'] >= 0
+        assert response['Cache-Control'] == 'no-store'
+
+    def test_result_is_cached(self, client, settings):
+        settings.HEALTH_READY_CACHE_TTL = 60
+        with CaptureQueriesContext(connection) as ctx:
+            for _ in range(5):
+                assert client.get(self.url).status_code == 200
+        assert sum(q['sql'] == 'SELECT 1' for q in ctx.captured_queries) == 1
+
+        settings.HEALTH_READY_CACHE_TTL = 0
+        with CaptureQueriesContext(connection) as ctx:
+            client.get(self.url)
+        assert sum(q['sql'] == 'SELECT 1' for q in ctx.captured_queries) == 1
+
+    def test_slow_database_is_not_ready(self, client, settings):
+        settings.HEALTH_READY_TIMEOUT = 1e-9
+        response = client.get(self.url)
+        assert response.status_code == 503
+        assert response.json()['database']['latency_ms'] is not None
+
+    def test_database_error_is_not_ready(self, client):
+        with mock.patch.object(readiness_probe, '_ping', side_effect=OperationalError):
+            response = client.get(self.url)
+        assert response.status_code == 503
+        data = response.json()
+        assert data['status'] == 'unavailable'
+        assert data['database']['ready'] is False
+        assert data['database']['latency_ms'] is None
+
+    def test_concurrent_probe_returns_previous_result(self, settings):
+        previous = readiness_probe.check()
+        settings.HEALTH_READY_CACHE_TTL = 0
+        # 模拟另一个线程正在探测
+        with readiness_probe._lock, CaptureQueriesContext(connection) as ctx:
+            assert readiness_probe.check() is previous
+        assert len(ctx.captured_queries) == 0
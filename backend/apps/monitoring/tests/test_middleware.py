@@ -0,0 +1,98 @@
+import re
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from prometheus_client import REGISTRY
+from rest_framework import status
+from tests.factories import BotFactory
+
+MIDDLEWARE = 'apps.monitoring.middleware.InstrumentationMiddleware'
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def server_timing(response):
+    return dict(
+        re.match(r'(\w+);dur=([\d.]+)', part.strip()).groups()
+        for part in response['Server-Timing'].split(',')
+    )
+
+
+@pytest.fixture
+def instrumented(settings):
+    settings.MIDDLEWARE = [MIDDLEWARE, *settings.MIDDLEWARE]
+    settings.MONITORING_SERVER_TIMING = True
+    settings.BOT_PLAZA_CACHE_TTL = 0
+
+
+@pytest.mark.django_db
+class TestInstrumentationMiddleware:
+    def _create_bots(self, user, count):
+        for i in range(count):
+            BotFactory(master=user, bot_id=str(100000 + i), nickname=f'Bot{i}', api_key=f'key-{i}')
+
+    def test_server_timing_header(self, instrumented, api_client, user):
+        self._create_bots(user, 3)
+        response = api_client.get('/api/bots/')
+        assert response.status_code == status.HTTP_200_OK
+        timing = server_timing(response)
+        assert set(timing) == {'db', 'serialize', 'render', 'total'}
+        assert float(timing['total']) >= float(timing['db'])
+        assert float(timing['total']) >= float(timing['serialize']) + float(timing['render'])
+        assert re.search(r'desc="2 queries"', response['Server-Timing'])
+
+    def test_histograms_by_url_name(self, instrumented, api_client, user):
+        self._create_bots(user, 1)
+        before = sample('http_request_db_queries_sum', view='bot-heartbeat')
+        count_before = sample('http_requests_total', view='bot-heartbeat', method='POST', status='200')
+        for _ in range(2):
+            response = api_client.post(
+                '/api/bots/heartbeat/', {'status': 'online'}, format='json', HTTP_X_API_KEY='key-0'
+            )
+            assert response.status_code == status.HTTP_200_OK
+        assert sample('http_requests_total', view='bot-heartbeat', method='POST', status='200') == count_before + 2
+        # 第一次：认证 1 条 + 状态变化 2 条 UPDATE；第二次：API Key 命中缓存，只有 1 条 UPDATE
+        assert sample('http_request_db_queries_sum', view='bot-heartbeat') - before == 4
+        assert sample('http_request_duration_seconds_count', view='bot-heartbeat', method='POST') >= 2
+
+    def test_serializer_time_is_measured(self, instrumented, api_client, user):
+        # 列表在视图内读取 serializer.data，渲染阶段开始前序列化已经完成
+        self._create_bots(user, 3)
+        before = sample('http_request_serialize_duration_seconds_sum', view='bot-list')
+        api_client.get('/api/bots/')
+        assert sample('http_request_serialize_duration_seconds_sum', view='bot-list') > before
+        # 不经过序列化器的接口记为 0
+        assert float(server_timing(api_client.get('/api/health/'))['serialize']) == 0
+
+    def test_asgi_requests(self, instrumented, user):
+        # ASGI 下同步视图在工作线程中执行，查询仍计入当前请求
+        self._create_bots(user, 3)
+        async def get():
+            return await AsyncClient().get('/api/bots/')
+
+        response = async_to_sync(get)()
+        assert response.status_code == status.HTTP_200_OK
+        assert 'desc="2 queries"' in response['Server-Timing']
+
+    def test_unmatched_urls_share_one_label(self, instrumented, api_client):
+        before = sample('http_requests_total', view='unmatched', method='GET', status='404')
+        api_client.get('/api/no-such-endpoint/')
+        api_client.get('/api/another-missing/')
+        assert sample('http_requests_total', view='unmatched', method='GET', status='404') == before + 2
+
+    def test_unknown_methods_are_grouped(self, instrumented, api_client):
+        before = sample('http_requests_total', view='health', method='other', status='405')
+        api_client.generic('PROPFIND', '/api/health/')
+        assert sample('http_requests_total', view='health', method='other', status='405') == before + 1
+
+    def test_server_timing_can_be_disabled(self, instrumented, api_client, settings):
+        settings.MONITORING_SERVER_TIMING = False
+        response = api_client.get('/api/health/')
+        assert 'Server-Timing' not in response
+
+    def test_disabled_by_default(self, api_client):
+        response = api_client.get('/api/health/')
+        assert 'Server-Timing' not in response
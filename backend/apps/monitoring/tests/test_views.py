@@ -0,0 +1,46 @@
+import pytest
+from django.test import Client
+from rest_framework import status
+from tests.factories import BotFactory
+
+
+@pytest.mark.django_db
+class TestMetricsView:
+    url = '/api/metrics/'
+
+    def test_requires_token_or_admin(self, client):
+        response = client.get(self.url)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_token(self, client, settings):
+        settings.METRICS_TOKEN = 'scrape-token'
+        response = client.get(self.url, HTTP_AUTHORIZATION='Bearer wrong')
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+        response = client.get(self.url, HTTP_AUTHORIZATION='Bearer scrape-token')
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'].startswith('text/plain')
+        assert b'# TYPE http_request_duration_seconds histogram' in response.content
+
+    def test_bot_and_database_metrics(self, client, settings, user):
+        settings.METRICS_TOKEN = 'scrape-token'
+        BotFactory(master=user, bot_id='123456', api_key='valid-api-key', status='online')
+        response = client.get(self.url, HTTP_AUTHORIZATION='Bearer scrape-token')
+        content = response.content.decode()
+        assert 'bots{status="online"} 1.0' in content
+        assert 'bots{status="offline"} 0.0' in content
+        assert 'db_up 1.0' in content
+        assert 'db_max_connections ' in content
+        assert 'db_connections{state="active"}' in content
+
+    def test_admin_session(self, admin_user):
+        client = Client()
+        client.force_login(admin_user)
+        response = client.get(self.url)
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_regular_user_is_forbidden(self, user):
+        client = Client()
+        client.force_login(user)
+        response = client.get(self.url)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
@@ -0,0 +1,44 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.http import require_GET
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+from .collectors import DATABASE_REGISTRY, process_registry
+from .health import readiness_probe
+
+
+def _authorized(request):
+    token = settings.METRICS_TOKEN
+    if token:
+        expected = f'Bearer {token}'
+        if hmac.compare_digest(request.headers.get('Authorization', ''), expected):
+            return True
+    # 未配置令牌时只允许已登录后台的管理员查看
+    return request.user.is_authenticated and request.user.is_staff
+
+
+@require_GET
+def metrics(request):
+    """Prometheus 抓取端点，需 Authorization: Bearer <METRICS_TOKEN> 或管理员登录"""
+    if not _authorized(request):
+        return HttpResponse('Forbidden', status=403, content_type='text/plain')
+    output = generate_latest(process_registry()) + generate_latest(DATABASE_REGISTRY)
+    return HttpResponse(output, content_type=CONTENT_TYPE_LATEST)
+
+
+@require_GET
+def readiness(request):
+    """就绪检查：数据库可在 HEALTH_READY_TIMEOUT 秒内完成查询时返回 200，否则返回 503"""
+    result = readiness_probe.check()
+    response = JsonResponse({
+        'status': 'ok' if result.ready else 'unavailable',
+        'database': {
+            'ready': result.ready,
+            'latency_ms': None if result.latency is None else round(result.latency * 1000, 2),
+            'checked_ago': round(result.age(), 3),
+        },
+    }, status=200 if result.ready else 503)
+    response['Cache-Control'] = 'no-store'
+    return response
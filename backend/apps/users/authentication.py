@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from rest_framework import exceptions
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+from .tokens import TOKEN_VERSION_CLAIM, token_state
+
+
+class UserJWTAuthentication(JWTAuthentication):
+    """
+    JWT 认证，并校验令牌的 ver 声明与用户当前的 token_version 一致
+
+    JWT_TOKEN_USER=True 时不查询用户行：request.user 只带 id / token_version / is_active，
+    只用到 request.user.pk 的接口（我的机器人、绑定、修改等）不再访问数据库，
+    访问其他字段（如 /api/auth/me/ 序列化）时一次查询加载完整用户。
+    """
+
+    def get_user(self, validated_token):
+        if not settings.JWT_TOKEN_USER:
+            user = super().get_user(validated_token)
+        else:
+            user = self._token_user(validated_token)
+        # 启用 ver 声明之前签发的令牌按版本 0 处理
+        if validated_token.get(TOKEN_VERSION_CLAIM, 0) != user.token_version:
+            raise exceptions.AuthenticationFailed('令牌已失效，请重新登录', code='token_revoked')
+        return user
+
+    def _token_user(self, validated_token):
+        try:
+            user_id = User._meta.pk.to_python(validated_token[api_settings.USER_ID_CLAIM])
+        except (KeyError, ValidationError):
+            raise InvalidToken('令牌中没有可识别的用户')
+        state = token_state(user_id)
+        if state is None:
+            raise exceptions.AuthenticationFailed('用户不存在', code='user_not_found')
+        # 只有 id / token_version / is_active 已知，其余字段在首次访问时一次加载
+        known = {'id': user_id, 'token_version': state[0], 'is_active': state[1]}
+        fields = [f.attname for f in User._meta.concrete_fields if f.attname in known]
+        user = User.from_db(User.objects.db, fields, [known[name] for name in fields])
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed('用户已停用', code='user_inactive')
+        user._from_token = True
+        return user
@@ -0,0 +1,38 @@
+import re
+
+from django.contrib.auth.backends import ModelBackend
+
+from .metrics import PASSWORD_REHASHED
+from .models import User
+
+EMAIL_RE = re.compile(r'^[^@]+@[^@]+\.[^@]+$')
+
+
+def identifier_filter(identifier):
+    """邮箱或用户名（不区分大小写）的查询条件，由 users_user_*_upper_idx 函数索引支持"""
+    if EMAIL_RE.match(identifier):
+        return {'email__iexact': identifier}
+    return {'username__iexact': identifier}
+
+
+class EmailOrUsernameBackend(ModelBackend):
+    """用邮箱或用户名登录：一条查询取出用户并校验密码，不再按 email 重复查询"""
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        identifier = username if username is not None else kwargs.get(User.USERNAME_FIELD)
+        if identifier is None or password is None:
+            return None
+        user = User.objects.filter(**identifier_filter(identifier.strip())).first()
+        if user is None:
+            # 用户不存在时同样计算一次哈希，避免按响应时间判断账号是否存在
+            User().set_password(password)
+            return None
+        stored = user.password
+        # 哈希算法或参数与当前配置不同时，check_password 校验通过后会按新配置重新哈希并保存
+        if not user.check_password(password):
+            return None
+        if user.password != stored:
+            PASSWORD_REHASHED.inc()
+        if self.user_can_authenticate(user):
+            return user
+        return None
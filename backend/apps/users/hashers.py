@@ -0,0 +1,49 @@
+"""
+参数可配置的密码哈希器，由 PASSWORD_HASHER_PROFILE 选择首选算法（见 settings）
+
+参数在使用时从 settings 读取。修改算法或参数后，已存储的哈希在用户下次登录成功时
+按新配置重新计算并保存（Django check_password 的 must_update 机制）。
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher, PBKDF2PasswordHasher, ScryptPasswordHasher,
+)
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERATIONS
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    @property
+    def work_factor(self):
+        return settings.PASSWORD_SCRYPT_WORK_FACTOR
+
+    @property
+    def block_size(self):
+        return settings.PASSWORD_SCRYPT_BLOCK_SIZE
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_SCRYPT_PARALLELISM
+
+    @property
+    def maxmem(self):
+        # 单次哈希约占 128 * N * r 字节，OpenSSL 默认上限 32MiB，N 较大时需放宽
+        return 256 * self.work_factor * self.block_size
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    @property
+    def time_cost(self):
+        return settings.PASSWORD_ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.PASSWORD_ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_ARGON2_PARALLELISM
@@ -0,0 +1,58 @@
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db.models import F, Value
+from django.db.models.functions import Concat
+from apps.users.models import User
+
+
+def placeholder_users():
+    """机器人注册自动开通、从未登录且仍持有可用密码的 qq_<主人QQ> 账号"""
+    return User.objects.annotate(
+        placeholder_email=Concat('username', Value('@example.com'))
+    ).filter(
+        username__regex=r'^qq_[0-9]+$',
+        email=F('placeholder_email'),
+        last_login__isnull=True,
+    ).exclude(password__startswith='!')
+
+
+class Command(BaseCommand):
+    help = '将机器人注册自动开通的占位账号改为不可用密码'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='每批更新的账号数 (默认: 1000)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='只统计数量，不修改数据'
+        )
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            count = placeholder_users().count()
+            self.stdout.write(f'共有 {count} 个占位账号待转换')
+            return
+
+        converted = 0
+        last_pk = None
+        while True:
+            batch = placeholder_users().order_by('pk')
+            if last_pk is not None:
+                batch = batch.filter(pk__gt=last_pk)
+            pks = list(batch.values_list('pk', flat=True)[:options['batch_size']])
+            if not pks:
+                break
+
+            users = [User(pk=pk, password=make_password(None)) for pk in pks]
+            User.objects.bulk_update(users, ['password'])
+            converted += len(users)
+            last_pk = pks[-1]
+
+        self.stdout.write(
+            self.style.SUCCESS(f'已将 {converted} 个占位账号改为不可用密码')
+        )
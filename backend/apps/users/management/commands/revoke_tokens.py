@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.users.backends import identifier_filter
+from apps.users.models import User
+from apps.users.tokens import revoke_tokens
+
+
+class Command(BaseCommand):
+    help = '吊销用户已签发的全部 JWT（递增 token_version），可同时停用账号'
+
+    def add_arguments(self, parser):
+        parser.add_argument('identifiers', nargs='+', help='用户邮箱或用户名')
+        parser.add_argument('--deactivate', action='store_true', help='同时停用账号')
+
+    def handle(self, *args, **options):
+        for identifier in options['identifiers']:
+            user = User.objects.filter(**identifier_filter(identifier)).first()
+            if user is None:
+                raise CommandError(f'用户不存在: {identifier}')
+            if options['deactivate']:
+                user.is_active = False
+                user.save(update_fields=['is_active'])
+            revoke_tokens(user)
+            self.stdout.write(self.style.SUCCESS(
+                f'已吊销 {user.username} 的令牌（token_version={user.token_version}）'
+            ))
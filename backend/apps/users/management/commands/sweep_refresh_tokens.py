@@ -0,0 +1,25 @@
+from apps.common.commands import PeriodicCommand
+from apps.users.tokens import sweep_expired_families
+
+
+class Command(PeriodicCommand):
+    help = '删除已过期的刷新令牌家族'
+    action = '清理'
+    default_interval = 3600
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='每条 DELETE 最多删除的行数 (默认: 1000)'
+        )
+        super().add_arguments(parser)
+
+    def run_once(self, **options):
+        self.report(*sweep_expired_families(options['batch_size']))
+
+    def report(self, deleted, duration):
+        self.stdout.write(
+            self.style.SUCCESS(f'已删除 {deleted} 个过期的刷新令牌家族') + f' (耗时 {duration * 1000:.1f}ms)'
+        )
@@ -0,0 +1,30 @@
+"""
+登录指标（Prometheus 格式），由 GET /api/metrics/ 导出
+"""
+from prometheus_client import Counter, Histogram
+
+LOGIN_ATTEMPTS = Counter(
+    'login_attempts_total', '登录请求数',
+    ['outcome'],  # success / failure / throttled / locked / busy
+)
+PASSWORD_CHECK_DURATION = Histogram(
+    'login_password_check_seconds', '登录时查找用户并校验密码的耗时',
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+
+PASSWORD_REHASHED = Counter(
+    'login_password_rehash_total', '登录成功时按当前 PASSWORD_HASHER_PROFILE 重新计算并保存的密码哈希数',
+)
+
+REFRESH_TOKENS = Counter(
+    'refresh_token_rotations_total', '刷新令牌轮换结果',
+    ['outcome'],  # rotated / reused / expired / legacy
+)
+
+
+def count_login(outcome):
+    LOGIN_ATTEMPTS.labels(outcome).inc()
+
+
+def count_refresh(outcome):
+    REFRESH_TOKENS.labels(outcome).inc()
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.16 on 2026-10-18 13:41
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+    # 并发建索引，避免在登录与注册持续进行时长时间锁表
+    atomic = False
+
+    dependencies = [
+        ('users', '0002_user_manager'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Upper('email'), name='users_user_email_upper_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Upper('username'), name='users_user_username_upper_idx'),
+        ),
+    ]
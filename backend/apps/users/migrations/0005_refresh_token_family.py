@@ -0,0 +1,32 @@
+# Generated by Django 4.2.16 on 2026-10-18 14:02
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_user_token_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RefreshTokenFamily',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('generation', models.PositiveIntegerField(default=0, verbose_name='代数')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('rotated_at', models.DateTimeField(blank=True, null=True)),
+                ('expires_at', models.DateTimeField(verbose_name='过期时间')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='refresh_token_families', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': '刷新令牌家族',
+                'verbose_name_plural': '刷新令牌家族',
+                'indexes': [models.Index(fields=['expires_at'], name='users_rtf_expires_idx')],
+            },
+        ),
+    ]
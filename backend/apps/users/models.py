@@ -1,6 +1,26 @@
 import uuid
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager as DjangoUserManager
 from django.db import models
+from django.db.models.functions import Upper
+
+
+class UserManager(DjangoUserManager):
+    def build_placeholder(self, master_qq):
+        """
+        构造机器人注册时自动开通的 qq_<主人QQ> 占位账号（未保存）
+        占位账号不会用密码登录，使用不可用密码以跳过密码哈希
+        """
+        user = self.model(
+            username=f'qq_{master_qq}',
+            email=f'qq_{master_qq}@example.com',
+        )
+        user.set_unusable_password()
+        return user
+
+    def create_placeholder(self, master_qq):
+        user = self.build_placeholder(master_qq)
+        user.save(using=self._db)
+        return user
 
 
 class User(AbstractUser):
@@ -9,13 +29,50 @@ class User(AbstractUser):
     email = models.EmailField(unique=True, verbose_name='邮箱')
     username = models.CharField(max_length=50, unique=True, verbose_name='用户名')
     avatar = models.URLField(blank=True, verbose_name='头像URL')
+    # 写入 JWT 的 ver 声明，递增后此前签发的令牌全部失效（见 apps.users.tokens.revoke_tokens）
+    token_version = models.PositiveIntegerField(default=0, verbose_name='令牌版本')
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
 
+    objects = UserManager()
+
     class Meta:
         verbose_name = '用户'
         verbose_name_plural = '用户'
+        indexes = [
+            # 登录按 email__iexact / username__iexact 查找，即 UPPER(列) = UPPER(%s)，普通唯一索引无法使用
+            models.Index(Upper('email'), name='users_user_email_upper_idx'),
+            models.Index(Upper('username'), name='users_user_username_upper_idx'),
+        ]
 
     def __str__(self):
         return self.username
+
+    def refresh_from_db(self, using=None, fields=None):
+        # 由令牌声明构造的用户（UserJWTAuthentication）访问未加载的字段时，一次查询加载全部字段
+        if fields is not None and getattr(self, '_from_token', False):
+            fields = self.get_deferred_fields() | set(fields)
+        super().refresh_from_db(using, fields)
+
+
+class RefreshTokenFamily(models.Model):
+    """
+    一次登录签发的刷新令牌家族，每个家族一行，轮换时原地递增 generation
+    刷新令牌带 fam / gen 声明：gen 与当前代数相同才能轮换，更早的代数说明令牌被重复使用，
+    整个家族随即作废（见 apps.users.tokens.rotate_refresh_token）
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='refresh_token_families')
+    generation = models.PositiveIntegerField(default=0, verbose_name='代数')
+    created_at = models.DateTimeField(auto_now_add=True)
+    rotated_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(verbose_name='过期时间')
+
+    class Meta:
+        verbose_name = '刷新令牌家族'
+        verbose_name_plural = '刷新令牌家族'
+        indexes = [
+            # sweep_refresh_tokens 按过期时间分批删除
+            models.Index(fields=['expires_at'], name='users_rtf_expires_idx'),
+        ]
@@ -1,8 +1,13 @@
 from rest_framework import serializers
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
 from django.contrib.auth import authenticate
+from apps.monitoring.serializers import TimedDataMixin
+from .backends import EMAIL_RE
+from .metrics import PASSWORD_CHECK_DURATION, count_login
 from .models import User
-import re
+from .throttling import login_lockout, password_hash_limiter
+from .tokens import UserRefreshToken, rotate_refresh_token
 
 
 class RegisterSerializer(serializers.ModelSerializer):
@@ -29,33 +34,43 @@ class LoginSerializer(serializers.Serializer):
         identifier = data['identifier'].strip()
         password = data['password']
 
-        # 判断是邮箱还是用户名
-        EMAIL_RE = re.compile(r'^[^@]+@[^@]+\.[^@]+$')
-        if EMAIL_RE.match(identifier):
-            # 用邮箱查找用户
-            try:
-                user_obj = User.objects.get(email__iexact=identifier)
-            except User.DoesNotExist:
-                raise serializers.ValidationError('邮箱或密码错误')
-            user = authenticate(username=user_obj.email, password=password)
-        else:
-            # 用用户名查找用户
-            try:
-                user_obj = User.objects.get(username__iexact=identifier)
-            except User.DoesNotExist:
-                raise serializers.ValidationError('用户名或密码错误')
-            user = authenticate(username=user_obj.email, password=password)
-
+        # 锁定期内直接拒绝，不计算密码哈希
+        login_lockout.check(identifier)
+        # EmailOrUsernameBackend 按邮箱或用户名一次查出用户并校验密码
+        with password_hash_limiter.slot(), PASSWORD_CHECK_DURATION.time():
+            user = authenticate(self.context.get('request'), username=identifier, password=password)
         if not user:
-            raise serializers.ValidationError('密码错误')
+            login_lockout.failure(identifier)
+            count_login('failure')
+            if EMAIL_RE.match(identifier):
+                raise serializers.ValidationError('邮箱或密码错误')
+            raise serializers.ValidationError('用户名或密码错误')
+        login_lockout.success(identifier)
+        count_login('success')
         if not user.is_active:
             raise serializers.ValidationError('账号已被禁用')
         data['user'] = user
         return data
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedDataMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ('id', 'email', 'username', 'avatar', 'date_joined')
         read_only_fields = ('id', 'email', 'date_joined')
+
+
+class RotatingTokenRefreshSerializer(TokenRefreshSerializer):
+    """刷新令牌轮换：同一家族只有最新一代可以刷新，重复使用旧令牌时整个家族作废"""
+    token_class = UserRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        data = {'access': str(refresh.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            rotate_refresh_token(refresh)
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+        return data
@@ -0,0 +1,104 @@
+import uuid
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from apps.users.tokens import UserRefreshToken, revoke_tokens
+from tests.factories import BotFactory
+
+
+def bearer(api_client, user, token_class=UserRefreshToken):
+    api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token_class.for_user(user).access_token}')
+    return api_client
+
+
+def user_queries(ctx):
+    return [q['sql'] for q in ctx.captured_queries if '"users_user"' in q['sql']]
+
+
+@pytest.fixture(params=[False, True], ids=['full_user', 'token_user'])
+def jwt_mode(request, settings):
+    settings.JWT_TOKEN_USER = request.param
+    return request.param
+
+
+@pytest.mark.django_db
+class TestUserJWTAuthentication:
+    def test_login_token_carries_version(self, api_client, user):
+        response = api_client.post(
+            reverse('login'), {'identifier': user.email, 'password': 'TestPass123'}, format='json',
+        )
+        assert AccessToken(response.data['access'])['ver'] == 0
+        assert RefreshToken(response.data['refresh'])['ver'] == 0
+
+    def test_me(self, api_client, user, jwt_mode):
+        response = bearer(api_client, user).get(reverse('me'))
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['email'] == user.email
+
+    def test_token_user_skips_user_row(self, api_client, user, settings):
+        settings.JWT_TOKEN_USER = True
+        BotFactory(master=user, bot_id='jwt_bot')
+        client = bearer(api_client, user)
+        assert client.get(reverse('bot-my-list')).status_code == status.HTTP_200_OK
+        # 令牌状态已缓存，之后的请求不再查询用户表
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(reverse('bot-my-list'))
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['count'] == 1
+        assert user_queries(ctx) == []
+
+    def test_token_user_loads_remaining_fields_once(self, api_client, user, settings):
+        settings.JWT_TOKEN_USER = True
+        client = bearer(api_client, user)
+        client.get(reverse('me'))
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(reverse('me'))
+        assert response.data['username'] == user.username
+        assert len(user_queries(ctx)) == 1
+
+    def test_token_user_pk_matches_model_pk(self, api_client, user, settings):
+        settings.JWT_TOKEN_USER = True
+        bot = BotFactory(master=user, bot_id='bound_bot')
+        # 绑定接口比较 bot.master_id == request.user.pk，令牌中的字符串 id 需转换为 UUID
+        response = bearer(api_client, user).post(reverse('bot-bind'), {'bot_id': bot.bot_id}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data['detail'] == '你已经绑定了这个机器人'
+
+    def test_revoked_token_rejected(self, api_client, user, jwt_mode):
+        client = bearer(api_client, user)
+        assert client.get(reverse('me')).status_code == status.HTTP_200_OK
+        revoke_tokens(user)
+        response = client.get(reverse('me'))
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response.data['detail'].code == 'token_revoked'
+        assert bearer(api_client, user).get(reverse('me')).status_code == status.HTTP_200_OK
+
+    def test_token_without_version_claim(self, api_client, user, jwt_mode):
+        client = bearer(api_client, user, token_class=RefreshToken)
+        assert client.get(reverse('me')).status_code == status.HTTP_200_OK
+        revoke_tokens(user)
+        assert client.get(reverse('me')).status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_deactivated_user_rejected(self, api_client, user, jwt_mode):
+        client = bearer(api_client, user)
+        assert client.get(reverse('me')).status_code == status.HTTP_200_OK
+        call_command('revoke_tokens', user.username, '--deactivate')
+        assert client.get(reverse('me')).status_code == status.HTTP_401_UNAUTHORIZED
+        user.refresh_from_db()
+        assert not user.is_active
+        assert user.token_version == 1
+
+    def test_unknown_user_rejected(self, api_client, settings):
+        settings.JWT_TOKEN_USER = True
+        token = AccessToken()
+        token['user_id'] = str(uuid.uuid4())
+        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        response = api_client.get(reverse('me'))
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response.data['detail'].code == 'user_not_found'
@@ -0,0 +1,39 @@
+import pytest
+from django.contrib.auth import authenticate
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.users.models import User
+
+
+@pytest.mark.django_db
+class TestEmailOrUsernameBackend:
+    def test_email_case_insensitive(self, user):
+        assert authenticate(username='TEST@Example.com', password='TestPass123') == user
+
+    def test_username_case_insensitive(self, user):
+        assert authenticate(username='TestUser', password='TestPass123') == user
+
+    def test_single_query(self, user):
+        with CaptureQueriesContext(connection) as ctx:
+            assert authenticate(username='testuser', password='TestPass123') == user
+        assert len(ctx.captured_queries) == 1
+        assert 'UPPER("users_user"."username"::text)' in ctx.captured_queries[0]['sql']
+
+    def test_rejects_wrong_password_and_unknown_user(self, user):
+        assert authenticate(username='testuser', password='wrong') is None
+        assert authenticate(username='nobody', password='TestPass123') is None
+        assert authenticate(username='nobody@example.com', password='TestPass123') is None
+
+    def test_rejects_inactive_user(self, user):
+        User.objects.filter(pk=user.pk).update(is_active=False)
+        assert authenticate(username='testuser', password='TestPass123') is None
+
+    def test_upper_indexes_exist(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT indexname FROM pg_indexes WHERE tablename = 'users_user' AND indexname LIKE %s",
+                ['%_upper_idx'],
+            )
+            names = {row[0] for row in cursor.fetchall()}
+        assert names == {'users_user_email_upper_idx', 'users_user_username_upper_idx'}
@@ -0,0 +1,41 @@
+import pytest
+from io import StringIO
+from django.core.management import call_command
+from django.utils import timezone
+from apps.users.models import User
+
+
+@pytest.mark.django_db
+class TestConvertPlaceholderUsers:
+    def _create_legacy_placeholder(self, master_qq):
+        return User.objects.create_user(
+            username=f'qq_{master_qq}',
+            email=f'qq_{master_qq}@example.com',
+            password='legacy-random-password'
+        )
+
+    def test_converts_legacy_placeholders(self):
+        for master_qq in ('1001', '1002', '1003'):
+            self._create_legacy_placeholder(master_qq)
+        call_command('convert_placeholder_users', batch_size=2, stdout=StringIO())
+        assert not any(u.has_usable_password() for u in User.objects.all())
+
+    def test_keeps_real_accounts(self, user):
+        logged_in = self._create_legacy_placeholder('1001')
+        logged_in.last_login = timezone.now()
+        logged_in.save()
+        renamed = self._create_legacy_placeholder('1002')
+        renamed.email = 'real@example.com'
+        renamed.save()
+
+        call_command('convert_placeholder_users', stdout=StringIO())
+        for account in (user, logged_in, renamed):
+            account.refresh_from_db()
+            assert account.has_usable_password()
+
+    def test_dry_run(self):
+        self._create_legacy_placeholder('1001')
+        out = StringIO()
+        call_command('convert_placeholder_users', dry_run=True, stdout=out)
+        assert '1' in out.getvalue()
+        assert User.objects.get(username='qq_1001').has_usable_password()
@@ -0,0 +1,95 @@
+import pytest
+from django.conf import settings as django_settings
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import identify_hasher
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.users.metrics import PASSWORD_REHASHED
+from apps.users.models import User
+
+PASSWORD = 'TestPass123'
+
+
+@pytest.fixture
+def cheap_hashers(settings):
+    settings.PASSWORD_PBKDF2_ITERATIONS = 1000
+    settings.PASSWORD_SCRYPT_WORK_FACTOR = 2 ** 10
+    settings.PASSWORD_ARGON2_TIME_COST = 1
+    settings.PASSWORD_ARGON2_MEMORY_COST = 1024
+    return settings
+
+
+def use_profile(settings, profile):
+    hashers = django_settings.PASSWORD_HASHER_PROFILES
+    settings.PASSWORD_HASHERS = [hashers[profile]] + [
+        hasher for name, hasher in hashers.items() if name != profile
+    ]
+
+
+def make_user():
+    return User.objects.create_user(username='hashuser', email='hash@example.com', password=PASSWORD)
+
+
+def stored_password(user):
+    return User.objects.values_list('password', flat=True).get(pk=user.pk)
+
+
+def rehash_count():
+    return PASSWORD_REHASHED._value.get()
+
+
+def test_default_profile_is_first_hasher():
+    profile = django_settings.PASSWORD_HASHER_PROFILE
+    assert django_settings.PASSWORD_HASHERS[0] == django_settings.PASSWORD_HASHER_PROFILES[profile]
+    assert 'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher' in django_settings.PASSWORD_HASHERS
+
+
+@pytest.mark.django_db
+class TestRehashOnLogin:
+    @pytest.mark.parametrize('profile', ['scrypt', 'argon2'])
+    def test_profile_change_upgrades_on_login(self, cheap_hashers, profile):
+        use_profile(cheap_hashers, 'pbkdf2')
+        user = make_user()
+        assert stored_password(user).startswith('pbkdf2_sha256$1000$')
+
+        use_profile(cheap_hashers, profile)
+        before = rehash_count()
+        assert authenticate(username='hashuser', password=PASSWORD) == user
+        assert identify_hasher(stored_password(user)).algorithm == profile
+        assert rehash_count() == before + 1
+        # 新哈希可以继续登录
+        assert authenticate(username='hash@example.com', password=PASSWORD) == user
+
+    def test_iteration_change_upgrades_on_login(self, cheap_hashers):
+        use_profile(cheap_hashers, 'pbkdf2')
+        user = make_user()
+        cheap_hashers.PASSWORD_PBKDF2_ITERATIONS = 2000
+        assert authenticate(username='hashuser', password=PASSWORD) == user
+        assert stored_password(user).startswith('pbkdf2_sha256$2000$')
+
+    def test_argon2_memory_change_upgrades_on_login(self, cheap_hashers):
+        use_profile(cheap_hashers, 'argon2')
+        user = make_user()
+        cheap_hashers.PASSWORD_ARGON2_MEMORY_COST = 2048
+        assert authenticate(username='hashuser', password=PASSWORD) == user
+        assert '$m=2048,t=1,p=1$' in stored_password(user)
+
+    def test_unchanged_profile_does_not_write(self, cheap_hashers):
+        use_profile(cheap_hashers, 'scrypt')
+        user = make_user()
+        password = stored_password(user)
+        before = rehash_count()
+        with CaptureQueriesContext(connection) as ctx:
+            assert authenticate(username='hashuser', password=PASSWORD) == user
+        assert len(ctx.captured_queries) == 1
+        assert stored_password(user) == password
+        assert rehash_count() == before
+
+    def test_wrong_password_does_not_upgrade(self, cheap_hashers):
+        use_profile(cheap_hashers, 'pbkdf2')
+        user = make_user()
+        password = stored_password(user)
+        use_profile(cheap_hashers, 'argon2')
+        assert authenticate(username='hashuser', password='wrong') is None
+        assert stored_password(user) == password
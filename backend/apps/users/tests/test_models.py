@@ -64,3 +64,10 @@ class TestUserModel:
             password='testpass123'
         )
         assert user.avatar == ''
+
+    def test_create_placeholder(self):
+        user = User.objects.create_placeholder('987654')
+        assert user.username == 'qq_987654'
+        assert user.email == 'qq_987654@example.com'
+        assert not user.has_usable_password()
+        assert not user.check_password('')
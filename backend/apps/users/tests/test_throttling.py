@@ -0,0 +1,106 @@
+import threading
+import time
+from unittest import mock
+
+import pytest
+from django.urls import reverse
+from prometheus_client import REGISTRY
+from rest_framework import status
+
+from apps.common.throttling import limits_cache
+from apps.users.throttling import LoginLocked, login_lockout, password_hash_limiter
+
+
+def login_attempts(outcome):
+    return REGISTRY.get_sample_value('login_attempts_total', {'outcome': outcome}) or 0
+
+
+@pytest.mark.django_db
+class TestLoginThrottling:
+    @pytest.fixture(autouse=True)
+    def lockout_settings(self, settings):
+        settings.LOGIN_FAILURE_LIMIT = 3
+        settings.LOGIN_FAILURE_WINDOW = 900
+        settings.LOGIN_LOCKOUT_BASE = 60
+        settings.LOGIN_LOCKOUT_MAX = 3600
+
+    def _login(self, api_client, identifier='testuser', password='wrongpassword'):
+        return api_client.post(
+            reverse('login'), {'identifier': identifier, 'password': password}, format='json'
+        )
+
+    def test_lockout_rejects_before_password_check(self, api_client, user):
+        for _ in range(3):
+            assert self._login(api_client).status_code == status.HTTP_401_UNAUTHORIZED
+        locked = login_attempts('locked')
+
+        # 锁定期内正确的密码也被拒绝，且不再校验密码；标识不区分大小写
+        with mock.patch('apps.users.serializers.authenticate') as authenticate:
+            response = self._login(api_client, 'TestUser', 'TestPass123')
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert response['Retry-After'] == '60'
+        authenticate.assert_not_called()
+        assert login_attempts('locked') == locked + 1
+
+        # 其他账号不受影响
+        assert self._login(api_client, 'nobody').status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_lockout_doubles(self, api_client, user):
+        now = time.time()
+        with mock.patch('apps.users.throttling.time.time', return_value=now):
+            for _ in range(3):
+                self._login(api_client)
+        with mock.patch('apps.users.throttling.time.time', return_value=now + 61):
+            for _ in range(3):
+                assert self._login(api_client).status_code == status.HTTP_401_UNAUTHORIZED
+            response = self._login(api_client)
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert response['Retry-After'] == '120'
+
+    def test_success_resets_failures(self, api_client, user):
+        for _ in range(2):
+            self._login(api_client)
+        assert self._login(api_client, password='TestPass123').status_code == status.HTTP_200_OK
+        for _ in range(2):
+            assert self._login(api_client).status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_concurrent_failures_are_all_counted(self):
+        # 20 个线程同时记录失败，每满 3 次锁定一次，不因读改写相互覆盖而丢失
+        barrier = threading.Barrier(20)
+
+        def fail():
+            barrier.wait()
+            login_lockout.failure('testuser')
+
+        threads = [threading.Thread(target=fail) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert limits_cache.get(f'{login_lockout.key("testuser")}:level') == 6
+        with pytest.raises(LoginLocked):
+            login_lockout.check('TESTUSER')
+
+    def test_ip_sliding_window(self, api_client, user, settings):
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_THROTTLE_RATES': {**settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], 'login_ip': '2/min'},
+        }
+        throttled = login_attempts('throttled')
+        for identifier in ('a', 'b'):
+            assert self._login(api_client, identifier).status_code == status.HTTP_401_UNAUTHORIZED
+        with mock.patch('apps.users.serializers.authenticate') as authenticate:
+            response = self._login(api_client, 'c')
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert 'Retry-After' in response
+        authenticate.assert_not_called()
+        assert login_attempts('throttled') == throttled + 1
+
+    def test_concurrent_hashing_is_bounded(self, api_client, user, settings):
+        settings.LOGIN_HASH_CONCURRENCY = 1
+        settings.LOGIN_HASH_WAIT = 0.01
+        with password_hash_limiter.slot():
+            response = self._login(api_client, password='TestPass123')
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response['Retry-After'] == '1'
+        assert self._login(api_client, password='TestPass123').status_code == status.HTTP_200_OK
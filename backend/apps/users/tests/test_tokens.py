@@ -0,0 +1,114 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from apps.users.models import RefreshTokenFamily
+from apps.users.tokens import UserRefreshToken, revoke_tokens, sweep_expired_families
+
+
+def refresh(api_client, token):
+    return api_client.post(reverse('token_refresh'), {'refresh': str(token)}, format='json')
+
+
+@pytest.mark.django_db
+class TestRefreshTokenRotation:
+    def test_rotates_in_place(self, api_client, user):
+        token = UserRefreshToken.for_user(user)
+        family = RefreshTokenFamily.objects.get()
+        assert token['fam'] == family.pk.hex
+        assert token['gen'] == 0
+
+        for generation in range(1, 4):
+            response = refresh(api_client, token)
+            assert response.status_code == status.HTTP_200_OK
+            token = RefreshToken(response.data['refresh'])
+            assert token['gen'] == generation
+        family.refresh_from_db()
+        assert family.generation == 3
+        assert family.rotated_at is not None
+        # 轮换只更新家族的一行，不为用过的令牌新增记录
+        assert RefreshTokenFamily.objects.count() == 1
+
+    def test_single_update_per_refresh(self, api_client, user):
+        token = UserRefreshToken.for_user(user)
+        with CaptureQueriesContext(connection) as ctx:
+            assert refresh(api_client, token).status_code == status.HTTP_200_OK
+        assert [q['sql'].split()[0] for q in ctx.captured_queries] == ['UPDATE']
+
+    def test_access_token_omits_family_claims(self, api_client, user):
+        response = refresh(api_client, UserRefreshToken.for_user(user))
+        access = AccessToken(response.data['access'])
+        assert 'fam' not in access and 'gen' not in access
+        assert access['ver'] == 0
+
+    def test_reuse_revokes_family(self, api_client, user):
+        first = UserRefreshToken.for_user(user)
+        latest = refresh(api_client, first).data['refresh']
+        other_session = UserRefreshToken.for_user(user)
+
+        response = refresh(api_client, first)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response.data['code'] == 'token_reused'
+        # 被盗用与合法持有的令牌属于同一家族，最新一代同样失效
+        response = refresh(api_client, latest)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response.data['code'] == 'token_revoked'
+        # 其他登录会话不受影响
+        assert refresh(api_client, other_session).status_code == status.HTTP_200_OK
+
+    def test_expired_family_rejected(self, api_client, user):
+        token = UserRefreshToken.for_user(user)
+        RefreshTokenFamily.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        assert refresh(api_client, token).status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_revoke_tokens_removes_families(self, api_client, user):
+        token = UserRefreshToken.for_user(user)
+        revoke_tokens(user)
+        assert not RefreshTokenFamily.objects.exists()
+        assert refresh(api_client, token).status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_legacy_token_starts_family(self, api_client, user):
+        response = refresh(api_client, RefreshToken.for_user(user))
+        assert response.status_code == status.HTTP_200_OK
+        token = RefreshToken(response.data['refresh'])
+        assert token['fam'] == RefreshTokenFamily.objects.get(user=user).pk.hex
+        assert token['gen'] == 0
+        assert refresh(api_client, token).status_code == status.HTTP_200_OK
+
+    def test_login_and_register_start_family(self, api_client, user):
+        api_client.post(reverse('login'), {'identifier': user.email, 'password': 'TestPass123'}, format='json')
+        api_client.post(
+            reverse('register'),
+            {'email': 'new@example.com', 'username': 'newuser', 'password': 'password123'},
+            format='json',
+        )
+        assert RefreshTokenFamily.objects.count() == 2
+
+
+@pytest.mark.django_db
+class TestSweepRefreshTokens:
+    def test_deletes_only_expired(self, user):
+        for _ in range(5):
+            UserRefreshToken.for_user(user)
+        expired = list(RefreshTokenFamily.objects.values_list('pk', flat=True)[:3])
+        RefreshTokenFamily.objects.filter(pk__in=expired).update(expires_at=timezone.now() - timedelta(hours=1))
+
+        deleted, _ = sweep_expired_families(batch_size=2)
+        assert deleted == 3
+        assert RefreshTokenFamily.objects.count() == 2
+        assert not RefreshTokenFamily.objects.filter(pk__in=expired).exists()
+
+    def test_command(self, user):
+        UserRefreshToken.for_user(user)
+        RefreshTokenFamily.objects.update(expires_at=timezone.now() - timedelta(hours=1))
+        out = StringIO()
+        call_command('sweep_refresh_tokens', stdout=out)
+        assert '已删除 1 个过期的刷新令牌家族' in out.getvalue()
@@ -0,0 +1,137 @@
+"""
+登录防暴力破解
+
+在计算密码哈希之前依次检查：
+1. 客户端地址的滑动窗口限流（LoginIpThrottle，DRF 限流，REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']['login_ip']）；
+2. 登录标识（邮箱或用户名）是否处于锁定期：同一 LOGIN_FAILURE_WINDOW 秒窗口内失败 LOGIN_FAILURE_LIMIT 次后锁定，
+   锁定时长从 LOGIN_LOCKOUT_BASE 秒起每次翻倍，最长 LOGIN_LOCKOUT_MAX 秒，登录成功后清零；
+3. 本 worker 同时校验密码的线程数不超过 LOGIN_HASH_CONCURRENCY，等待 LOGIN_HASH_WAIT 秒仍无空位时返回 503。
+   不存在的用户同样要计算一次哈希，受同一上限约束，受攻击时登录占用的 CPU 有固定上限。
+
+限流与失败记录保存在独立的 limits 缓存中，只在其为 redis 后端时跨 worker 共享。
+失败次数与锁定次数都是缓存中的计数器（add + incr），并发的失败登录不会相互覆盖。
+"""
+import hashlib
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from rest_framework import exceptions, status
+
+from apps.common.throttling import SettingsRateThrottle, limits_cache
+
+from .metrics import count_login
+
+
+class LoginRejected(exceptions.APIException):
+    """在校验密码之前拒绝的登录，wait 秒写入 Retry-After 响应头"""
+
+    def __init__(self, wait):
+        super().__init__()
+        self.wait = math.ceil(wait)
+
+
+class LoginLocked(LoginRejected):
+    status_code = status.HTTP_429_TOO_MANY_REQUESTS
+    default_detail = '登录失败次数过多，请稍后重试'
+    default_code = 'login_locked'
+
+
+class LoginBusy(LoginRejected):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = '登录请求过多，请稍后重试'
+    default_code = 'login_busy'
+
+
+class LoginIpThrottle(SettingsRateThrottle):
+    """按客户端地址的滑动窗口限流，成功与失败的登录都计入"""
+    scope = 'login_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+    def throttle_failure(self):
+        count_login('throttled')
+        return False
+
+
+class LoginLockout:
+    """
+    按登录标识记录失败次数与锁定期：
+    key 保存解锁时间，key:failures:<窗口序号> 为当前窗口的失败次数，key:level 为已锁定的次数
+    """
+
+    def key(self, identifier):
+        digest = hashlib.sha256(identifier.strip().lower().encode()).hexdigest()[:32]
+        return f'login:lockout:{digest}'
+
+    def _incr(self, key, timeout):
+        limits_cache.add(key, 0, timeout)
+        try:
+            return limits_cache.incr(key)
+        except ValueError:
+            # add 与 incr 之间恰好过期
+            limits_cache.add(key, 0, timeout)
+            return limits_cache.incr(key)
+
+    def check(self, identifier):
+        """处于锁定期时抛出 LoginLocked"""
+        until = limits_cache.get(self.key(identifier))
+        if until is None:
+            return
+        wait = until - time.time()
+        if wait > 0:
+            count_login('locked')
+            raise LoginLocked(wait)
+
+    def failure(self, identifier):
+        key = self.key(identifier)
+        now = time.time()
+        window = settings.LOGIN_FAILURE_WINDOW
+        failures = self._incr(f'{key}:failures:{int(now // window)}', window)
+        # 每满 LIMIT 次锁定一次，并发请求中只有计数恰好到达的那一个执行锁定
+        if failures % settings.LOGIN_FAILURE_LIMIT:
+            return
+        # 锁定次数保留到锁定的最长时间之后，期间再次锁定时长继续翻倍
+        level = self._incr(f'{key}:level', window + settings.LOGIN_LOCKOUT_MAX)
+        duration = min(settings.LOGIN_LOCKOUT_BASE * 2 ** (level - 1), settings.LOGIN_LOCKOUT_MAX)
+        limits_cache.set(key, now + duration, duration)
+
+    def success(self, identifier):
+        key = self.key(identifier)
+        window = settings.LOGIN_FAILURE_WINDOW
+        limits_cache.delete_many([key, f'{key}:level', f'{key}:failures:{int(time.time() // window)}'])
+
+
+class PasswordHashLimiter:
+    """每个 worker 同时校验密码的线程数上限"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._semaphore = None
+        self._size = None
+
+    def _get_semaphore(self):
+        size = settings.LOGIN_HASH_CONCURRENCY
+        with self._lock:
+            if self._size != size:
+                self._semaphore = threading.BoundedSemaphore(size)
+                self._size = size
+            return self._semaphore
+
+    @contextmanager
+    def slot(self):
+        semaphore = self._get_semaphore()
+        if not semaphore.acquire(timeout=settings.LOGIN_HASH_WAIT):
+            count_login('busy')
+            raise LoginBusy(wait=1)
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+
+login_lockout = LoginLockout()
+password_hash_limiter = PasswordHashLimiter()
@@ -0,0 +1,129 @@
+"""
+JWT 令牌版本与刷新令牌轮换
+
+签发的令牌带 ver 声明（User.token_version），UserJWTAuthentication 校验其与用户当前版本一致，
+revoke_tokens 递增版本即可使此前签发的全部令牌失效。
+
+JWT_TOKEN_USER 模式下用户的 (token_version, is_active) 缓存在 Django 缓存中，
+最长 JWT_TOKEN_STATE_CACHE_TTL 秒：本进程（locmem）或共享缓存（file / redis）中的吊销立即生效，
+locmem 后端下其他 worker 最迟在 TTL 后生效。
+
+刷新令牌另带 fam / gen 声明，对应 RefreshTokenFamily 的一行。每次刷新用一条带 generation 条件的
+UPDATE 原地轮换，不逐个记录用过的令牌，表的行数等于未过期的登录会话数；
+过期的家族由 sweep_refresh_tokens 按 expires_at 分批删除。
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .metrics import count_refresh
+from .models import RefreshTokenFamily, User
+
+TOKEN_VERSION_CLAIM = 'ver'
+FAMILY_CLAIM = 'fam'
+GENERATION_CLAIM = 'gen'
+
+
+class UserRefreshToken(RefreshToken):
+    """带 ver / fam / gen 声明的刷新令牌，由其生成的访问令牌只带 ver"""
+    no_copy_claims = RefreshToken.no_copy_claims + (FAMILY_CLAIM, GENERATION_CLAIM)
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token[TOKEN_VERSION_CLAIM] = user.token_version
+        start_family(token, user.pk)
+        return token
+
+
+def start_family(token, user_id):
+    family = RefreshTokenFamily.objects.create(
+        user_id=user_id, expires_at=timezone.now() + api_settings.REFRESH_TOKEN_LIFETIME,
+    )
+    token[FAMILY_CLAIM] = family.pk.hex
+    token[GENERATION_CLAIM] = 0
+
+
+def rotate_refresh_token(token):
+    """
+    将刷新令牌轮换为同一家族的下一代（原地修改 token，调用方随后重设 jti / exp / iat）
+    令牌的代数落后于家族当前代数时视为重复使用，作废整个家族
+    """
+    if FAMILY_CLAIM not in token:
+        # 启用家族之前签发的刷新令牌：开启新家族，此后按家族轮换
+        user_id = token[api_settings.USER_ID_CLAIM]
+        if not User.objects.filter(pk=user_id, is_active=True).exists():
+            raise InvalidToken('用户不存在或已停用', code='user_not_found')
+        start_family(token, user_id)
+        count_refresh('legacy')
+        return
+    family_id, generation = token[FAMILY_CLAIM], token[GENERATION_CLAIM]
+    now = timezone.now()
+    rotated = RefreshTokenFamily.objects.filter(
+        pk=family_id, generation=generation, expires_at__gt=now,
+    ).update(
+        generation=F('generation') + 1, rotated_at=now,
+        expires_at=now + api_settings.REFRESH_TOKEN_LIFETIME,
+    )
+    if rotated:
+        token[GENERATION_CLAIM] = generation + 1
+        count_refresh('rotated')
+        return
+    reused, _ = RefreshTokenFamily.objects.filter(pk=family_id, generation__gt=generation).delete()
+    if reused:
+        count_refresh('reused')
+        raise InvalidToken('刷新令牌已被使用，请重新登录', code='token_reused')
+    count_refresh('expired')
+    raise InvalidToken('登录会话已失效，请重新登录', code='token_revoked')
+
+
+def sweep_expired_families(batch_size=1000):
+    """分批删除已过期的刷新令牌家族，返回 (删除行数, 耗时秒数)"""
+    start = time.perf_counter()
+    expired = RefreshTokenFamily.objects.filter(expires_at__lte=timezone.now())
+    deleted = 0
+    while True:
+        pks = list(expired.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            break
+        deleted += RefreshTokenFamily.objects.filter(pk__in=pks).delete()[0]
+        if len(pks) < batch_size:
+            break
+    return deleted, time.perf_counter() - start
+
+
+def _state_key(user_id):
+    return f'users:token_state:{user_id}'
+
+
+def token_state(user_id):
+    """用户的 (token_version, is_active)，优先读缓存；用户不存在时返回 None"""
+    key = _state_key(user_id)
+    state = cache.get(key)
+    if state is None:
+        state = User.objects.filter(pk=user_id).values_list('token_version', 'is_active').first()
+        if state is None:
+            return None
+        ttl = settings.JWT_TOKEN_STATE_CACHE_TTL
+        if ttl > 0:
+            cache.set(key, state, ttl)
+    return tuple(state)
+
+
+def forget_token_state(user_id):
+    """用户停用或令牌吊销后移除缓存的令牌状态"""
+    cache.delete(_state_key(user_id))
+
+
+def revoke_tokens(user):
+    """使该用户此前签发的全部令牌失效，并删除其全部刷新令牌家族"""
+    User.objects.filter(pk=user.pk).update(token_version=F('token_version') + 1)
+    RefreshTokenFamily.objects.filter(user_id=user.pk).delete()
+    user.refresh_from_db(fields=['token_version'])
+    forget_token_state(user.pk)
@@ -1,10 +1,14 @@
 from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView
 from . import views
+from .serializers import RotatingTokenRefreshSerializer
 
 urlpatterns = [
     path('register/', views.register, name='register'),
     path('login/', views.login, name='login'),
-    path('refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path(
+        'refresh/', TokenRefreshView.as_view(serializer_class=RotatingTokenRefreshSerializer),
+        name='token_refresh',
+    ),
     path('me/', views.me, name='me'),
 ]
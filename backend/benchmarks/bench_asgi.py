@@ -0,0 +1,123 @@
+"""
+WSGI / ASGI 部署模式心跳吞吐基准
+
+同一台机器上依次以两种模式启动 gunicorn，用保持连接的并发客户端持续发送心跳：
+    wsgi  config.wsgi:application，gthread worker（与 docker-compose 默认一致）
+    asgi  config.asgi:application，uvicorn worker + BOT_ASYNC_VIEWS=True
+
+    cd backend
+    python -m benchmarks.bench_asgi --workers 2 --concurrency 64 --duration 10
+"""
+import asyncio
+import json
+import random
+import time
+
+from .common import benchmark_database, make_parser, setup_django, summarize, write_json
+from .fixtures import create_bots
+from .server import HttpConnection, start_server, stop_server
+
+MODES = {
+    'wsgi': {
+        'app': 'config.wsgi:application',
+        'args': ['--worker-class', 'gthread', '--threads', '16'],
+        'env': {'BOT_ASYNC_VIEWS': 'False'},
+    },
+    'asgi': {
+        'app': 'config.asgi:application',
+        'args': ['--worker-class', 'uvicorn.workers.UvicornWorker'],
+        # ASGI 下每个请求在新线程中访问数据库，持久连接无法复用
+        'env': {'BOT_ASYNC_VIEWS': 'True', 'DB_CONN_MAX_AGE': '0'},
+    },
+}
+
+STATUSES = ['online', 'online', 'online', 'offline']
+
+
+async def heartbeat_client(port, api_keys, deadline, samples, errors):
+    """单个保持连接的客户端，循环为随机机器人发送心跳直到 deadline"""
+    async with HttpConnection(port) as conn:
+        while time.monotonic() < deadline:
+            body = json.dumps({'status': random.choice(STATUSES)}).encode()
+            headers = {'X-API-Key': random.choice(api_keys), 'Content-Type': 'application/json'}
+            start = time.perf_counter()
+            status, _, _ = await conn.request('POST', '/api/bots/heartbeat/', body, headers)
+            samples.append(time.perf_counter() - start)
+            if status != 200:
+                errors[status] = errors.get(status, 0) + 1
+
+
+async def drive(port, api_keys, concurrency, duration):
+    samples, errors = [], {}
+    start = time.monotonic()
+    await asyncio.gather(*(
+        heartbeat_client(port, api_keys, start + duration, samples, errors)
+        for _ in range(concurrency)
+    ))
+    elapsed = time.monotonic() - start
+    return samples, errors, elapsed
+
+
+def run_mode(mode, args, database, api_keys):
+    process, port = start_server(
+        MODES[mode]['app'], database, args.workers, MODES[mode]['args'], MODES[mode]['env']
+    )
+    try:
+        # 预热：建立数据库连接、填充 API Key 缓存
+        asyncio.run(drive(port, api_keys, args.concurrency, 2))
+        samples, errors, elapsed = asyncio.run(
+            drive(port, api_keys, args.concurrency, args.duration)
+        )
+    finally:
+        stop_server(process)
+    summary = summarize(samples)
+    summary['rps'] = round(len(samples) / elapsed, 1)
+    summary['errors'] = errors
+    return summary
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument('--bots', type=int, default=10_000, help='生成的机器人数')
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn worker 数')
+    parser.add_argument('--concurrency', type=int, default=64, help='并发连接数')
+    parser.add_argument('--duration', type=float, default=10, help='每种模式的压测秒数')
+    parser.add_argument('--mode', choices=list(MODES), action='append', help='只运行指定模式')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connection
+    from apps.bots.models import Bot
+
+    results = {}
+    with benchmark_database(keepdb=args.keepdb):
+        if not Bot.objects.exists():
+            create_bots(args.bots)
+        api_keys = list(Bot.objects.filter(is_public=True).values_list('api_key', flat=True))
+        database = connection.settings_dict
+        for mode in args.mode or MODES:
+            results[mode] = run_mode(mode, args, database, api_keys)
+        # 关闭本进程的连接，否则删除测试数据库时会被占用
+        connection.close()
+
+    print(
+        f'\nPOST /api/bots/heartbeat/（{args.workers} 个 worker，'
+        f'{args.concurrency} 个并发连接，每种模式 {args.duration} 秒）'
+    )
+    print(f'{"模式":<10}{"次数":>10}{"次/秒":>12}{"p50(ms)":>12}{"p99(ms)":>12}{"max(ms)":>12}  错误')
+    for mode, s in results.items():
+        print(
+            f'{mode:<10}{s["count"]:>10}{s["rps"]:>12.1f}{s["p50_ms"]:>12.3f}'
+            f'{s["p99_ms"]:>12.3f}{s["max_ms"]:>12.3f}  {s["errors"] or "-"}'
+        )
+    write_json(args.json, {
+        'bots': args.bots,
+        'workers': args.workers,
+        'concurrency': args.concurrency,
+        'duration': args.duration,
+        'modes': results,
+    })
+
+
+if __name__ == '__main__':
+    main()
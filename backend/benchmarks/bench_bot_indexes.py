@@ -0,0 +1,92 @@
+"""
+Bot 表访问路径索引基准：机器人广场、我的机器人、离线回收三类查询在
+有无 0002_access_path_indexes 索引时的执行计划与耗时
+
+    cd backend
+    python -m benchmarks.bench_bot_indexes --bots 100000
+"""
+from datetime import timedelta
+
+from .common import (
+    Timer, benchmark_database, make_parser, print_summaries, setup_django, write_json,
+)
+from .fixtures import create_bots
+
+INDEX_NAMES = ('bot_public_created_idx', 'bot_master_created_idx', 'bot_online_last_seen_idx')
+
+
+def build_queries():
+    from django.utils import timezone
+    from apps.bots.models import Bot
+    master_id = Bot.objects.values_list('master_id', flat=True).first()
+    threshold = timezone.now() - timedelta(minutes=5)
+    return {
+        'plaza_first_page': Bot.objects.filter(is_public=True).order_by('-created_at', '-id')[:20],
+        'plaza_offset_10000': Bot.objects.filter(is_public=True).order_by('-created_at', '-id')[10000:10020],
+        'my_bots': Bot.objects.filter(master_id=master_id).order_by('-created_at')[:20],
+        'reaper_chunk': Bot.objects.filter(
+            status='online', last_seen__lt=threshold
+        ).order_by('last_seen', 'id').values_list('last_seen', 'id')[:1000],
+    }
+
+
+def measure(queries, repeat):
+    plans, summaries = {}, {}
+    for name, queryset in queries.items():
+        plans[name] = queryset.explain(analyze=True)
+        timer = Timer()
+        for _ in range(repeat):
+            with timer.measure():
+                list(queryset._chain())
+        summaries[name] = timer.summary()
+    return plans, summaries
+
+
+def set_indexes(enabled):
+    from django.db import connection
+    from apps.bots.models import Bot
+    indexes = [index for index in Bot._meta.indexes if index.name in INDEX_NAMES]
+    with connection.schema_editor() as editor:
+        for index in indexes:
+            if enabled:
+                editor.add_index(Bot, index)
+            else:
+                editor.remove_index(Bot, index)
+    with connection.cursor() as cursor:
+        cursor.execute(f'ANALYZE {Bot._meta.db_table}')
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument('--bots', type=int, default=100_000, help='生成的机器人数')
+    parser.add_argument('--repeat', type=int, default=50, help='每条查询执行次数')
+    parser.add_argument('--plans', action='store_true', help='打印完整执行计划')
+    args = parser.parse_args()
+
+    setup_django()
+    with benchmark_database(keepdb=args.keepdb):
+        create_bots(args.bots)
+        queries = build_queries()
+
+        set_indexes(False)
+        before_plans, before = measure(queries, args.repeat)
+        set_indexes(True)
+        after_plans, after = measure(queries, args.repeat)
+
+    for name in queries:
+        print(f'\n== {name}')
+        for label, plans in (('before', before_plans), ('after', after_plans)):
+            plan = plans[name] if args.plans else '\n'.join(plans[name].splitlines()[:3])
+            print(f'-- {label}\n{plan}')
+
+    print_summaries(f'无索引（{args.bots} 个机器人）', before)
+    print_summaries(f'有索引（{args.bots} 个机器人）', after)
+    write_json(args.json, {
+        'bots': args.bots,
+        'before': {'timings': before, 'plans': before_plans},
+        'after': {'timings': after, 'plans': after_plans},
+    })
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+机器人广场分页基准：页码分页与键集分页在第一页和深分页时的请求耗时
+
+    cd backend
+    python -m benchmarks.bench_bot_pagination --bots 100000 --depth 2000
+"""
+import base64
+import json
+
+from .common import (
+    Timer, benchmark_database, make_parser, print_summaries, setup_django, write_json,
+)
+from .fixtures import create_bots
+
+
+def cursor_at(offset):
+    from apps.bots.models import Bot
+    bot = Bot.objects.filter(is_public=True).order_by('-created_at', '-id')[offset]
+    payload = {'t': bot.created_at.isoformat(), 'i': str(bot.pk)}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode('ascii')
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument('--bots', type=int, default=100_000, help='生成的机器人数')
+    parser.add_argument('--depth', type=int, default=2000, help='深分页的页码')
+    parser.add_argument('--repeat', type=int, default=50, help='每个场景的请求次数')
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework.settings import api_settings
+    from rest_framework.test import APIClient
+
+    with benchmark_database(keepdb=args.keepdb):
+        create_bots(args.bots)
+        deep_offset = (args.depth - 1) * api_settings.PAGE_SIZE
+        scenarios = {
+            'page_first': '/api/bots/?pagination=page',
+            f'page_{args.depth}': f'/api/bots/?pagination=page&page={args.depth}',
+            'cursor_first': '/api/bots/?pagination=cursor',
+            f'cursor_page_{args.depth}': f'/api/bots/?cursor={cursor_at(deep_offset)}',
+            f'cursor_page_{args.depth}_approx_count': f'/api/bots/?cursor={cursor_at(deep_offset)}&count=approx',
+        }
+
+        client = APIClient()
+        summaries = {}
+        for name, url in scenarios.items():
+            timer = Timer()
+            for _ in range(args.repeat):
+                with timer.measure():
+                    response = client.get(url)
+                assert response.status_code == 200, response.content
+            summaries[name] = timer.summary()
+
+    print_summaries(f'GET /api/bots/（{args.bots} 个机器人）', summaries)
+    write_json(args.json, {'bots': args.bots, 'depth': args.depth, 'timings': summaries})
+
+
+if __name__ == '__main__':
+    main()
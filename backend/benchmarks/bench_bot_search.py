@@ -0,0 +1,63 @@
+"""
+机器人广场检索基准：?q= / ?status= 在 10 万机器人下的请求与 SQL 耗时
+
+    cd backend
+    python -m benchmarks.bench_bot_search --bots 100000
+"""
+from .common import (
+    Timer, benchmark_database, make_parser, print_summaries, setup_django, write_json,
+)
+from .fixtures import create_bots
+
+SCENARIOS = {
+    'cjk_nickname': {'q': '守秘人'},
+    'cjk_two_terms': {'q': '骰子 管家'},
+    'latin_prefix': {'q': 'keep'},
+    'description': {'q': '团报'},
+    'bot_id_prefix': {'q': '1000123'},
+    'rare_miss': {'q': '不存在的名字'},
+    'q_and_status': {'q': 'dice', 'status': 'online'},
+    'status_only': {'status': 'online'},
+}
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument('--bots', type=int, default=100_000, help='生成的机器人数')
+    parser.add_argument('--repeat', type=int, default=50, help='每个场景的请求次数')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from rest_framework.test import APIClient
+
+    results = {}
+    with benchmark_database(keepdb=args.keepdb):
+        create_bots(args.bots)
+        client = APIClient()
+        request_summaries, sql_summaries = {}, {}
+        for name, params in SCENARIOS.items():
+            request_timer, sql_timer = Timer(), Timer()
+            for _ in range(args.repeat):
+                with CaptureQueriesContext(connection) as ctx, request_timer.measure():
+                    response = client.get('/api/bots/', params)
+                assert response.status_code == 200, response.content
+                sql_timer.samples.append(sum(float(q['time']) for q in ctx.captured_queries))
+            request_summaries[name] = request_timer.summary()
+            sql_summaries[name] = sql_timer.summary()
+            results[name] = {'params': params, 'matches': response.data['count']}
+
+    print_summaries(f'GET /api/bots/ 请求耗时（{args.bots} 个机器人）', request_summaries)
+    print_summaries('其中 SQL 耗时', sql_summaries)
+    print('\n命中数：' + '，'.join(f'{name}={r["matches"]}' for name, r in results.items()))
+    write_json(args.json, {
+        'bots': args.bots,
+        'scenarios': results,
+        'request': request_summaries,
+        'sql': sql_summaries,
+    })
+
+
+if __name__ == '__main__':
+    main()
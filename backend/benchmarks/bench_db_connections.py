@@ -0,0 +1,90 @@
+"""
+数据库持久连接基准：每个请求新建连接（DB_CONN_MAX_AGE=0）与复用连接的单请求延迟对比
+
+以 gunicorn（gthread）启动服务，单个保持连接的客户端串行发送请求，
+每个请求的耗时都包含服务端获取数据库连接的开销。
+--db-host / --db-port 可让服务经 pgbouncer 等连接池访问基准测试数据库。
+
+    cd backend
+    python -m benchmarks.bench_db_connections --requests 500
+"""
+import asyncio
+import json
+import time
+
+from .common import (
+    Timer, benchmark_database, make_parser, print_summaries, setup_django, write_json,
+)
+from .fixtures import create_bots
+from .server import HttpConnection, start_server, stop_server
+
+MODES = {
+    'max_age=0': {'DB_CONN_MAX_AGE': '0', 'DB_CONN_HEALTH_CHECKS': 'False'},
+    'max_age=60': {'DB_CONN_MAX_AGE': '60', 'DB_CONN_HEALTH_CHECKS': 'False'},
+    'max_age=60+check': {'DB_CONN_MAX_AGE': '60', 'DB_CONN_HEALTH_CHECKS': 'True'},
+}
+
+
+async def run_requests(port, count, api_key, bot_pk):
+    heartbeat, detail = Timer(), Timer()
+    body = json.dumps({'status': 'online'}).encode()
+    async with HttpConnection(port) as conn:
+        for _ in range(count):
+            start = time.perf_counter()
+            status, _, _ = await conn.request('POST', '/api/bots/heartbeat/', body, {
+                'X-API-Key': api_key, 'Content-Type': 'application/json',
+            })
+            heartbeat.samples.append(time.perf_counter() - start)
+            assert status == 200, status
+
+            start = time.perf_counter()
+            status, _, _ = await conn.request('GET', f'/api/bots/{bot_pk}/')
+            detail.samples.append(time.perf_counter() - start)
+            assert status == 200, status
+    return heartbeat.summary(), detail.summary()
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument('--bots', type=int, default=1000, help='生成的机器人数')
+    parser.add_argument('--requests', type=int, default=300, help='每种模式每个接口的请求数')
+    parser.add_argument('--db-host', help='服务端连接数据库的主机（默认与基准数据库相同）')
+    parser.add_argument('--db-port', help='服务端连接数据库的端口')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connection
+    from apps.bots.models import Bot
+
+    summaries = {}
+    with benchmark_database(keepdb=args.keepdb):
+        if not Bot.objects.exists():
+            create_bots(args.bots)
+        bot_pk, api_key = Bot.objects.filter(is_public=True).values_list('pk', 'api_key')[0]
+        database = dict(connection.settings_dict)
+        database['HOST'] = args.db_host or database['HOST']
+        database['PORT'] = args.db_port or database['PORT']
+        for mode, env in MODES.items():
+            # 关闭广场缓存，详情请求每次都查询数据库
+            process, port = start_server(
+                'config.wsgi:application', database,
+                args=['--worker-class', 'gthread', '--threads', '4'],
+                env={**env, 'BOT_PLAZA_CACHE_TTL': '0', 'BOT_HEARTBEAT_MODE': 'sync'},
+            )
+            try:
+                asyncio.run(run_requests(port, 20, api_key, bot_pk))
+                heartbeat, detail = asyncio.run(run_requests(port, args.requests, api_key, bot_pk))
+            finally:
+                stop_server(process)
+            summaries[f'heartbeat {mode}'] = heartbeat
+            summaries[f'detail {mode}'] = detail
+        connection.close()
+
+    print_summaries(
+        f'单请求延迟（1 个 worker，数据库 {database["HOST"]}:{database["PORT"]}）', summaries
+    )
+    write_json(args.json, summaries)
+
+
+if __name__ == '__main__':
+    main()
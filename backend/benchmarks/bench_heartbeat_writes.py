@@ -0,0 +1,114 @@
+"""
+心跳写库量基准：sync（每次心跳写库）与 coalesced（状态不变且 last_seen 足够新时跳过）对比
+
+--bots 个机器人每隔 --interval 秒（模拟时钟）各发送一次心跳，共 --rounds 轮，
+其中 --change-rate 比例的心跳改变在线状态。统计 UPDATE 语句数、WAL 字节数与请求耗时。
+
+    cd backend
+    python -m benchmarks.bench_heartbeat_writes --bots 200 --rounds 30 --interval 5
+"""
+import random
+from datetime import timedelta
+from unittest import mock
+
+from .common import (
+    Timer, benchmark_database, make_parser, print_summaries, setup_django, write_json,
+)
+from .fixtures import create_bots
+
+MODES = ['sync', 'coalesced']
+
+
+def wal_lsn(connection):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_current_wal_lsn()')
+        return cursor.fetchone()[0]
+
+
+def wal_bytes_since(connection, lsn):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), %s)', [lsn])
+        return int(cursor.fetchone()[0])
+
+
+def run_mode(args, api_keys, start):
+    from django.db import connection, reset_queries
+    from django.test.utils import CaptureQueriesContext
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    rng = random.Random(0)
+    statuses = {api_key: 'online' for api_key in api_keys}
+    timer = Timer()
+    updates = 0
+    lsn = wal_lsn(connection)
+    for round_no in range(args.rounds):
+        now = start + timedelta(seconds=round_no * args.interval)
+        reset_queries()
+        with mock.patch('django.utils.timezone.now', return_value=now):
+            for api_key in api_keys:
+                if rng.random() < args.change_rate:
+                    statuses[api_key] = 'offline' if statuses[api_key] == 'online' else 'online'
+                with CaptureQueriesContext(connection) as ctx, timer.measure():
+                    response = client.post(
+                        '/api/bots/heartbeat/', {'status': statuses[api_key]},
+                        format='json', HTTP_X_API_KEY=api_key,
+                    )
+                assert response.status_code == 200, response.content
+                updates += sum(q['sql'].startswith('UPDATE') for q in ctx.captured_queries)
+    return timer.summary(), {'updates': updates, 'wal_bytes': wal_bytes_since(connection, lsn)}
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument('--bots', type=int, default=200, help='发送心跳的机器人数')
+    parser.add_argument('--rounds', type=int, default=30, help='心跳轮数')
+    parser.add_argument('--interval', type=float, default=5, help='模拟的心跳间隔（秒）')
+    parser.add_argument('--granularity', type=float, default=30, help='coalesced 模式的写库粒度（秒）')
+    parser.add_argument('--change-rate', type=float, default=0.01, help='改变在线状态的心跳比例')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.utils import timezone
+    from apps.bots.models import Bot
+
+    summaries, writes = {}, {}
+    with benchmark_database(keepdb=args.keepdb):
+        if not Bot.objects.exists():
+            create_bots(args.bots)
+        api_keys = list(
+            Bot.objects.filter(is_public=True).order_by('bot_id')
+            .values_list('api_key', flat=True)[:args.bots]
+        )
+        settings.BOT_HEARTBEAT_GRANULARITY = args.granularity
+        start = timezone.now()
+        for mode in MODES:
+            settings.BOT_HEARTBEAT_MODE = mode
+            # 每种模式从相同的初始状态开始，模拟时钟在各模式间继续向后推进
+            Bot.objects.filter(api_key__in=api_keys).update(status='online', last_seen=None)
+            summaries[mode], writes[mode] = run_mode(args, api_keys, start)
+            start += timedelta(seconds=args.rounds * args.interval + args.granularity)
+
+    heartbeats = len(api_keys) * args.rounds
+    print_summaries(
+        f'心跳请求耗时（{len(api_keys)} 个机器人 × {args.rounds} 轮，间隔 {args.interval} 秒）',
+        summaries,
+    )
+    print(f'\n{"模式":<16}{"心跳数":>10}{"UPDATE 数":>12}{"WAL(KB)":>12}{"WAL/心跳(B)":>14}')
+    for mode, w in writes.items():
+        print(
+            f'{mode:<16}{heartbeats:>10}{w["updates"]:>12}{w["wal_bytes"] / 1024:>12.1f}'
+            f'{w["wal_bytes"] / heartbeats:>14.1f}'
+        )
+    write_json(args.json, {
+        'heartbeats': heartbeats,
+        'interval': args.interval,
+        'granularity': args.granularity,
+        'latency': summaries,
+        'writes': writes,
+    })
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+JWT 认证基准：默认模式（每个请求按 user_id 查询用户行）与 JWT_TOKEN_USER 模式
+（request.user 由令牌声明与缓存的令牌版本构造）下，已登录接口的单请求耗时与 SQL 条数
+
+    cd backend
+    python -m benchmarks.bench_jwt_auth --bots 10000 --repeat 200
+"""
+from .common import (
+    Timer, benchmark_database, make_parser, print_summaries, setup_django, write_json,
+)
+from .fixtures import create_bots
+
+
+def measure(client, url, repeat):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    client.get(url)  # 预热：令牌状态写入缓存
+    timer = Timer()
+    with CaptureQueriesContext(connection) as ctx:
+        for _ in range(repeat):
+            with timer.measure():
+                response = client.get(url)
+            assert response.status_code == 200, response.content
+    user_queries = sum('"users_user"' in q['sql'] for q in ctx.captured_queries)
+    return timer.summary(), len(ctx.captured_queries) / repeat, user_queries / repeat
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument('--bots', type=int, default=10_000, help='生成的机器人数（1000 个主人）')
+    parser.add_argument('--repeat', type=int, default=200, help='每个场景的请求次数')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from rest_framework.test import APIClient
+    from apps.users.models import User
+    from apps.users.tokens import UserRefreshToken
+
+    urls = {'my_bots': '/api/bots/my/', 'me': '/api/auth/me/'}
+    summaries, queries = {}, {}
+    with benchmark_database(keepdb=args.keepdb):
+        create_bots(args.bots)
+        user = User.objects.filter(username__startswith='bench_').first()
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {UserRefreshToken.for_user(user).access_token}')
+        for mode, token_user in (('full_user', False), ('token_user', True)):
+            settings.JWT_TOKEN_USER = token_user
+            for name, url in urls.items():
+                label = f'{name} {mode}'
+                summaries[label], total, user_queries = measure(client, url, args.repeat)
+                queries[label] = {'total': total, 'users_user': user_queries}
+
+    print_summaries(f'已登录接口（{args.bots} 个机器人）', summaries)
+    print('\n每个请求的 SQL 条数（其中查询用户表）：')
+    for label, count in queries.items():
+        print(f'  {label:<24}{count["total"]:g}（{count["users_user"]:g}）')
+    write_json(args.json, {'bots': args.bots, 'timings': summaries, 'queries': queries})
+
+
+if __name__ == '__main__':
+    main()
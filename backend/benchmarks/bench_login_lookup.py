@@ -0,0 +1,122 @@
+"""
+登录查找基准：按邮箱 / 用户名不区分大小写查找用户，在有无 0003_identifier_upper_indexes
+函数索引时的执行计划与耗时，以及旧登录流程（先查用户、再经 ModelBackend 按 email 查一次）
+与 EmailOrUsernameBackend 单次查询的对比
+
+密码校验（含不可用密码时为平衡耗时计算的一次哈希）改用 MD5 哈希器，耗时只反映查询本身。
+
+    cd backend
+    python -m benchmarks.bench_login_lookup --users 1000000
+"""
+import random
+
+from .common import (
+    Timer, benchmark_database, make_parser, print_summaries, setup_django, write_json,
+)
+from .fixtures import create_users
+
+INDEX_NAMES = ('users_user_email_upper_idx', 'users_user_username_upper_idx')
+
+
+def set_indexes(enabled):
+    from django.db import connection
+    from apps.users.models import User
+    indexes = [index for index in User._meta.indexes if index.name in INDEX_NAMES]
+    with connection.schema_editor() as editor:
+        for index in indexes:
+            if enabled:
+                editor.add_index(User, index)
+            else:
+                editor.remove_index(User, index)
+    with connection.cursor() as cursor:
+        cursor.execute(f'ANALYZE {User._meta.db_table}')
+
+
+def identifiers(rng, users, kind):
+    """随机用户的标识，大小写与库中不同"""
+    n = rng.randint(1, users)
+    if kind == 'email':
+        return f'BENCH_{n}@Example.com'
+    return f'Bench_{n}'
+
+
+def legacy_login(identifier):
+    """改动前 LoginSerializer 的查询：iexact 取出用户后按 email 再认证一次"""
+    from django.contrib.auth.backends import ModelBackend
+    from apps.users.backends import identifier_filter
+    from apps.users.models import User
+    user = User.objects.get(**identifier_filter(identifier))
+    ModelBackend().authenticate(None, username=user.email, password='password')
+
+
+def backend_login(identifier):
+    from apps.users.backends import EmailOrUsernameBackend
+    EmailOrUsernameBackend().authenticate(None, username=identifier, password='password')
+
+
+def measure(args, paths):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    summaries, queries = {}, {}
+    for name, (kind, login) in paths.items():
+        rng = random.Random(0)
+        timer = Timer()
+        with CaptureQueriesContext(connection) as ctx:
+            for _ in range(args.repeat):
+                identifier = identifiers(rng, args.users, kind)
+                with timer.measure():
+                    login(identifier)
+        summaries[name] = timer.summary()
+        queries[name] = len(ctx.captured_queries) / args.repeat
+    return summaries, queries
+
+
+def explain(users):
+    from apps.users.backends import identifier_filter
+    from apps.users.models import User
+    rng = random.Random(1)
+    return {
+        kind: User.objects.filter(**identifier_filter(identifiers(rng, users, kind))).explain(analyze=True)
+        for kind in ('email', 'username')
+    }
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument('--users', type=int, default=1_000_000, help='生成的用户数')
+    parser.add_argument('--repeat', type=int, default=50, help='每种登录路径的次数')
+    parser.add_argument('--plans', action='store_true', help='打印完整执行计划')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    settings.PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+    paths = {
+        'email legacy': ('email', legacy_login),
+        'email backend': ('email', backend_login),
+        'username legacy': ('username', legacy_login),
+        'username backend': ('username', backend_login),
+    }
+    results = {}
+    with benchmark_database(keepdb=args.keepdb):
+        create_users(args.users)
+        for label, enabled in (('无函数索引', False), ('有函数索引', True)):
+            set_indexes(enabled)
+            plans = explain(args.users)
+            summaries, queries = measure(args, paths)
+            results[label] = {'timings': summaries, 'queries': queries, 'plans': plans}
+
+    for label, result in results.items():
+        for kind, plan in result['plans'].items():
+            print(f'\n== {label} {kind}')
+            print(plan if args.plans else '\n'.join(plan.splitlines()[:3]))
+    for label, result in results.items():
+        print_summaries(f'{label}（{args.users} 个用户）', result['timings'])
+        print('  每次登录的查询数：' + '，'.join(
+            f'{name} {count:g}' for name, count in result['queries'].items()
+        ))
+    write_json(args.json, {'users': args.users, 'repeat': args.repeat, 'results': results})
+
+
+if __name__ == '__main__':
+    main()
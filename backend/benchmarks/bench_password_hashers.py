@@ -0,0 +1,135 @@
+"""
+密码哈希基准：PASSWORD_HASHER_PROFILE 各算法在当前参数（PASSWORD_PBKDF2_* / PASSWORD_SCRYPT_* /
+PASSWORD_ARGON2_*，可经环境变量覆盖）下单次校验的耗时、单核每秒哈希次数、--processes 个进程
+并发时的总吞吐与单次哈希占用的内存，以及承受 --peak-logins 次/秒登录高峰需要的 CPU 核数
+
+hashlib 与 argon2-cffi 计算哈希时释放 GIL，吞吐随 CPU 核数线性扩展；
+每个 worker 同时校验的数量受 LOGIN_HASH_CONCURRENCY 限制，内存峰值约为
+单次哈希内存 × LOGIN_HASH_CONCURRENCY × worker 数。
+
+    cd backend
+    python -m benchmarks.bench_password_hashers --peak-logins 50
+    PASSWORD_ARGON2_MEMORY_COST=65536 python -m benchmarks.bench_password_hashers --profiles argon2
+    python -m benchmarks.bench_password_hashers --profiles pbkdf2 --target-ms 250
+"""
+import math
+import multiprocessing
+import time
+
+from .common import Timer, make_parser, print_summaries, setup_django, write_json
+
+PASSWORD = 'Correct-Horse-Battery-9'
+
+
+def hash_memory(profile):
+    """单次哈希占用的工作内存（字节）"""
+    from django.conf import settings
+    if profile == 'scrypt':
+        return 128 * settings.PASSWORD_SCRYPT_WORK_FACTOR * settings.PASSWORD_SCRYPT_BLOCK_SIZE \
+            * settings.PASSWORD_SCRYPT_PARALLELISM
+    if profile == 'argon2':
+        return settings.PASSWORD_ARGON2_MEMORY_COST * 1024
+    return 0
+
+
+def load_hasher(profile):
+    from django.conf import settings
+    from django.utils.module_loading import import_string
+    return import_string(settings.PASSWORD_HASHER_PROFILES[profile])()
+
+
+def params(profile):
+    from django.conf import settings
+    prefix = f'PASSWORD_{profile.upper()}_'
+    return {
+        name[len(prefix):].lower(): getattr(settings, name)
+        for name in dir(settings) if name.startswith(prefix)
+    }
+
+
+def verify_timings(hasher, repeat):
+    encoded = hasher.encode(PASSWORD, hasher.salt())
+    timer = Timer()
+    for _ in range(repeat):
+        with timer.measure():
+            assert hasher.verify(PASSWORD, encoded)
+    return timer
+
+
+def _worker(args):
+    profile, deadline = args
+    setup_django()
+    hasher = load_hasher(profile)
+    encoded = hasher.encode(PASSWORD, hasher.salt())
+    count = 0
+    while time.time() < deadline:
+        hasher.verify(PASSWORD, encoded)
+        count += 1
+    return count
+
+
+def throughput(profile, processes, duration):
+    """processes 个进程在 duration 秒内完成的校验次数 / 秒"""
+    deadline = time.time() + duration + 0.5  # 进程启动时间不计入
+    with multiprocessing.get_context('fork').Pool(processes) as pool:
+        counts = pool.map(_worker, [(profile, deadline)] * processes)
+    return sum(counts) / duration
+
+
+def calibrate_pbkdf2(target_ms, repeat):
+    """按单次校验耗时约 target_ms 估算 PBKDF2 迭代次数（耗时与迭代次数成正比）"""
+    from django.conf import settings
+    hasher = load_hasher('pbkdf2')
+    mean_ms = verify_timings(hasher, repeat).summary()['mean_ms']
+    iterations = settings.PASSWORD_PBKDF2_ITERATIONS * target_ms / mean_ms
+    return int(round(iterations, -4))
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument('--profiles', nargs='+', default=['pbkdf2', 'scrypt', 'argon2'])
+    parser.add_argument('--repeat', type=int, default=20, help='每种算法的单次校验次数')
+    parser.add_argument('--processes', type=int, default=multiprocessing.cpu_count(), help='并发测吞吐的进程数')
+    parser.add_argument('--duration', type=float, default=3.0, help='并发吞吐测量秒数')
+    parser.add_argument('--peak-logins', type=float, default=50.0, help='登录高峰（次/秒），用于估算所需 CPU 核数')
+    parser.add_argument('--target-ms', type=float, help='估算单次校验约为该耗时的 PBKDF2 迭代次数')
+    args = parser.parse_args()
+
+    setup_django()
+    summaries, results = {}, {}
+    for profile in args.profiles:
+        timer = verify_timings(load_hasher(profile), args.repeat)
+        summary = timer.summary()
+        per_core = 1000 / summary['mean_ms']
+        total = throughput(profile, args.processes, args.duration)
+        summaries[profile] = summary
+        results[profile] = {
+            'params': params(profile),
+            'verify': summary,
+            'hashes_per_sec_per_core': round(per_core, 2),
+            'hashes_per_sec_total': round(total, 2),
+            'memory_bytes': hash_memory(profile),
+            'cores_for_peak': math.ceil(args.peak_logins / per_core),
+        }
+
+    print_summaries('单次密码校验', summaries)
+    print(f'\n{"算法":<10}{"每核次/秒":>12}{f"{args.processes} 进程次/秒":>16}{"单次内存(MiB)":>16}'
+          f'{f"{args.peak_logins:g}/s 所需核数":>18}  参数')
+    for profile, r in results.items():
+        print(
+            f'{profile:<10}{r["hashes_per_sec_per_core"]:>12.1f}{r["hashes_per_sec_total"]:>16.1f}'
+            f'{r["memory_bytes"] / 2 ** 20:>16.1f}{r["cores_for_peak"]:>18}  {r["params"]}'
+        )
+
+    calibrated = None
+    if args.target_ms:
+        calibrated = calibrate_pbkdf2(args.target_ms, args.repeat)
+        print(f'\n单次校验约 {args.target_ms:g}ms 的 PBKDF2 迭代次数：PASSWORD_PBKDF2_ITERATIONS={calibrated}')
+    write_json(args.json, {
+        'processes': args.processes, 'peak_logins': args.peak_logins,
+        'results': results, 'calibrated_pbkdf2_iterations': calibrated,
+    })
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+机器人注册延迟基准：占位账号使用完整密码哈希（旧实现）与不可用密码（当前实现）对比
+
+    cd backend
+    python -m benchmarks.bench_registration --count 200
+"""
+import secrets
+from unittest import mock
+
+from .common import (
+    Timer, benchmark_database, make_parser, print_summaries, setup_django, write_json,
+)
+
+
+def legacy_create_placeholder(master_qq):
+    """旧实现：为占位账号哈希一个随机密码"""
+    from apps.users.models import User
+    return User.objects.create_user(
+        username=f'qq_{master_qq}',
+        email=f'qq_{master_qq}@example.com',
+        password=secrets.token_hex(16)
+    )
+
+
+def run_registrations(client, count, offset):
+    timer = Timer()
+    for i in range(count):
+        payload = {
+            'bot_id': str(10_000_000 + offset + i),
+            'nickname': f'BenchBot{i}',
+            'master_id': str(20_000_000 + offset + i),
+        }
+        with timer.measure():
+            response = client.post('/api/bots/register/', payload, format='json')
+        assert response.status_code == 201, response.content
+    return timer.summary()
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument('--count', type=int, default=100, help='每个场景注册的机器人数')
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework.test import APIClient
+    from apps.users.models import UserManager
+
+    with benchmark_database(keepdb=args.keepdb):
+        client = APIClient()
+        with mock.patch.object(
+            UserManager, 'create_placeholder',
+            lambda self, master_qq: legacy_create_placeholder(master_qq),
+        ):
+            before = run_registrations(client, args.count, offset=0)
+        after = run_registrations(client, args.count, offset=args.count)
+
+    summaries = {'hashed_password (before)': before, 'unusable_password (after)': after}
+    print_summaries('新主人注册延迟（每次都会创建 qq_<主人QQ> 占位账号）', summaries)
+    write_json(args.json, summaries)
+
+
+if __name__ == '__main__':
+    main()
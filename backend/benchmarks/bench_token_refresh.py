@@ -0,0 +1,101 @@
+"""
+刷新令牌轮换基准：在已有 --families 个登录会话（RefreshTokenFamily 行）时，
+POST /api/auth/refresh/ 的延迟与吞吐、轮换前后家族表的行数与大小，
+以及 sweep_refresh_tokens 分批删除 --expired 个过期家族的耗时
+
+作为对比，simplejwt 自带的 token_blacklist 每次轮换新增 OutstandingToken 与 BlacklistedToken 各一行。
+
+    cd backend
+    python -m benchmarks.bench_token_refresh --families 100000 --refreshes 2000
+"""
+import time
+
+from .common import (
+    Timer, benchmark_database, make_parser, print_summaries, setup_django, write_json,
+)
+from .fixtures import create_users
+
+
+def create_families(count, expired=False):
+    """为 bench_ 用户批量生成登录会话，expired 时 expires_at 已过"""
+    from django.db import connection
+    from apps.users.models import RefreshTokenFamily, User
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'''
+            INSERT INTO {RefreshTokenFamily._meta.db_table} (id, user_id, generation, created_at, expires_at)
+            SELECT gen_random_uuid(), u.id, 0, now(),
+                   CASE WHEN %s THEN now() - interval '1 hour' ELSE now() + interval '7 days' END
+            FROM generate_series(1, %s) AS g
+            JOIN (SELECT id, row_number() OVER () - 1 AS n FROM {User._meta.db_table}) u
+              ON u.n = g %% (SELECT count(*) FROM {User._meta.db_table})
+            ''',
+            [expired, count],
+        )
+        cursor.execute(f'VACUUM ANALYZE {RefreshTokenFamily._meta.db_table}')
+
+
+def table_stats():
+    from django.db import connection
+    from apps.users.models import RefreshTokenFamily
+    table = RefreshTokenFamily._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT count(*), pg_total_relation_size(%s) FROM {table}', [table])
+        rows, size = cursor.fetchone()
+    return {'rows': rows, 'bytes': size}
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument('--families', type=int, default=100_000, help='已有的登录会话数')
+    parser.add_argument('--sessions', type=int, default=100, help='参与轮换的会话数')
+    parser.add_argument('--refreshes', type=int, default=2000, help='刷新请求总数（在 --sessions 个会话间轮流）')
+    parser.add_argument('--expired', type=int, default=100_000, help='待清理的过期家族数')
+    parser.add_argument('--batch-size', type=int, default=1000, help='清理时每条 DELETE 的行数')
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework.test import APIClient
+    from apps.users.models import User
+    from apps.users.tokens import UserRefreshToken, sweep_expired_families
+
+    with benchmark_database(keepdb=args.keepdb):
+        create_users(1000)
+        create_families(args.families)
+        users = list(User.objects.all()[:args.sessions])
+        tokens = [str(UserRefreshToken.for_user(user)) for user in users]
+        before = table_stats()
+
+        client = APIClient()
+        timer = Timer()
+        start = time.perf_counter()
+        for i in range(args.refreshes):
+            n = i % len(tokens)
+            with timer.measure():
+                response = client.post('/api/auth/refresh/', {'refresh': tokens[n]}, format='json')
+            assert response.status_code == 200, response.content
+            tokens[n] = response.data['refresh']
+        elapsed = time.perf_counter() - start
+        after = table_stats()
+
+        create_families(args.expired, expired=True)
+        deleted, sweep_duration = sweep_expired_families(args.batch_size)
+
+    summaries = {'refresh': timer.summary()}
+    print_summaries(f'POST /api/auth/refresh/（{args.families} 个会话）', summaries)
+    print(f'\n吞吐：{args.refreshes / elapsed:.1f} 次/秒（单线程）')
+    print(
+        f'家族表：轮换前 {before["rows"]} 行 / {before["bytes"] / 2 ** 20:.1f}MiB，'
+        f'{args.refreshes} 次轮换后 {after["rows"]} 行 / {after["bytes"] / 2 ** 20:.1f}MiB'
+        f'（token_blacklist 将新增 {2 * args.refreshes} 行）'
+    )
+    print(f'清理：删除 {deleted} 个过期家族，耗时 {sweep_duration * 1000:.1f}ms（每批 {args.batch_size} 行）')
+    write_json(args.json, {
+        'families': args.families, 'refreshes': args.refreshes, 'timings': summaries,
+        'refreshes_per_sec': args.refreshes / elapsed, 'table_before': before, 'table_after': after,
+        'sweep': {'deleted': deleted, 'duration_ms': sweep_duration * 1000, 'batch_size': args.batch_size},
+    })
+
+
+if __name__ == '__main__':
+    main()
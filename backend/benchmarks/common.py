@@ -0,0 +1,109 @@
+"""
+基准测试公共工具
+
+基准脚本在独立的测试数据库中运行（由 Django 测试框架创建，结束后删除），
+不会影响 DJANGO_SETTINGS_MODULE 指向的业务数据库。
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# 基准测试从同一地址高频发送请求，默认关闭限流；start_server 启动的服务继承这些环境变量
+THROTTLE_SETTINGS = [
+    'BOT_THROTTLE_HEARTBEAT', 'BOT_THROTTLE_HEARTBEAT_IP',
+    'BOT_THROTTLE_REGISTER', 'BOT_THROTTLE_REGISTER_IP', 'BOT_THROTTLE_PLAZA', 'LOGIN_THROTTLE_IP',
+]
+
+
+def setup_django():
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.testing')
+    for name in THROTTLE_SETTINGS:
+        os.environ.setdefault(name, '')
+    import django
+    django.setup()
+
+
+def make_parser(description):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--json', metavar='PATH', help='将结果写入 JSON 文件')
+    parser.add_argument(
+        '--keepdb', action='store_true', help='保留测试数据库，便于重复运行'
+    )
+    return parser
+
+
+@contextmanager
+def benchmark_database(keepdb=False):
+    """创建独立的测试数据库并在结束后删除"""
+    from django.db import connection
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+
+
+class Timer:
+    def __init__(self):
+        self.samples = []
+
+    @contextmanager
+    def measure(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples.append(time.perf_counter() - start)
+
+    def summary(self):
+        return summarize(self.samples)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples):
+    """将秒为单位的耗时样本汇总为毫秒统计"""
+    ms = [s * 1000 for s in samples]
+    return {
+        'count': len(ms),
+        'mean_ms': round(statistics.fmean(ms), 3) if ms else 0.0,
+        'p50_ms': round(percentile(ms, 50), 3),
+        'p90_ms': round(percentile(ms, 90), 3),
+        'p99_ms': round(percentile(ms, 99), 3),
+        'max_ms': round(max(ms), 3) if ms else 0.0,
+    }
+
+
+def print_summaries(title, summaries):
+    print(f'\n{title}')
+    print(f'{"场景":<28}{"次数":>8}{"p50(ms)":>12}{"p90(ms)":>12}{"p99(ms)":>12}{"max(ms)":>12}')
+    for name, s in summaries.items():
+        print(
+            f'{name:<28}{s["count"]:>8}{s["p50_ms"]:>12.3f}{s["p90_ms"]:>12.3f}'
+            f'{s["p99_ms"]:>12.3f}{s["max_ms"]:>12.3f}'
+        )
+
+
+def write_json(path, data):
+    if not path:
+        return
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+    print(f'\n结果已写入 {path}')
@@ -0,0 +1,82 @@
+"""
+基准测试数据生成：直接用 generate_series 批量插入，10 万级数据只需数秒
+"""
+from django.db import connection
+
+NICKNAME_PREFIXES = [
+    '骰子', '跑团', '守秘人', '龙与地下城', '克苏鲁', '酒馆', '冒险者', '吟游诗人',
+    'Dice', 'TRPG', 'Keeper', 'Dungeon', 'Tavern', 'Roll', 'Quest', 'Lore',
+]
+NICKNAME_SUFFIXES = ['机器人', '小助手', '管家', '骰娘', 'Bot', 'Helper', 'Master', 'Assistant', '酱']
+DESCRIPTIONS = [
+    '支持掷骰、检定与暗骰，适合 COC 跑团',
+    '提供 DND5e 规则速查与法术查询',
+    '角色卡管理与属性生成，支持多人团',
+    'A dice bot for tabletop sessions with initiative tracking',
+    '群聊娱乐机器人，附带今日人品与抽卡',
+    'Rules lookup and character sheet helper for DND 5e',
+    '自动记录跑团日志并生成团报',
+    '',
+]
+
+
+def create_users(count, prefix='bench'):
+    from apps.users.models import User
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'''
+            INSERT INTO {User._meta.db_table}
+                (id, password, is_superuser, username, email, first_name, last_name,
+                 is_staff, is_active, date_joined, avatar, token_version)
+            SELECT gen_random_uuid(), '!', false, %s || '_' || g, %s || '_' || g || '@example.com',
+                   '', '', false, true, now(), '', 0
+            FROM generate_series(1, %s) AS g
+            ''',
+            [prefix, prefix, count],
+        )
+
+
+def create_bots(count, users=1000):
+    """
+    生成 count 个机器人，平均分配给 users 个主人：
+    90% 公开；在线 / 离线 / 未知各约三分之一；last_seen 分布在最近 10 小时内
+    """
+    from apps.bots.models import Bot
+    from apps.users.models import User
+    create_users(users)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'''
+            WITH masters AS (
+                SELECT id, row_number() OVER (ORDER BY username) - 1 AS n
+                FROM {User._meta.db_table} WHERE username LIKE 'bench\\_%%'
+            )
+            INSERT INTO {Bot._meta.db_table}
+                (id, bot_id, nickname, master_id, master_qq, version, api_key, description,
+                 is_public, status, last_seen, created_at, updated_at)
+            SELECT gen_random_uuid(), (10000000 + g)::text,
+                   (%(prefixes)s::text[])[1 + g %% cardinality(%(prefixes)s::text[])]
+                       || (%(suffixes)s::text[])[1 + (g / cardinality(%(prefixes)s::text[]))
+                                                   %% cardinality(%(suffixes)s::text[])]
+                       || ' ' || g,
+                   m.id, (20000000 + m.n)::text, 'v1.0.' || (g %% 7),
+                   md5(g::text) || md5((g * 7)::text),
+                   (%(descriptions)s::text[])[1 + g %% cardinality(%(descriptions)s::text[])] || ' #' || g,
+                   g %% 10 <> 0,
+                   (ARRAY['online', 'offline', 'unknown'])[1 + g %% 3],
+                   CASE WHEN g %% 3 = 2 THEN NULL ELSE now() - (g %% 600) * interval '1 minute' END,
+                   now() - g * interval '1 minute', now() - g * interval '1 minute'
+            FROM generate_series(1, %(count)s) AS g
+            JOIN masters m ON m.n = g %% %(users)s
+            ''',
+            {
+                'count': count,
+                'users': users,
+                'prefixes': NICKNAME_PREFIXES,
+                'suffixes': NICKNAME_SUFFIXES,
+                'descriptions': DESCRIPTIONS,
+            },
+        )
+        # VACUUM 同时清空 GIN 索引的待合并列表，否则检索要线性扫描刚插入的全部条目
+        cursor.execute(f'VACUUM ANALYZE {Bot._meta.db_table}')
+        cursor.execute(f'ANALYZE {User._meta.db_table}')
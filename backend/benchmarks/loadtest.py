@@ -0,0 +1,403 @@
+"""
+机器人 API 负载测试
+
+模拟 --bots 个机器人先注册，再按 --heartbeat-interval 秒的间隔持续发送心跳，
+同时以 --plaza-rate 次/秒的速率匿名浏览机器人广场（首页、翻页、状态过滤与检索混合），
+持续 --duration 秒。请求按计划时间发出（开环），延迟从计划时间算起，服务端跟不上时排队时间计入延迟。
+
+两种运行方式：
+    本地：在基准测试数据库上启动 gunicorn（--app 选择 WSGI 或 ASGI），
+          额外统计服务端与 PostgreSQL 的 CPU、每个请求的数据库事务数和 SQL 条数
+    远端：--url 指向已运行的服务（如 docker-compose 的 http://localhost），只统计吞吐与延迟
+
+结果（含 git 提交号与参数）写入 JSON，--compare 与之前的结果对比：
+
+    cd backend
+    python -m benchmarks.loadtest --bots 500 --duration 30
+    python -m benchmarks.loadtest --url http://localhost --bots 2000 --heartbeat-interval 30
+    python -m benchmarks.loadtest --compare benchmarks/results/loadtest-<提交号>.json
+"""
+import asyncio
+import json
+import os
+import random
+import re
+import resource
+import statistics
+import subprocess
+import time
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+from .common import BACKEND_DIR, benchmark_database, make_parser, setup_django, summarize, write_json
+from .fixtures import NICKNAME_PREFIXES
+from .server import HttpConnection, start_server, stop_server
+
+APPS = {
+    'wsgi': ('config.wsgi:application', ['--worker-class', 'gthread', '--threads', '16'], {}),
+    'asgi': (
+        'config.asgi:application',
+        ['--worker-class', 'uvicorn.workers.UvicornWorker'],
+        {'BOT_ASYNC_VIEWS': 'True', 'DB_CONN_MAX_AGE': '0'},
+    ),
+}
+
+# 广场请求的组成：(名称, 权重, 查询参数生成函数(rng, 总页数))
+PLAZA_MIX = [
+    ('plaza_first_page', 6, lambda rng, pages: {}),
+    ('plaza_page', 2, lambda rng, pages: {'page': rng.randint(min(2, pages), pages)}),
+    ('plaza_status', 1, lambda rng, pages: {'status': 'online'}),
+    ('plaza_search', 1, lambda rng, pages: {'q': rng.choice(NICKNAME_PREFIXES)}),
+]
+
+STATUSES = ['online'] * 19 + ['offline']
+
+# 服务端开启 MONITORING_ENABLED 时 Server-Timing 响应头中的 SQL 条数
+SERVER_TIMING_QUERIES = re.compile(r'db;dur=[\d.]+;desc="(\d+) queries"')
+
+
+def git_revision():
+    def git(*args):
+        return subprocess.run(
+            ['git', *args], cwd=BACKEND_DIR, capture_output=True, text=True
+        ).stdout.strip()
+    return {'commit': git('rev-parse', '--short', 'HEAD') or None, 'dirty': bool(git('status', '--porcelain'))}
+
+
+def process_cpu_seconds(match):
+    """/proc 中满足 match(pid, ppid, comm) 的进程累计 CPU 秒数（仅 Linux）"""
+    ticks = os.sysconf('SC_CLK_TCK')
+    stats = {}
+    for entry in Path('/proc').iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            raw = (entry / 'stat').read_text()
+        except OSError:
+            continue
+        comm = raw[raw.index('(') + 1:raw.rindex(')')]
+        fields = raw[raw.rindex(')') + 2:].split()
+        stats[int(entry.name)] = (int(fields[1]), comm, int(fields[11]) + int(fields[12]))
+    pids = {pid for pid, (ppid, comm, _) in stats.items() if match(pid, ppid, comm)}
+    return sum(stats[pid][2] for pid in pids) / ticks
+
+
+class CpuMeter:
+    """服务端（gunicorn 主进程及其 worker）、PostgreSQL 与本进程的 CPU 用量"""
+
+    def __init__(self, server_pid=None):
+        self.server_pid = server_pid
+        self.available = server_pid is not None and Path('/proc/self/stat').exists()
+
+    def sample(self):
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        sample = {'client': usage.ru_utime + usage.ru_stime}
+        if self.available:
+            pid = self.server_pid
+            sample['server'] = process_cpu_seconds(lambda p, ppid, comm: pid in (p, ppid))
+            sample['postgres'] = process_cpu_seconds(lambda p, ppid, comm: comm.startswith('postgres'))
+        return sample
+
+    @staticmethod
+    def diff(start, end, elapsed):
+        return {
+            name: {'seconds': round(end[name] - start[name], 3),
+                   'percent': round((end[name] - start[name]) / elapsed * 100, 1)}
+            for name in end
+        }
+
+
+class LoadTest:
+    def __init__(self, host, port, args):
+        self.host, self.port, self.args = host, port, args
+        self.rng = random.Random(args.seed)
+        self.pool = None
+        self.samples = {}
+        self.errors = {}
+        self.queries = {}
+
+    def run_phase(self, phase, *args):
+        """在新的事件循环中运行一个阶段，返回 (阶段结果, 每种请求的统计, 耗时秒数)"""
+        async def runner():
+            self.pool = asyncio.Queue()
+            for _ in range(self.args.connections):
+                self.pool.put_nowait(HttpConnection(self.port, self.host))
+            try:
+                return await phase(*args)
+            finally:
+                while not self.pool.empty():
+                    self.pool.get_nowait().close()
+
+        started = time.perf_counter()
+        value = asyncio.run(runner())
+        elapsed = time.perf_counter() - started
+        return value, self.report(elapsed), elapsed
+
+    async def call(self, name, method, path, payload=None, headers=None, scheduled=None):
+        """
+        发送一个请求并按名称记录延迟
+        scheduled 为计划发出时间（perf_counter），不指定时从取得连接开始计时
+        """
+        headers = dict(headers or {})
+        body = b''
+        if payload is not None:
+            body = json.dumps(payload).encode()
+            headers['Content-Type'] = 'application/json'
+        conn = await self.pool.get()
+        start = time.perf_counter() if scheduled is None else scheduled
+        try:
+            status, response_headers, content = await conn.request(method, path, body, headers)
+        except (OSError, asyncio.IncompleteReadError) as exc:
+            status, response_headers, content = type(exc).__name__, {}, b''
+        finally:
+            self.pool.put_nowait(conn)
+        self.samples.setdefault(name, []).append(time.perf_counter() - start)
+        timing = SERVER_TIMING_QUERIES.search(response_headers.get('server-timing', ''))
+        if timing:
+            self.queries.setdefault(name, []).append(int(timing.group(1)))
+        if not isinstance(status, int) or status >= 400:
+            counts = self.errors.setdefault(name, {})
+            counts[str(status)] = counts.get(str(status), 0) + 1
+            return None
+        return content
+
+    async def register(self):
+        """注册全部机器人，返回 API Key 列表"""
+        args = self.args
+
+        async def register_one(i):
+            content = await self.call('register', 'POST', '/api/bots/register/', {
+                'bot_id': str(args.bot_id_base + i),
+                'nickname': f'{self.rng.choice(NICKNAME_PREFIXES)}压测{i}',
+                'master_id': str(args.bot_id_base + 10_000_000 + i % args.masters),
+                'version': 'loadtest',
+            })
+            return json.loads(content)['api_key'] if content else None
+
+        keys = await asyncio.gather(*(register_one(i) for i in range(args.bots)))
+        return [key for key in keys if key]
+
+    async def steady(self, api_keys):
+        deadline = time.perf_counter() + self.args.duration
+        await asyncio.gather(self.heartbeats(api_keys, deadline), self.plaza(deadline))
+
+    async def heartbeats(self, api_keys, deadline):
+        interval = self.args.heartbeat_interval
+
+        async def bot_loop(api_key):
+            scheduled = time.perf_counter() + self.rng.uniform(0, interval)
+            while scheduled < deadline:
+                await asyncio.sleep(max(0, scheduled - time.perf_counter()))
+                await self.call(
+                    'heartbeat', 'POST', '/api/bots/heartbeat/',
+                    {'status': self.rng.choice(STATUSES)}, {'X-API-Key': api_key}, scheduled,
+                )
+                scheduled += interval
+
+        await asyncio.gather(*(bot_loop(key) for key in api_keys))
+
+    async def plaza(self, deadline):
+        rate = self.args.plaza_rate
+        if rate <= 0:
+            return
+        names, weights = [m[0] for m in PLAZA_MIX], [m[1] for m in PLAZA_MIX]
+        params_for = {m[0]: m[2] for m in PLAZA_MIX}
+        pages = await self.plaza_pages()
+        tasks = []
+        scheduled = time.perf_counter()
+        while scheduled < deadline:
+            await asyncio.sleep(max(0, scheduled - time.perf_counter()))
+            name = self.rng.choices(names, weights)[0]
+            query = urlencode(params_for[name](self.rng, pages))
+            path = f'/api/bots/?{query}' if query else '/api/bots/'
+            tasks.append(asyncio.ensure_future(
+                self.call(name, 'GET', path, headers={'Accept': 'application/json'}, scheduled=scheduled)
+            ))
+            scheduled += 1 / rate
+        await asyncio.gather(*tasks)
+
+    async def plaza_pages(self):
+        """按首页的总数与每页条数计算广场页数，用于随机翻页"""
+        conn = await self.pool.get()
+        try:
+            status, _, content = await conn.request('GET', '/api/bots/?pagination=page', headers={
+                'Accept': 'application/json',
+            })
+        finally:
+            self.pool.put_nowait(conn)
+        data = json.loads(content) if status == 200 else {}
+        per_page = len(data.get('results', ())) or 1
+        return max(1, -(-data.get('count', 0) // per_page))
+
+    def report(self, elapsed):
+        results = {}
+        for name, samples in self.samples.items():
+            summary = summarize(samples)
+            summary['rps'] = round(len(samples) / elapsed, 1)
+            summary['errors'] = self.errors.get(name, {})
+            if name in self.queries:
+                summary['db_queries_mean'] = round(statistics.fmean(self.queries[name]), 2)
+            results[name] = summary
+        self.samples, self.errors, self.queries = {}, {}, {}
+        return results
+
+
+def profile_queries(args, api_key):
+    """
+    在本进程中用测试客户端逐个请求，统计每种请求的 SQL 条数
+    广场请求按未命中缓存统计，心跳按 API Key 缓存已填充统计
+    """
+    from django.conf import settings
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    rng = random.Random(args.seed)
+    requests = [('heartbeat', lambda: client.post(
+        '/api/bots/heartbeat/', {'status': 'online'}, format='json', HTTP_X_API_KEY=api_key,
+    ))]
+    for name, _, params in PLAZA_MIX:
+        query = params(rng, 1)
+        requests.append((name, lambda query=query: client.get('/api/bots/', query)))
+    settings.BOT_PLAZA_CACHE_TTL = 0
+    queries = {}
+    for name, send in requests:
+        send()
+        with CaptureQueriesContext(connection) as ctx:
+            send()
+        queries[name] = len(ctx.captured_queries)
+    return queries
+
+
+def db_activity(connection):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT xact_commit + xact_rollback, tup_fetched, tup_inserted + tup_updated + tup_deleted '
+            'FROM pg_stat_database WHERE datname = current_database()'
+        )
+        xacts, fetched, written = cursor.fetchone()
+    return {'transactions': xacts, 'rows_fetched': fetched, 'rows_written': written}
+
+
+def run(host, port, args, cpu, database_connection=None):
+    test = LoadTest(host, port, args)
+    api_keys, register, _ = test.run_phase(test.register)
+    if not api_keys:
+        raise RuntimeError('没有注册成功的机器人')
+    results = {'register': register}
+
+    db_before = db_activity(database_connection) if database_connection else None
+    cpu_before = cpu.sample()
+    _, results['steady'], elapsed = test.run_phase(test.steady, api_keys)
+    results['cpu'] = cpu.diff(cpu_before, cpu.sample(), elapsed)
+    if db_before:
+        # 统计信息由各后端进程在事务结束后延迟上报
+        time.sleep(1)
+        db_after = db_activity(database_connection)
+        total = sum(s['count'] for s in results['steady'].values())
+        results['db_per_request'] = {
+            key: round((db_after[key] - db_before[key]) / total, 2) for key in db_before
+        }
+    return api_keys, results
+
+
+def print_report(results, queries=None):
+    print(f'\n{"请求":<20}{"次数":>8}{"次/秒":>10}{"p50(ms)":>11}{"p90(ms)":>11}{"p99(ms)":>11}'
+          f'{"SQL/次":>8}  错误')
+    print('（SQL/次 取自服务端 Server-Timing 的平均值；服务端未开启监控时为本进程复现一次请求的 SQL 条数，'
+          '广场请求按未命中缓存计）')
+    for phase in ('register', 'steady'):
+        for name, s in results[phase].items():
+            sql = s.get('db_queries_mean', queries.get(name, '-') if queries else '-')
+            print(
+                f'{name:<20}{s["count"]:>8}{s["rps"]:>10.1f}{s["p50_ms"]:>11.2f}{s["p90_ms"]:>11.2f}'
+                f'{s["p99_ms"]:>11.2f}{sql:>8}  {s["errors"] or "-"}'
+            )
+    total = sum(s['count'] for s in results['steady'].values())
+    cpu = results['cpu']
+    print(f'\n稳定阶段共 {total} 个请求，CPU：' + '，'.join(
+        f'{name} {c["seconds"]} 秒（{c["percent"]}%）' for name, c in cpu.items()
+    ))
+    if 'server' in cpu and total:
+        print(f'服务端每个请求 CPU {cpu["server"]["seconds"] / total * 1000:.2f} ms')
+    if 'db_per_request' in results:
+        print('数据库每个请求：' + '，'.join(f'{k} {v}' for k, v in results['db_per_request'].items()))
+
+
+def print_comparison(current, path):
+    with open(path, encoding='utf-8') as f:
+        previous = json.load(f)
+    print(f'\n与 {path}（提交 {previous["git"]["commit"]}）对比')
+    print(f'{"请求":<20}{"次/秒":<28}p99(ms)')
+    for name, now in current['results']['steady'].items():
+        before = previous['results']['steady'].get(name)
+        if before is None:
+            continue
+
+        def change(key):
+            text = f'{before[key]:.1f} → {now[key]:.1f}'
+            if before[key]:
+                text += f' ({(now[key] - before[key]) / before[key]:+.0%})'
+            return text
+        print(f'{name:<20}{change("rps"):<30}{change("p99_ms")}')
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument('--url', help='压测已运行的服务，如 http://localhost；不指定时在本地启动 gunicorn')
+    parser.add_argument('--app', choices=list(APPS), default='wsgi', help='本地启动的部署方式')
+    parser.add_argument('--workers', type=int, default=4, help='本地 gunicorn worker 数')
+    parser.add_argument('--env', action='append', default=[], metavar='KEY=VALUE',
+                        help='本地服务的额外环境变量，如 BOT_HEARTBEAT_MODE=coalesced')
+    parser.add_argument('--bots', type=int, default=500, help='模拟的机器人数')
+    parser.add_argument('--masters', type=int, default=100, help='机器人分属的主人数')
+    parser.add_argument('--bot-id-base', type=int, default=800_000_000, help='机器人 QQ 号起点')
+    parser.add_argument('--heartbeat-interval', type=float, default=10, help='每个机器人的心跳间隔（秒）')
+    parser.add_argument('--plaza-rate', type=float, default=20, help='广场浏览请求速率（次/秒）')
+    parser.add_argument('--duration', type=float, default=30, help='稳定阶段时长（秒）')
+    parser.add_argument('--connections', type=int, default=64, help='客户端连接数')
+    parser.add_argument('--seed', type=int, default=0, help='随机数种子')
+    parser.add_argument('--compare', metavar='PATH', help='与之前的结果 JSON 对比')
+    args = parser.parse_args()
+
+    revision = git_revision()
+    config = {key: value for key, value in vars(args).items() if key not in ('json', 'compare', 'keepdb')}
+    queries = None
+    if args.url:
+        target = urlsplit(args.url)
+        host, port = target.hostname, target.port or 80
+        api_keys, results = run(host, port, args, CpuMeter())
+    else:
+        setup_django()
+        from django.db import connection
+        app, app_args, app_env = APPS[args.app]
+        env = {**app_env, **dict(item.split('=', 1) for item in args.env)}
+        with benchmark_database(keepdb=args.keepdb):
+            process, port = start_server(app, connection.settings_dict, args.workers, app_args, env)
+            try:
+                api_keys, results = run('127.0.0.1', port, args, CpuMeter(process.pid), connection)
+            finally:
+                stop_server(process)
+            queries = profile_queries(args, api_keys[0])
+            results['queries_per_request'] = queries
+            connection.close()
+
+    print_report(results, queries)
+    data = {
+        'git': revision,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'config': config,
+        'results': results,
+    }
+    if args.compare:
+        print_comparison(data, args.compare)
+    path = args.json or BACKEND_DIR / 'benchmarks' / 'results' / (
+        f'loadtest-{revision["commit"] or "unknown"}{"-dirty" if revision["dirty"] else ""}.json'
+    )
+    write_json(path, data)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+需要真实 HTTP 服务的基准使用的工具：在子进程中启动 gunicorn，连接基准测试数据库，
+并提供一个保持连接的最简 HTTP/1.1 客户端
+"""
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from .common import BACKEND_DIR
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(app, database, workers=1, args=(), env=None):
+    """启动 gunicorn 并等待端口可连接，返回 (process, port)"""
+    port = free_port()
+    env = {
+        **os.environ,
+        'DJANGO_SETTINGS_MODULE': 'config.settings.production',
+        'ALLOWED_HOSTS': '127.0.0.1',
+        'DB_NAME': database['NAME'],
+        'DB_USER': database['USER'],
+        'DB_PASSWORD': database['PASSWORD'],
+        'DB_HOST': database['HOST'],
+        'DB_PORT': str(database['PORT']),
+        **(env or {}),
+    }
+    process = subprocess.Popen(
+        [
+            sys.executable, '-m', 'gunicorn', app,
+            '--bind', f'127.0.0.1:{port}', '--workers', str(workers),
+            '--timeout', '120', '--log-level', 'warning', *args,
+        ],
+        cwd=BACKEND_DIR, env=env,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'{app} 启动失败')
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process, port
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f'{app} 启动超时')
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+class HttpConnection:
+    """
+    保持连接的 HTTP/1.1 客户端，只支持带 Content-Length 的响应
+    服务端关闭空闲连接（gunicorn keepalive 超时）后自动重连并重发一次
+    """
+
+    def __init__(self, port, host='127.0.0.1'):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+    async def request(self, method, path, body=b'', headers=None):
+        """发送请求并读完响应，返回 (status, headers, body)，headers 的键为小写"""
+        lines = [f'{method} {path} HTTP/1.1', f'Host: {self.host}']
+        lines += [f'{name}: {value}' for name, value in (headers or {}).items()]
+        if body:
+            lines.append(f'Content-Length: {len(body)}')
+        data = ('\r\n'.join(lines) + '\r\n\r\n').encode() + body
+        for attempt in range(2):
+            if self.writer is None:
+                await self.connect()
+            try:
+                self.writer.write(data)
+                return await self._read_response()
+            except (asyncio.IncompleteReadError, ConnectionError):
+                self.close()
+                if attempt:
+                    raise
+
+    async def _read_response(self):
+        head = await self.reader.readuntil(b'\r\n\r\n')
+        status = int(head.split(b' ', 2)[1])
+        headers = {}
+        for line in head.split(b'\r\n')[1:]:
+            name, _, value = line.partition(b':')
+            if name:
+                headers[name.strip().lower().decode()] = value.strip().decode('latin1')
+        body = await self.reader.readexactly(int(headers.get('content-length', 0)))
+        if headers.get('connection', '').lower() == 'close':
+            self.close()
+        return status, headers, body
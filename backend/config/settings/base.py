@@ -3,7 +3,7 @@ Django 基础配置 - 所有环境共用
 """
 import os
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 from datetime import timedelta
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -17,6 +17,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     # 第三方
     'rest_framework',
     'rest_framework_simplejwt',
@@ -24,12 +25,15 @@ INSTALLED_APPS = [
     # 本项目 Apps
     'apps.users',
     'apps.bots',
+    'apps.monitoring',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    # 为 GET 响应按内容生成 ETag，If-None-Match 命中时返回 304
+    'django.middleware.http.ConditionalGetMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -37,6 +41,22 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# 请求级监控：每个请求的 SQL 条数 / SQL 耗时 / 渲染耗时 / 总耗时按 URL 名称汇总为直方图，
+# 由 GET /api/metrics/ 以 Prometheus 格式输出；MONITORING_SERVER_TIMING 同时写入 Server-Timing 响应头
+MONITORING_ENABLED = config('MONITORING_ENABLED', default=False, cast=bool)
+MONITORING_SERVER_TIMING = config('MONITORING_SERVER_TIMING', default=True, cast=bool)
+if MONITORING_ENABLED:
+    MIDDLEWARE.insert(0, 'apps.monitoring.middleware.InstrumentationMiddleware')
+# 抓取 /api/metrics/ 所需的 Bearer 令牌，留空时只有管理员登录后可以查看
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+# 就绪检查 GET /api/health/ready/：数据库查询的限时与结果在进程内的缓存秒数
+HEALTH_READY_TIMEOUT = config('HEALTH_READY_TIMEOUT', default=1.0, cast=float)
+HEALTH_READY_CACHE_TTL = config('HEALTH_READY_CACHE_TTL', default=2.0, cast=float)
+# 多进程部署时抓取要合并的 prometheus_client 指标目录（逗号分隔），默认只有本进程的 PROMETHEUS_MULTIPROC_DIR
+METRICS_MULTIPROC_DIRS = config(
+    'METRICS_MULTIPROC_DIRS', default=os.environ.get('PROMETHEUS_MULTIPROC_DIR', ''), cast=Csv(),
+)
+
 ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
@@ -66,12 +86,100 @@ DATABASES = {
         'PASSWORD': config('DB_PASSWORD', default='dungeon_toolkit'),
         'HOST': config('DB_HOST', default='db'),
         'PORT': config('DB_PORT', default='5432'),
+        # 持久连接：同一线程在 CONN_MAX_AGE 秒内复用连接（0 为每个请求新建），
+        # 复用前检查连接是否可用，数据库重启后不会把第一个请求变成 500
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
+        # 经 pgbouncer 事务池连接时必须关闭服务端游标（游标不能跨事务存在）
+        'DISABLE_SERVER_SIDE_CURSORS': config('DB_DISABLE_SERVER_SIDE_CURSORS', default=False, cast=bool),
+        # 数据库不可达时建立连接最多等待的秒数（libpq 最小为 2），避免请求无限期占用 worker
+        'OPTIONS': {
+            'connect_timeout': config('DB_CONNECT_TIMEOUT', default=5, cast=int),
+        },
     }
 }
 
+# LISTEN 需要会话级连接，经 pgbouncer 事务池连接时在线状态监听改为直连数据库，
+# 留空则与 DB_HOST / DB_PORT 相同
+DB_LISTEN_HOST = config('DB_LISTEN_HOST', default='')
+DB_LISTEN_PORT = config('DB_LISTEN_PORT', default='')
+
+# 缓存后端：locmem（每个 worker 一份）、file（同一主机的 worker 共享）、redis（需安装 redis）
+# file 后端每次写入都要列出整个缓存目录，广场响应与刷新令牌状态写入频繁，生产环境使用 redis
+CACHE_BACKEND = config('CACHE_BACKEND', default='locmem')
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'dungeon-toolkit'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', '/tmp/dungeon_toolkit_cache'),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://localhost:6379/0'),
+}
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND][0],
+        'LOCATION': config('CACHE_LOCATION', default='') or CACHE_BACKENDS[CACHE_BACKEND][1],
+    }
+}
+# locmem / file 达到 MAX_ENTRIES 后淘汰 1 / CULL_FREQUENCY 的条目（Django 默认 300 与 3）；
+# redis 按自身的 maxmemory 策略淘汰，不接受这两个选项
+if CACHE_BACKEND in ('locmem', 'file'):
+    CACHES['default']['OPTIONS'] = {
+        'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=10000, cast=int),
+        'CULL_FREQUENCY': config('CACHE_CULL_FREQUENCY', default=4, cast=int),
+    }
+
+# 限流令牌桶与登录锁定记录单独使用 limits 缓存：default 中的广场响应按客户端给出的查询参数建键，
+# 与限流状态共用时可以写入大量条目把令牌桶挤出缓存。生产环境使用 redis（所有 worker 共享）；
+# locmem 每个 worker 一份，LIMITS_CACHE_MAX_ENTRIES 需大于 机器人数 × 限流 scope 数
+LIMITS_CACHE_BACKEND = config('LIMITS_CACHE_BACKEND', default='locmem')
+LIMITS_CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'dungeon-toolkit-limits'),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://localhost:6379/1'),
+}
+CACHES['limits'] = {
+    'BACKEND': LIMITS_CACHE_BACKENDS[LIMITS_CACHE_BACKEND][0],
+    'LOCATION': config('LIMITS_CACHE_LOCATION', default='') or LIMITS_CACHE_BACKENDS[LIMITS_CACHE_BACKEND][1],
+}
+if LIMITS_CACHE_BACKEND == 'locmem':
+    CACHES['limits']['OPTIONS'] = {
+        'MAX_ENTRIES': config('LIMITS_CACHE_MAX_ENTRIES', default=100000, cast=int),
+    }
+
 # 自定义用户模型
 AUTH_USER_MODEL = 'users.User'
 
+# 登录：邮箱或用户名（不区分大小写）一次查询，管理后台登录同样适用
+AUTHENTICATION_BACKENDS = ['apps.users.backends.EmailOrUsernameBackend']
+
+# 登录防暴力破解（apps.users.throttling）：窗口内失败 LIMIT 次后锁定该邮箱 / 用户名，
+# 锁定时长从 BASE 秒起每次翻倍、最长 MAX 秒；每个 worker 同时校验密码的线程数与排队等待秒数
+LOGIN_FAILURE_LIMIT = config('LOGIN_FAILURE_LIMIT', default=5, cast=int)
+LOGIN_FAILURE_WINDOW = config('LOGIN_FAILURE_WINDOW', default=900, cast=int)
+LOGIN_LOCKOUT_BASE = config('LOGIN_LOCKOUT_BASE', default=60, cast=int)
+LOGIN_LOCKOUT_MAX = config('LOGIN_LOCKOUT_MAX', default=3600, cast=int)
+LOGIN_HASH_CONCURRENCY = config('LOGIN_HASH_CONCURRENCY', default=4, cast=int)
+LOGIN_HASH_WAIT = config('LOGIN_HASH_WAIT', default=2.0, cast=float)
+
+# 密码哈希：PASSWORD_HASHER_PROFILE 选择新密码使用的算法（pbkdf2 / scrypt / argon2），
+# 其余算法仍可校验旧哈希；算法或参数变化后，旧哈希在用户下次登录成功时自动按新配置重新计算
+# 默认参数：PBKDF2 与 Django 4.2 相同；scrypt 与 Django 相同（约 16MiB / 次）；
+# argon2id 取 OWASP 建议的 19MiB、2 轮、1 线程，argon2 需安装 argon2-cffi
+# 调整参数时用 python -m benchmarks.bench_password_hashers 测量每核每秒哈希次数
+PASSWORD_HASHER_PROFILE = config('PASSWORD_HASHER_PROFILE', default='pbkdf2')
+PASSWORD_HASHER_PROFILES = {
+    'pbkdf2': 'apps.users.hashers.TunedPBKDF2PasswordHasher',
+    'scrypt': 'apps.users.hashers.TunedScryptPasswordHasher',
+    'argon2': 'apps.users.hashers.TunedArgon2PasswordHasher',
+}
+PASSWORD_HASHERS = [PASSWORD_HASHER_PROFILES[PASSWORD_HASHER_PROFILE]] + [
+    hasher for profile, hasher in PASSWORD_HASHER_PROFILES.items() if profile != PASSWORD_HASHER_PROFILE
+] + ['django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher']
+PASSWORD_PBKDF2_ITERATIONS = config('PASSWORD_PBKDF2_ITERATIONS', default=600000, cast=int)
+PASSWORD_SCRYPT_WORK_FACTOR = config('PASSWORD_SCRYPT_WORK_FACTOR', default=2 ** 14, cast=int)
+PASSWORD_SCRYPT_BLOCK_SIZE = config('PASSWORD_SCRYPT_BLOCK_SIZE', default=8, cast=int)
+PASSWORD_SCRYPT_PARALLELISM = config('PASSWORD_SCRYPT_PARALLELISM', default=1, cast=int)
+PASSWORD_ARGON2_TIME_COST = config('PASSWORD_ARGON2_TIME_COST', default=2, cast=int)
+PASSWORD_ARGON2_MEMORY_COST = config('PASSWORD_ARGON2_MEMORY_COST', default=19456, cast=int)  # KiB
+PASSWORD_ARGON2_PARALLELISM = config('PASSWORD_ARGON2_PARALLELISM', default=1, cast=int)
+
 # 密码校验
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
@@ -95,13 +203,25 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # DRF 配置
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.users.authentication.UserJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
+    # 机器人接口的令牌桶限流（apps.bots.throttling），'次数/周期'，留空表示不限流
+    'DEFAULT_THROTTLE_RATES': {
+        'bot_heartbeat': config('BOT_THROTTLE_HEARTBEAT', default='30/min'),
+        'bot_heartbeat_ip': config('BOT_THROTTLE_HEARTBEAT_IP', default='1200/min'),
+        'bot_register': config('BOT_THROTTLE_REGISTER', default='10/hour'),
+        'bot_register_ip': config('BOT_THROTTLE_REGISTER_IP', default='60/hour'),
+        'bot_plaza': config('BOT_THROTTLE_PLAZA', default='120/min'),
+        # 登录按客户端地址的滑动窗口（apps.users.throttling）
+        'login_ip': config('LOGIN_THROTTLE_IP', default='20/min'),
+    },
+    # 客户端与应用之间的反向代理层数，按 X-Forwarded-For 识别客户端地址（经 Nginx 部署时为 1）
+    'NUM_PROXIES': config('NUM_PROXIES', default=0, cast=int),
 }
 
 # JWT 配置
@@ -111,4 +231,47 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
+# True 时 JWT 认证不查询用户行，request.user 由令牌中的 user_id 与缓存的 (token_version, is_active) 构造，
+# 其他字段在首次访问时加载；令牌吊销与用户停用在其他 worker 中最迟 JWT_TOKEN_STATE_CACHE_TTL 秒后生效
+JWT_TOKEN_USER = config('JWT_TOKEN_USER', default=False, cast=bool)
+JWT_TOKEN_STATE_CACHE_TTL = config('JWT_TOKEN_STATE_CACHE_TTL', default=60, cast=float)
+
+# 以 ASGI（config.asgi）部署时设为 True，心跳与机器人广场列表改用异步视图
+BOT_ASYNC_VIEWS = config('BOT_ASYNC_VIEWS', default=False, cast=bool)
+
+# 机器人心跳写入模式
+# sync: 每次心跳同步写库；buffered: 写入进程内缓冲区，按周期合并为批量 UPDATE；
+# coalesced: 状态不变且 last_seen 距今不足 GRANULARITY 秒时跳过写库
+# 注意 MAX_STALENESS 与 GRANULARITY 需明显小于 check_bot_status 的离线超时
+BOT_HEARTBEAT_MODE = config('BOT_HEARTBEAT_MODE', default='sync')
+BOT_HEARTBEAT_FLUSH_INTERVAL = config('BOT_HEARTBEAT_FLUSH_INTERVAL', default=5, cast=float)
+BOT_HEARTBEAT_MAX_STALENESS = config('BOT_HEARTBEAT_MAX_STALENESS', default=30, cast=float)
+BOT_HEARTBEAT_GRANULARITY = config('BOT_HEARTBEAT_GRANULARITY', default=30, cast=float)
+
+# BotAuthentication 的进程内 API Key 缓存：条目存活秒数（0 表示关闭）与最大条目数
+# 其他 worker 中已吊销的 Key 最迟在 TTL 秒后失效
+BOT_API_KEY_CACHE_TTL = config('BOT_API_KEY_CACHE_TTL', default=60, cast=float)
+BOT_API_KEY_CACHE_SIZE = config('BOT_API_KEY_CACHE_SIZE', default=10000, cast=int)
+
+# 批量注册接口单次请求最多包含的机器人数
+BOT_REGISTER_BATCH_MAX_SIZE = config('BOT_REGISTER_BATCH_MAX_SIZE', default=500, cast=int)
+
+# 机器人列表默认分页方式：page（页码分页）或 cursor（按创建时间的键集分页）
+# 请求中可用 ?pagination=page|cursor 覆盖
+BOT_LIST_PAGINATION = config('BOT_LIST_PAGINATION', default='page')
+
+# ?q= 检索参与排序的候选数与结果总数的上限，超出时 count_approximate 为 true
+BOT_SEARCH_MAX_COUNT = config('BOT_SEARCH_MAX_COUNT', default=500, cast=int)
+
+# 机器人广场匿名读缓存的存活秒数（0 表示关闭），机器人变更时按版本号整体失效
+BOT_PLAZA_CACHE_TTL = config('BOT_PLAZA_CACHE_TTL', default=10, cast=float)
 
+# 机器人在线状态推送流（GET /api/bots/presence/）
+# 每个流占用一个 worker 线程，单个 worker 同时最多 BOT_PRESENCE_MAX_STREAMS 个流，
+# 流最长持续 MAX_DURATION 秒后由客户端重连，空闲时每隔 KEEPALIVE 秒发送保活注释
+BOT_PRESENCE_MAX_STREAMS = config('BOT_PRESENCE_MAX_STREAMS', default=8, cast=int)
+BOT_PRESENCE_MAX_DURATION = config('BOT_PRESENCE_MAX_DURATION', default=300, cast=float)
+BOT_PRESENCE_KEEPALIVE = config('BOT_PRESENCE_KEEPALIVE', default=15, cast=float)
+BOT_PRESENCE_RETRY_MS = 3000
+BOT_PRESENCE_LISTEN_TIMEOUT = 5
+BOT_PRESENCE_SNAPSHOT_LIMIT = 1000
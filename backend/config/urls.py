@@ -5,18 +5,21 @@ from django.conf.urls.static import static
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
+from apps.monitoring.views import readiness
 
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def health_check(request):
-    """服务健康检查"""
+    """存活检查：进程能处理请求即返回 ok，不访问数据库（数据库检查见 /api/health/ready/）"""
     return Response({'status': 'ok', 'service': 'Dungeon Toolkit API'})
 
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/health/', health_check, name='health'),
+    path('api/health/ready/', readiness, name='health-ready'),
     path('api/auth/', include('apps.users.urls')),
     path('api/bots/', include('apps.bots.urls')),
+    path('api/metrics/', include('apps.monitoring.urls')),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -4,6 +4,26 @@ from django.contrib.auth import get_user_model
 User = get_user_model()
 
 
+@pytest.fixture(autouse=True)
+def clear_api_key_cache():
+    from apps.bots.authentication import api_key_cache
+    api_key_cache.clear()
+    yield
+    api_key_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import caches
+    from apps.bots.cache import plaza_cache
+    for alias in ('default', 'limits'):
+        caches[alias].clear()
+    plaza_cache.reset_stats()
+    yield
+    for alias in ('default', 'limits'):
+        caches[alias].clear()
+
+
 @pytest.fixture
 def user(db):
     return User.objects.create_user(
@@ -0,0 +1,11 @@
+"""
+gunicorn 配置，从 backend 目录启动时自动加载，其余参数仍在命令行中给出
+"""
+import os
+
+
+def child_exit(server, worker):
+    # 多进程指标：worker 退出后清理其 livesum / liveall 类 Gauge 的文件
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
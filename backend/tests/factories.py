@@ -1,5 +1,8 @@
+import secrets
+
 import factory
 from factory.django import DjangoModelFactory
+from apps.bots.models import Bot
 from apps.users.models import User
 
 
@@ -11,3 +14,14 @@ class UserFactory(DjangoModelFactory):
     email = factory.LazyAttribute(lambda obj: f'{obj.username}@example.com')
     password = factory.PostGenerationMethodCall('set_password', 'password123')
     avatar = ''
+
+
+class BotFactory(DjangoModelFactory):
+    class Meta:
+        model = Bot
+
+    bot_id = factory.Sequence(lambda n: str(100000 + n))
+    nickname = 'TestBot'
+    master = factory.SubFactory(UserFactory)
+    master_qq = '987654'
+    api_key = factory.LazyFunction(lambda: secrets.token_hex(32))